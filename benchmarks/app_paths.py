@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from time import perf_counter, sleep
+from benchmarks.synthetic import dataset_arguments, dataset_params, load_dataset, stand_in_backend
+
+# End-to-end latency of the app's hot paths on a synthetic genome, driven through GeneApp itself on an
+# offscreen Qt platform (no display needed), against a throwaway schema on the configured server
+# or, with --backend memory, the embedded in-process backend:
+#   python -m benchmarks.app_paths --genes 100000 --samples 20 --output bench.jsonl
+# Every run can be appended as one JSON line, so results can be compared across commits.
+TIMEOUT = 60.0  # Seconds one operation may take before the run is aborted
+MEMORY_PAGE = 5000  # Genes per page when loading the whole genome for the memory measurement
+SAVED_TEXT = "benchmark edit"
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "samples": len(ordered),
+        "median_ms": statistics.median(ordered),
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_ms": ordered[-1],
+        "mean_ms": statistics.fmean(ordered),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class AppDriver:
+    # Runs GeneApp in this process with modal dialogs answered automatically, and measures each call from the
+    # moment it is made until its result is visible in the app (the executor delivered it on the GUI thread)
+    def __init__(self, backend):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication, QMessageBox
+        import gene_app
+
+        self.application = QApplication.instance() or QApplication([])
+        self.dialogs = []
+        gene_app.confirmation_dialog = lambda message, parent=None: QMessageBox.StandardButton.Yes
+        for name in ("information", "warning", "critical"):
+            setattr(QMessageBox, name, staticmethod(lambda parent, title, text, *rest: self.dialogs.append((title, text))))
+        self.removals = 0
+        started = perf_counter()
+        self.app = gene_app.GeneApp(backend)
+        self.app.show()
+        self.app.gene_model.genesRemoved.connect(self.count_removal)
+        self.settle(lambda: self.app.search_index.ready)
+        self.startup_ms = (perf_counter() - started) * 1000
+
+    def count_removal(self, *_):
+        self.removals += 1
+
+    def settle(self, predicate, timeout=TIMEOUT):
+        deadline = perf_counter() + timeout
+        while not predicate():
+            if perf_counter() > deadline:
+                raise TimeoutError("Benchmarked operation did not finish")
+            self.application.processEvents()
+            sleep(0.0002)
+
+    def timed(self, action, predicate):
+        started = perf_counter()
+        action()
+        self.settle(predicate)
+        return (perf_counter() - started) * 1000
+
+    def select(self, chromosome, region="", gene=""):
+        self.app.chromosome_entry.setText(chromosome)
+        self.app.region_entry.setText(region)
+        self.app.gene_entry.setText(gene)
+
+    def close_gene_tabs(self):
+        while self.app.tabs.count() > 1:
+            self.app.tabs.removeTab(1)
+
+    def update_visualizer(self):
+        # Summary: chromosome list laid out; search index: full type-ahead index rebuilt behind it
+        laid_out = []
+        record = lambda: laid_out.append(perf_counter())
+        self.app.gene_model.layoutChanged.connect(record)
+        old_index = self.app.search_index
+        started = perf_counter()
+        self.app.update_visualizer()
+        try:
+            self.settle(lambda: laid_out)
+            self.settle(lambda: self.app.search_index is not old_index and self.app.search_index.ready)
+        finally:
+            self.app.gene_model.layoutChanged.disconnect(record)
+        return (laid_out[0] - started) * 1000, (perf_counter() - started) * 1000
+
+    def search_gene(self, key):
+        self.select(*key)
+        tabs = self.app.tabs.count()
+        return self.timed(self.app.search_gene, lambda: self.app.tabs.count() > tabs)
+
+    def create_gene_tab(self, key, cold):
+        if cold:
+            self.app.detail_cache.invalidate(*key)
+        return self.timed(lambda: self.app.create_gene_tab(*key), lambda: key in self.app.detail_cache)
+
+    def save_gene_changes(self, key, flags):
+        write = []
+        return self.timed(
+            lambda: (self.app.save_gene_changes(*key, SAVED_TEXT, *flags), write.append(self.app.executor.last_write)),
+            lambda: write[0].done() and not self.app.save_queue.pending)
+
+    def delete(self, method, key):
+        self.select(*key)
+        removals = self.removals
+        return self.timed(method, lambda: self.removals > removals)
+
+    def close(self):
+        self.app.save_queue.flush_now()
+        self.app.executor.shutdown()
+        self.app.hide()
+
+
+def sample_keys(store, samples, seed):
+    # Distinct genes / regions / chromosomes from the loaded dataset, in a reproducible order
+    genes = []
+    regions = set()
+    for gene_id, chromosome, region, gene, *_ in store.search_rows():
+        regions.add((chromosome, region))
+        if len(genes) < samples * 20:
+            genes.append((chromosome, region, gene))
+    genes.sort()
+    regions = sorted(regions)
+    chromosomes = sorted(chromosome for chromosome, *_ in store.chromosome_counts())
+    randomizer = random.Random(seed)
+    randomizer.shuffle(genes)
+    randomizer.shuffle(regions)
+    randomizer.shuffle(chromosomes)
+    return genes, regions, chromosomes
+
+
+def model_memory(backend):
+    # Bytes the overview model holds per gene with every chromosome expanded and paged in: all allocations
+    # made while loading (tracemalloc), and the gene columns alone
+    from gene_model import GeneModel
+
+    def load(store):
+        model = GeneModel()
+        model.load_summary(store.chromosome_counts())
+        for name, chromosome in model.chromosomes.items():
+            model.set_expanded(name, True)
+            while not chromosome.complete:
+                rows = store.gene_page(name, chromosome.last_key, MEMORY_PAGE)
+                model.append_page(chromosome, rows, len(rows) < MEMORY_PAGE)
+        return model
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        model = backend.transaction(load)
+        # Pages are garbage by now, only what the model keeps is still traced
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    genes = model.genes.live.count()
+    return {
+        "genes": genes,
+        "bytes_per_gene": allocated / genes if genes else 0.0,
+        "column_bytes_per_gene": model.genes.bytes_per_gene(),
+    }
+
+
+def run(backend, samples, seed):
+    genes, regions, chromosomes = backend.transaction(lambda store: sample_keys(store, samples, seed))
+    driver = AppDriver(backend)
+    latencies = {name: [] for name in (
+        "update_visualizer.summary", "update_visualizer.search_index", "search_gene", "create_gene_tab.cold",
+        "create_gene_tab.cached", "save_gene_changes", "delete_gene", "delete_region", "delete_chromosome")}
+    try:
+        for _ in range(samples):
+            summary, search_index = driver.update_visualizer()
+            latencies["update_visualizer.summary"].append(summary)
+            latencies["update_visualizer.search_index"].append(search_index)
+
+        searched, opened, edited, deleted = (genes[i::4] for i in range(4))
+        for key in searched[:samples]:
+            latencies["search_gene"].append(driver.search_gene(key))
+            driver.close_gene_tabs()
+        for key in opened[:samples]:
+            latencies["create_gene_tab.cold"].append(driver.create_gene_tab(key, cold=True))
+            latencies["create_gene_tab.cached"].append(driver.create_gene_tab(key, cold=False))
+            driver.close_gene_tabs()
+        for number, key in enumerate(edited[:samples]):
+            latencies["save_gene_changes"].append(driver.save_gene_changes(key, (number % 2 == 0, number % 3 == 0)))
+
+        # Deletes last, each on different data; a chromosome is only deleted while others are left
+        for key in deleted[:samples]:
+            latencies["delete_gene"].append(driver.delete(driver.app.delete_gene, key))
+        for key in regions[:samples]:
+            latencies["delete_region"].append(driver.delete(driver.app.delete_region, key))
+        for chromosome in chromosomes[:min(samples, len(chromosomes) - 1)]:
+            latencies["delete_chromosome"].append(driver.delete(driver.app.delete_chromosome, (chromosome,)))
+    finally:
+        driver.close()
+    results = {name: summarize(values) for name, values in latencies.items() if values}
+    results["startup"] = summarize([driver.startup_ms])
+    return results, driver.dialogs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GeneApp hot paths on a synthetic genome (offscreen Qt)")
+    dataset_arguments(parser)
+    parser.add_argument("--samples", type=int, default=20, help="Measurements per operation")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--output", help="Append the results as one JSON line to this file")
+    args = parser.parse_args(argv)
+
+    with stand_in_backend(args.backend) as backend:
+        started = perf_counter()
+        backend.transaction(lambda store: load_dataset(store, **dataset_params(args)))
+        load_seconds = perf_counter() - started
+        # The app reports every save / delete on stdout; keep stdout for the results
+        memory = model_memory(backend)
+        with redirect_stdout(sys.stderr):
+            results, dialogs = run(backend, args.samples, args.seed)
+
+    report = {
+        "benchmark": "app_paths",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "dataset": dataset_params(args),
+        "load_seconds": load_seconds,
+        "results": results,
+        "model_memory": memory,
+        "diagnostics": backend.diagnostics.snapshot()["aggregates"],  # Per query shape / build phase totals
+    }
+    unexpected = [dialog for dialog in dialogs if dialog[0] != "Search Result"]
+    if unexpected:
+        report["dialogs"] = unexpected[:10]  # Warnings / errors the app showed during the run
+    if args.output:
+        with open(args.output, "a") as output:
+            output.write(json.dumps(report) + "\n")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{args.genes} genes, {args.samples} samples per operation (median / p95 / max ms), commit {report['commit']}")
+    for name, result in results.items():
+        print(f"{name:32} {result['median_ms']:9.2f} / {result['p95_ms']:9.2f} / {result['max_ms']:9.2f}")
+    print(f"{'model memory':32} {memory['bytes_per_gene']:9.1f} bytes per gene "
+          f"({memory['column_bytes_per_gene']:.1f} in the gene columns, {memory['genes']} genes)")
+    for title, text in unexpected:
+        print(f"Dialog during run: {title}: {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+from time import perf_counter
+from database import open_connection
+from migrations import migrate
+
+# Lookup latency before / after the index migrations, on a synthetic table in a throwaway schema:
+#   python -m benchmarks.lookup_indexes --rows 1000000
+SCHEMA = "gene_bench"
+
+QUERIES = {
+    "gene lookup (search / open / save / delete gene)":
+        ("SELECT gene_text, methylation_prone, radiation_prone FROM genes "
+         "WHERE chromosome = %s AND region = %s AND gene_name = %s", lambda key: key),
+    "region rows (delete region)":
+        ("SELECT count(*) FROM genes WHERE chromosome = %s AND region = %s", lambda key: key[:2]),
+    "chromosome rows (delete chromosome)":
+        ("SELECT count(*) FROM genes WHERE chromosome = %s", lambda key: key[:1]),
+    "methylation prone in chromosome (filter)":
+        ("SELECT region FROM genes WHERE methylation_prone AND chromosome = %s", lambda key: key[:1]),
+}
+
+
+def populate(cursor, rows, chromosomes, regions):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+    migrate(cursor, target=1)  # Just the bare table, as in the README
+    cursor.execute("""INSERT INTO genes (chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone)
+                      SELECT 'chr' || (i %% %s), 'r' || (i %% %s), 'G' || i, '', i %% 7 = 0, i %% 11 = 0
+                      FROM generate_series(1, %s) i""", (chromosomes, regions, rows))
+    cursor.execute("ANALYZE genes")
+
+
+def sample_keys(rows, chromosomes, regions, samples, seed=0):
+    randomizer = random.Random(seed)
+    keys = []
+    for _ in range(samples):
+        i = randomizer.randint(1, rows)
+        keys.append((f"chr{i % chromosomes}", f"r{i % regions}", f"G{i}"))
+    return keys
+
+
+def time_queries(cursor, keys):
+    results = {}
+    for name, (statement, params) in QUERIES.items():
+        latencies = []
+        for key in keys:
+            started = perf_counter()
+            cursor.execute(statement, params(key))
+            cursor.fetchall()
+            latencies.append((perf_counter() - started) * 1000)
+        results[name] = {"median_ms": statistics.median(latencies), "max_ms": max(latencies)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark genes lookups before and after the index migrations")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chromosomes", type=int, default=24)
+    parser.add_argument("--regions", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args(argv)
+
+    connection = open_connection()
+    connection.autocommit = True
+    cursor = connection.cursor()
+    try:
+        populate(cursor, args.rows, args.chromosomes, args.regions)
+        keys = sample_keys(args.rows, args.chromosomes, args.regions, args.samples)
+        before = time_queries(cursor, keys)
+        migrate(cursor)
+        cursor.execute("ANALYZE genes")
+        after = time_queries(cursor, keys)
+    finally:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.close()
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "before": before, "after": after}, indent=2))
+        return 0
+    print(f"{args.rows} rows, {args.samples} samples per query (median / max ms)")
+    for name in QUERIES:
+        print(f"{name:45} {before[name]['median_ms']:9.3f} / {before[name]['max_ms']:9.3f}  ->  "
+              f"{after[name]['median_ms']:7.3f} / {after[name]['max_ms']:7.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
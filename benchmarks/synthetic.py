@@ -0,0 +1,124 @@
+import argparse
+import random
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from database import DB_CONFIG, open_connection
+from storage import PostgresBackend, open_backend
+
+# Deterministic synthetic genomes and a stand-in database to load them into, shared by the benchmarks:
+#   python -m benchmarks.synthetic --genes 1000000
+# leaves the data in the gene_bench schema; PGOPTIONS="-c search_path=gene_bench" python main.py browses it.
+# --backend sqlite:genome.db writes an embedded database instead (GENE_STORE=sqlite:genome.db python main.py)
+SCHEMA = "gene_bench"
+REGION_SPAN = 5000  # Bases per synthetic region, region names are "start-end" like imported annotations
+GENE_SPAN = 2000  # Longest synthetic gene in bases
+LETTERS = "ACGT"
+
+
+def generate_genes(chromosomes=24, regions=100, genes=100000, text_size=200, seed=0,
+                   methylation_rate=0.15, radiation_rate=0.1):
+    # Yields rows in GENE_COLUMNS order (id order). regions is per chromosome; genes are spread evenly over all
+    # regions and placed at random inside their region, text lengths vary up to 2 * text_size.
+    # The same arguments always give the same rows
+    randomizer = random.Random(seed)
+    placer = random.Random(seed + 1)  # Own stream, so the other columns match datasets generated before coordinates
+    pool = "".join(randomizer.choice(LETTERS) for _ in range(max(text_size * 4, 1)))
+    region_count = chromosomes * regions
+    gene_index = 0
+    for region_index in range(region_count):
+        chromosome = f"chr{region_index // regions + 1}"
+        start = (region_index % regions) * REGION_SPAN + 1
+        region = f"{start}-{start + REGION_SPAN - 1}"
+        in_region = genes // region_count + (1 if region_index < genes % region_count else 0)
+        for _ in range(in_region):
+            gene_index += 1
+            length = randomizer.randint(0, text_size * 2) if text_size else 0
+            offset = randomizer.randrange(len(pool) - length + 1)
+            gene_start = start + placer.randrange(REGION_SPAN)
+            gene_end = min(gene_start + placer.randrange(GENE_SPAN), start + REGION_SPAN - 1)
+            yield (chromosome, region, f"G{gene_index:07d}", pool[offset:offset + length],
+                   randomizer.random() < methylation_rate, randomizer.random() < radiation_rate, gene_start, gene_end)
+
+
+def load_dataset(store, **params):
+    # Every migration, then the generated rows via the bulk import path of the store's backend
+    store.migrate()
+    inserted = store.import_rows(generate_genes(**params))
+    store.cursor.execute("ANALYZE genes")
+    return inserted
+
+
+@contextmanager
+def throwaway_schema(schema=SCHEMA, keep=False):
+    # Local stand-in database: a fresh schema on the configured server. While active, every connection opened
+    # from DB_CONFIG (PostgresBackend pools created meanwhile included) resolves "genes" inside it
+    admin = open_connection()
+    admin.autocommit = True
+    cursor = admin.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    previous = DB_CONFIG.get("options")
+    DB_CONFIG["options"] = f"-c search_path={schema}"
+    try:
+        yield schema
+    finally:
+        if previous is None:
+            DB_CONFIG.pop("options", None)
+        else:
+            DB_CONFIG["options"] = previous
+        if not keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        admin.close()
+
+
+@contextmanager
+def stand_in_backend(url="postgresql", schema=SCHEMA, keep=False):
+    # postgresql: a pooled backend on a throwaway schema; memory / sqlite:<path>: the embedded backend, no server
+    # Either way the backend's connections are closed when the block ends
+    if url != "postgresql":
+        backend = open_backend(url)
+        try:
+            yield backend
+        finally:
+            backend.close()
+        return
+    with throwaway_schema(schema, keep):
+        backend = PostgresBackend()  # Pool connections pick up the schema's search_path
+        try:
+            yield backend
+        finally:
+            backend.close()
+
+
+def dataset_arguments(parser):
+    parser.add_argument("--chromosomes", type=int, default=24)
+    parser.add_argument("--regions", type=int, default=100, help="Regions per chromosome")
+    parser.add_argument("--genes", type=int, default=100000)
+    parser.add_argument("--text-size", type=int, default=200, help="Average gene_text length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="postgresql", help="postgresql (throwaway schema), memory or sqlite:<path>")
+
+
+def dataset_params(args):
+    return {"chromosomes": args.chromosomes, "regions": args.regions, "genes": args.genes,
+            "text_size": args.text_size, "seed": args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a synthetic genome into its own schema (replacing it)")
+    dataset_arguments(parser)
+    parser.add_argument("--schema", default=SCHEMA)
+    args = parser.parse_args(argv)
+
+    with stand_in_backend(args.backend, args.schema, keep=True) as backend:
+        started = perf_counter()
+        inserted = backend.transaction(lambda store: load_dataset(store, **dataset_params(args)))
+    elapsed = perf_counter() - started
+    target = f"schema {args.schema}" if args.backend == "postgresql" else args.backend
+    print(f"Loaded {inserted} genes into {target} in {elapsed:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import json
+import select
+import threading
+from time import monotonic
+from PyQt6.QtCore import QObject, pyqtSignal
+from migrations import NOTIFY_CHANNEL
+
+FEED_BATCH = 0.2  # Seconds notifications are gathered after the first one, then delivered as one batch
+POLL_TIMEOUT = 0.5  # Seconds the listener waits on its socket before checking whether it should stop
+RECONNECT_DELAY = 5.0
+
+
+class ChangeFeed(QObject):
+    # Other clients' committed changes to genes, from the genes_notify triggers (migration 8). A thread LISTENs on a
+    # dedicated connection and delivers batches on the GUI thread as {chromosome: set of row ids, or None when a
+    # statement changed too many rows to list}. Notifications from this app's own pooled connections are skipped
+    changed = pyqtSignal(object)
+    # (Re)listening: whatever was committed while nobody listened is not in the feed and has to be caught up on
+    connected = pyqtSignal()
+
+    def __init__(self, backend, parent=None):
+        super().__init__(parent)
+        self.backend = backend
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        # Returns False when the backend has no notifications (SQLite), the caller polls instead
+        if not self.backend.notifications:
+            return False
+        self.thread = threading.Thread(target=self.run, name="change-feed", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(POLL_TIMEOUT * 2)
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                connection = self.backend.open_listener(NOTIFY_CHANNEL)
+            except Exception as error:
+                print("Error connecting the change feed:", error)
+                self.stopping.wait(RECONNECT_DELAY)
+                continue
+            self.connected.emit()
+            try:
+                self.listen(connection)
+            except Exception as error:
+                print("Change feed connection lost:", error)
+                self.stopping.wait(RECONNECT_DELAY)
+            finally:
+                connection.close()
+
+    def listen(self, connection):
+        changes = {}
+        deadline = None  # When the batch gathered so far is delivered
+        while not self.stopping.is_set():
+            timeout = POLL_TIMEOUT if deadline is None else max(0.0, deadline - monotonic())
+            if select.select([connection], [], [], timeout)[0]:
+                connection.poll()
+            for notify in connection.notifies:
+                if self.backend.owns(notify.pid):
+                    continue
+                change = json.loads(notify.payload)
+                chromosome, ids = change["c"], change["ids"]
+                if ids is None or changes.get(chromosome, ()) is None:
+                    changes[chromosome] = None
+                else:
+                    changes.setdefault(chromosome, set()).update(ids)
+                if deadline is None:
+                    deadline = monotonic() + FEED_BATCH
+            connection.notifies.clear()
+            if deadline is not None and monotonic() >= deadline:
+                if changes:
+                    self.changed.emit(changes)
+                changes = {}
+                deadline = None
@@ -1,18 +1,18 @@
-import psycopg2
-import sys
-
-def connect_to_database():
-    try:
-        connection = psycopg2.connect(
-            user="kokos",
-            password="kokos",
-            host="127.0.0.1",
-            port="5432",
-            database="based"
-        )
-        cursor = connection.cursor()
-        print("Connected to PostgreSQL")
-        return connection, cursor
-    except (Exception, psycopg2.Error) as error:
-        print("Error while connecting to PostgreSQL", error)
-        sys.exit(1)
+DB_CONFIG = {
+    "user": "kokos",
+    "password": "kokos",
+    "host": "127.0.0.1",
+    "port": "5432",
+    "database": "based",
+}
+
+def open_connection():
+    # Raises on failure; the app itself goes through storage.PostgresBackend's pool
+    import psycopg2
+    return psycopg2.connect(**DB_CONFIG)
+
+def connect_to_database():
+    # Raises psycopg2.Error on failure, the caller decides whether that is fatal
+    connection = open_connection()
+    print("Connected to PostgreSQL")
+    return connection, connection.cursor()
@@ -0,0 +1,83 @@
+from array import array
+from itertools import groupby
+from operator import add
+from migrations import BIN_SIZE
+
+
+def pairwise_sums(values):
+    if len(values) % 2:
+        values = values + array("q", [0])
+    return array("q", map(add, values[0::2], values[1::2]))
+
+
+class ChromosomeBins:
+    # One chromosome's gene / methylation / radiation counts as a pyramid: level 0 holds the gene_bins rows
+    # (BIN_SIZE bases each, dense), every level above sums pairs of the one below, up to a single bin
+    __slots__ = ("levels",)
+
+    def __init__(self, genes, methylation, radiation):
+        # Dense level 0 columns, one entry per bin from bin 0 on
+        self.levels = [(genes, methylation, radiation)]
+        while len(genes) > 1:
+            genes, methylation, radiation = (pairwise_sums(values) for values in (genes, methylation, radiation))
+            self.levels.append((genes, methylation, radiation))
+
+    @classmethod
+    def from_rows(cls, rows):
+        # rows are (bin, genes, methylation, radiation)
+        size = max((row[0] for row in rows), default=-1) + 1
+        genes, methylation, radiation = (array("q", bytes(8 * size)) for _ in range(3))
+        for number, gene_count, methylation_count, radiation_count in rows:
+            if number >= 0:
+                genes[number] = gene_count
+                methylation[number] = methylation_count
+                radiation[number] = radiation_count
+        return cls(genes, methylation, radiation)
+
+    def length(self):
+        # Bases up to the end of the last non-empty bin
+        return len(self.levels[0][0]) * BIN_SIZE
+
+    def window(self, start, end, level):
+        # (first base, last base, genes, methylation, radiation) of the non-empty bins at level overlapping
+        # the 1-based window [start, end]
+        level = min(level, len(self.levels) - 1)
+        genes, methylation, radiation = self.levels[level]
+        width = BIN_SIZE << level
+        first = max(0, (start - 1) // width)
+        last = min(len(genes) - 1, (end - 1) // width)
+        return [(number * width + 1, (number + 1) * width, genes[number], methylation[number], radiation[number])
+                for number in range(first, last + 1) if genes[number]]
+
+
+class DensityPyramid:
+    # Per-bin gene counts and flag ratios for every chromosome, read from the trigger-maintained gene_bins table.
+    # Whole-genome views read a handful of coarse bins instead of touching genes; a chromosome whose genes
+    # changed is re-read on its own (replace)
+    def __init__(self):
+        self.chromosomes = {}  # chromosome -> ChromosomeBins
+
+    @classmethod
+    def build(cls, rows):
+        # rows are (chromosome, bin, genes, methylation, radiation) ordered by chromosome
+        pyramid = cls()
+        for chromosome, bins in groupby(rows, key=lambda row: row[0]):
+            pyramid.replace(chromosome, [row[1:] for row in bins])
+        return pyramid
+
+    def replace(self, chromosome, rows):
+        if rows:
+            self.chromosomes[chromosome] = ChromosomeBins.from_rows(rows)
+        else:
+            self.chromosomes.pop(chromosome, None)
+
+    def level_for(self, bases):
+        # Finest level whose bins are at least this many bases wide
+        level = 0
+        while (BIN_SIZE << level) < bases:
+            level += 1
+        return level
+
+    def window(self, chromosome, start, end, level):
+        bins = self.chromosomes.get(chromosome)
+        return bins.window(start, end, level) if bins is not None else []
@@ -0,0 +1,81 @@
+import sys
+from collections import OrderedDict
+
+MAX_ENTRIES = 2048
+MAX_BYTES = 32 * 1024 * 1024  # gene_text is an unbounded TEXT column, so bytes are bounded as well as entries
+
+
+class DetailCache:
+    # LRU cache of gene detail records: (chromosome, region, gene) -> (gene_text, methylation_prone, radiation_prone).
+    # Only touched on the GUI thread; background prefetches hand their rows over through the executor callbacks
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (record, size), least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+        self.epoch = 0  # Bumped by every invalidation; rows read before it changed may be stale
+
+    @staticmethod
+    def record_size(key, record):
+        return sum(sys.getsizeof(part) for part in key) + sys.getsizeof(record[0] or "")
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def put(self, key, record, epoch=None, prefetched=False):
+        # epoch is self.epoch from when the record was read, if it was read on a worker
+        if epoch is not None and epoch != self.epoch:
+            return
+        if prefetched and key in self.entries:
+            return  # Never let a neighbour prefetch refresh recency
+        self.discard(key)
+        size = self.record_size(key, record)
+        if size > self.max_bytes:
+            return  # Would evict everything else for one huge text
+        self.entries[key] = (record, size)
+        self.bytes += size
+        if prefetched:
+            self.prefetched += 1
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def invalidate(self, chromosome, region=None, gene=None):
+        # One gene, a region or a whole chromosome (matches GeneModel.genesRemoved)
+        self.epoch += 1
+        if region is not None and gene is not None:
+            self.discard((chromosome, region, gene))
+            return
+        for key in [key for key in self.entries if key[0] == chromosome and region in (None, key[1])]:
+            self.discard(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "prefetched": self.prefetched,
+        }
@@ -0,0 +1,129 @@
+import csv
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter, time
+
+RECENT_EVENTS = 500  # Latest individual events kept for the panel / dump, older ones only live on in the totals
+
+# Event kinds
+QUERY = "query"
+SPAN = "span"
+STALL = "stall"
+
+CSV_COLUMNS = ("kind", "name", "count", "total_ms", "mean_ms", "max_ms", "rows", "fetch_ms")
+
+
+class Aggregate:
+    __slots__ = ("count", "total", "maximum", "rows", "fetch")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.rows = 0
+        self.fetch = 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.maximum * 1000,
+            "rows": self.rows,
+            "fetch_ms": self.fetch * 1000,
+        }
+
+
+class Diagnostics:
+    # Always-on, thread-safe counters: a dict update and a bounded deque append per event, no I/O.
+    # Queries are keyed by statement shape (the store's query name), spans by phase name
+    def __init__(self, recent=RECENT_EVENTS):
+        self.lock = threading.Lock()
+        self.aggregates = {}  # (kind, name) -> Aggregate
+        self.events = deque(maxlen=recent)  # (wall time, kind, name, seconds, rows)
+        self.started = time()
+
+    def record(self, kind, name, seconds, rows=0):
+        with self.lock:
+            aggregate = self.aggregates.get((kind, name))
+            if aggregate is None:
+                aggregate = self.aggregates[(kind, name)] = Aggregate()
+            aggregate.count += 1
+            aggregate.total += seconds
+            aggregate.rows += rows
+            if seconds > aggregate.maximum:
+                aggregate.maximum = seconds
+            self.events.append((time(), kind, name, seconds, rows))
+
+    def query(self, shape, seconds, rows=0):
+        # One execution of a statement shape; rows is the affected row count for statements without results
+        self.record(QUERY, shape, seconds, rows)
+
+    def fetched(self, shape, seconds, rows, execution):
+        # Rows of the shape's last execution pulled to the client: added to its cost, not counted as a new query.
+        # execution is that execution's cost so far, fetches included
+        with self.lock:
+            aggregate = self.aggregates.get((QUERY, shape))
+            if aggregate is None:
+                aggregate = self.aggregates[(QUERY, shape)] = Aggregate()
+            aggregate.total += seconds
+            aggregate.fetch += seconds
+            aggregate.rows += rows
+            if execution > aggregate.maximum:
+                aggregate.maximum = execution
+
+    @contextmanager
+    def span(self, name):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(SPAN, name, perf_counter() - started)
+
+    def stall(self, seconds):
+        self.record(STALL, "event loop", seconds)
+
+    def reset(self):
+        with self.lock:
+            self.aggregates = {}
+            self.events.clear()
+            self.started = time()
+
+    def summary(self):
+        # [(kind, name, aggregate dict)], most total time first
+        with self.lock:
+            items = [(kind, name, aggregate.as_dict()) for (kind, name), aggregate in self.aggregates.items()]
+        return sorted(items, key=lambda item: -item[2]["total_ms"])
+
+    def recent(self, kind=None):
+        with self.lock:
+            events = list(self.events)
+        return [{"time": at, "kind": event_kind, "name": name, "ms": seconds * 1000, "rows": rows}
+                for at, event_kind, name, seconds, rows in events if kind in (None, event_kind)]
+
+    def snapshot(self):
+        return {
+            "since": self.started,
+            "taken": time(),
+            "aggregates": [dict(kind=kind, name=name, **values) for kind, name, values in self.summary()],
+            "recent": self.recent(),
+        }
+
+    def dump_json(self, path):
+        with open(path, "w") as output:
+            json.dump(self.snapshot(), output, indent=2)
+
+    def dump_csv(self, path):
+        with open(path, "w", newline="") as output:
+            writer = csv.writer(output)
+            writer.writerow(CSV_COLUMNS)
+            for kind, name, values in self.summary():
+                writer.writerow([kind, name] + [values[column] for column in CSV_COLUMNS[2:]])
+
+    def dump(self, path):
+        if path.lower().endswith(".csv"):
+            self.dump_csv(path)
+        else:
+            self.dump_json(path)
@@ -0,0 +1,105 @@
+from time import perf_counter
+from PyQt6.QtCore import QObject, Qt, QTimer
+from PyQt6.QtWidgets import (QDialog, QFileDialog, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+                             QVBoxLayout)
+from diagnostics import CSV_COLUMNS
+
+STALL_INTERVAL_MS = 50  # Heartbeat period on the GUI thread
+STALL_THRESHOLD = 0.1  # Seconds a heartbeat may arrive late before it counts as a stall
+REFRESH_MS = 1000
+
+
+class StallDetector(QObject):
+    # A heartbeat timer on the GUI thread: when it fires late, the event loop was blocked for the difference
+    def __init__(self, diagnostics, interval_ms=STALL_INTERVAL_MS, threshold=STALL_THRESHOLD, parent=None):
+        super().__init__(parent)
+        self.diagnostics = diagnostics
+        self.interval = interval_ms / 1000
+        self.threshold = threshold
+        self.last = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.beat)
+
+    def start(self):
+        self.last = perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def beat(self):
+        now = perf_counter()
+        late = now - self.last - self.interval
+        self.last = now
+        if late > self.threshold:
+            self.diagnostics.stall(late)
+
+
+class DiagnosticsPanel(QDialog):
+    # Live view of the always-on counters: per query shape / build phase / stall totals, refreshed every second
+    def __init__(self, diagnostics, parent=None):
+        super().__init__(parent)
+        self.diagnostics = diagnostics
+        self.setWindowTitle("Diagnostics")
+        self.resize(820, 480)
+        layout = QVBoxLayout(self)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+        self.table = QTableWidget(0, len(CSV_COLUMNS))
+        self.table.setHorizontalHeaderLabels(CSV_COLUMNS)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        for label, slot in (("Reset", self.reset), ("Export JSON...", self.export_json),
+                            ("Export CSV...", self.export_csv), ("Close", self.close)):
+            button = QPushButton(label)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        summary = self.diagnostics.summary()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(summary))
+        for row, (kind, name, values) in enumerate(summary):
+            cells = [kind, name] + [values[column] for column in CSV_COLUMNS[2:]]
+            for column, value in enumerate(cells):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, round(value, 3) if isinstance(value, float) else value)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        stalls = self.diagnostics.recent("stall")
+        worst = max((event["ms"] for event in stalls), default=0.0)
+        self.status.setText(f"{len(summary)} query shapes / phases, {len(stalls)} recent event loop stalls "
+                            f"(worst {worst:.0f} ms)")
+
+    def reset(self):
+        self.diagnostics.reset()
+        self.refresh()
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", "diagnostics.json", "JSON (*.json)")
+        if path:
+            self.diagnostics.dump_json(path)
+
+    def export_csv(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", "diagnostics.csv", "CSV (*.csv)")
+        if path:
+            self.diagnostics.dump_csv(path)
@@ -1,462 +1,1205 @@
-from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QLabel, QLineEdit, QPushButton, QRadioButton, QFrame, QMessageBox, QGridLayout, QHBoxLayout, QDialog, QCheckBox
-from PyQt6.QtCore import Qt
-import psycopg2
-from database import connect_to_database
-from utils import confirmation_dialog
-from gene_label import GeneLabel
-from itertools import cycle
-
-class GeneApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Gene Mapping App")
-        self.setGeometry(100, 100, 600, 700)
-        self.setWindowIcon(QIcon('icon.png'))
-
-        self.connection, self.cursor = connect_to_database()
-
-        self.chromosomes = {}
-        self.color_cycles = {}
-        self.gene_counter = 0  # Counter unique tab names
-
-        self.create_widgets()
-        self.create_menu()
-
-        self.update_visualizer()
-
-    def create_widgets(self):
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        layout = QVBoxLayout(central_widget)
-
-        # Create Notebook (Tabs)
-        self.tabs = QTabWidget()
-        layout.addWidget(self.tabs)
-
-        # Create Overview tab
-        self.overview_frame = QWidget()
-        self.tabs.addTab(self.overview_frame, "Overview")
-        self.create_overview_widgets()
-
-    def create_menu(self):
-        menu_bar = self.menuBar()
-        info_menu = menu_bar.addMenu("About")
-        info_menu.aboutToShow.connect(self.show_info_page)
-
-    def show_info_page(self):
-        info_msg = QMessageBox(self)
-        info_msg.setWindowTitle("About Gene Visualiser App")
-        info_msg.setText("SKJ project\nVersion: 4.0\nAuthor: PYT0031")
-        info_msg.exec()
-
-    def open_gene_tab(self, chromosome, region, gene):
-        if (chromosome, region, gene) in self.gene_labels:
-            gene_label = self.gene_labels[(chromosome, region, gene)]
-            if gene_label.active:
-                self.create_gene_tab(chromosome, region, gene)
-            else:
-                print("Gene label is inactive and cannot be opened.")
-        else:
-            print("Gene label not found.")
-
-    def create_overview_widgets(self):
-        layout = QVBoxLayout(self.overview_frame)
-
-        # Form layout
-        form_layout = QGridLayout()
-
-        self.chromosome_entry = QLineEdit()
-        form_layout.addWidget(QLabel("Chromosome:"), 0, 0)
-        form_layout.addWidget(self.chromosome_entry, 0, 1)
-
-        self.region_entry = QLineEdit()
-        form_layout.addWidget(QLabel("Region:"), 1, 0)
-        form_layout.addWidget(self.region_entry, 1, 1)
-
-        self.gene_entry = QLineEdit()
-        form_layout.addWidget(QLabel("Gene:"), 2, 0)
-        form_layout.addWidget(self.gene_entry, 2, 1)
-
-        layout.addLayout(form_layout)
-
-        # Button layout
-        button_layout = QHBoxLayout()
-        self.add_button = QPushButton("Add Gene")
-        self.delete_chromosome_button = QPushButton("Delete Chromosome")
-        self.delete_region_button = QPushButton("Delete Region")
-        self.delete_gene_button = QPushButton("Delete Gene")
-        self.search_gene_button = QPushButton("Search Gene")
-        button_layout.addWidget(self.add_button)
-        button_layout.addWidget(self.delete_chromosome_button)
-        button_layout.addWidget(self.delete_region_button)
-        button_layout.addWidget(self.delete_gene_button)
-        button_layout.addWidget(self.search_gene_button)
-        layout.addLayout(button_layout)
-
-        # Visual separator of filters
-        line = QFrame()
-        line.setFrameShape(QFrame.Shape.HLine)
-        line.setFrameShadow(QFrame.Shadow.Sunken)
-        layout.addWidget(line)
-
-        # Filters layout
-        filters_layout = QHBoxLayout()
-        self.filter_radio1 = QRadioButton("Radiation prone")
-        self.filter_radio2 = QRadioButton("Methylation prone")
-        filters_layout.addWidget(QLabel("Filters:"))
-        filters_layout.addWidget(self.filter_radio1)
-        filters_layout.addWidget(self.filter_radio2)
-        layout.addLayout(filters_layout)
-
-        # Connect filter changes
-        self.filter_radio1.toggled.connect(self.update_visualizer)
-        self.filter_radio2.toggled.connect(self.update_visualizer)
-
-        # Chromosome Visualizer (Canvas)
-        self.chromosome_canvas = QFrame()
-        self.chromosome_canvas.setFrameStyle(QFrame.Shape.Box)
-        layout.addWidget(self.chromosome_canvas)
-
-        self.chromosome_layout = QVBoxLayout(self.chromosome_canvas)
-        self.chromosome_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.chromosome_layout.setSpacing(10)
-
-        # Connect add_gene method to Add Gene button
-        self.add_button.clicked.connect(self.add_gene)
-        self.delete_chromosome_button.clicked.connect(self.delete_chromosome)
-        self.delete_region_button.clicked.connect(self.delete_region)
-        self.delete_gene_button.clicked.connect(self.delete_gene)
-
-        # Connect search_gene function to the Search Gene button
-        self.search_gene_button.clicked.connect(self.search_gene)
-
-    def add_gene(self):
-        chromosome = self.chromosome_entry.text()
-        region = self.region_entry.text()
-        gene = self.gene_entry.text()
-
-        if chromosome and region and gene:
-            try:
-                self.cursor.execute("INSERT INTO genes (chromosome, region, gene_name) VALUES (%s, %s, %s)",
-                                    (chromosome, region, gene))
-                self.connection.commit()
-                print("Gene added successfully")
-
-                # Update visualizer after successfully adding the gene
-                self.update_visualizer()
-
-            except (Exception, psycopg2.Error) as error:
-                print("Error inserting gene into the database:", error)
-                self.connection.rollback()
-
-        else:
-            QMessageBox.critical(self, "Error", "Chromosome, region, and gene name cannot be empty.")
-
-    def update_visualizer(self):
-        # Clear existing labels and layouts (duplicates and / or filtering)
-        for i in reversed(range(self.chromosome_layout.count())):
-            item = self.chromosome_layout.itemAt(i)
-            if item:
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-                layout = item.layout()
-                if layout:
-                    layout.deleteLater()
-
-        # Get filter states
-        radiation_prone = self.filter_radio1.isChecked()
-        methylation_prone = self.filter_radio2.isChecked()
-
-        max_x = 0
-        max_y = 0
-
-        # Fetch gene data from the database
-        try:
-            self.cursor.execute("SELECT chromosome, region, gene_name, methylation_prone, radiation_prone FROM genes")
-            gene_data = self.cursor.fetchall()
-        except (Exception, psycopg2.Error) as error:
-            print("Error retrieving gene data from the database:", error)
-            return
-
-        # Store references to gene labels and colored boxes (only GUI related stuff basically)
-        self.gene_labels = {}
-        chromosome_labels = {}  # Store chromosome labels to avoid duplication
-        region_labels = {}  # Store region labels to avoid duplication
-        gene_layouts = {}  # Store gene layouts by chromosome and region
-
-        # Store positions of region labels
-        region_positions = {}
-
-        # Process fetched data and update visualizer
-        for chrom, reg, gene, methylation_prone_db, radiation_prone_db in gene_data:
-            self.color_cycles.setdefault(chrom, cycle(["red", "green", "blue", "orange", "purple"]))
-
-            # Create chromosome and region labels if not already created
-            if chrom not in chromosome_labels:
-                chromosome_label = QLabel(chrom)
-                chromosome_label.setStyleSheet("font-weight: bold;")
-                self.chromosome_layout.addWidget(chromosome_label)
-                max_y += 20
-                chromosome_labels[chrom] = chromosome_label
-
-            if reg not in region_labels:
-                region_label = QLabel(reg)
-                region_label.setStyleSheet("margin-left: 20px;")
-                self.chromosome_layout.addWidget(region_label)
-                max_y += 20
-                region_labels[reg] = region_label
-
-                # Store position of region label
-                region_positions[reg] = max_y
-
-            else:
-                # If region label exists, use its position
-                max_y = region_positions[reg]
-
-            # Create gene layout if not already created
-            if (chrom, reg) not in gene_layouts:
-                gene_layouts[(chrom, reg)] = QHBoxLayout()
-                self.chromosome_layout.addLayout(gene_layouts[(chrom, reg)])
-
-            gene_layout = gene_layouts[(chrom, reg)]
-
-            # Create gene label if gene is not None
-            if gene is not None:
-                gene_label = QLabel(gene)
-                color = next(self.color_cycles[chrom])
-                gene_label.setStyleSheet(
-                    f"background-color: {color}; color: white; border: 1px solid black; text-align: center;")
-                gene_label.setFixedSize(80, 20)
-                gene_label.setAlignment(Qt.AlignmentFlag.AlignCenter)  # Center text
-
-                # Store chromosome and region with gene label
-                gene_label.chromosome = chrom
-                gene_label.region = reg
-
-                # Adjust color based on filter states and gene properties
-                if (methylation_prone and radiation_prone_db) or (radiation_prone and methylation_prone_db):
-                    gene_label.setStyleSheet(
-                        "background-color: gray; color: white; border: 1px solid black; text-align: center;")
-                    gene_label.active = False  # Mark as inactive
-                else:
-                    gene_label.active = True  # Mark as active
-
-                # Connect gene label click event to open_gene_tab method
-                gene_label.mousePressEvent = lambda event, ch=chrom, rg=reg, ge=gene: self.open_gene_tab(ch, rg, ge)
-
-                self.chromosome_layout.addWidget(gene_label)
-                max_x += 100
-                max_y += 20
-
-                # Store reference to gene label
-                self.gene_labels[(chrom, reg, gene)] = gene_label
-
-        max_y += 10  # Space between chromosomes
-
-    def delete_chromosome(self):
-        chromosome = self.chromosome_entry.text()
-        if chromosome:
-            confirmation = confirmation_dialog("Are you sure you want to delete this chromosome?")
-            if confirmation == QMessageBox.StandardButton.Yes:
-                try:
-                    self.cursor.execute("DELETE FROM genes WHERE chromosome = %s", (chromosome,))
-                    self.connection.commit()
-                    print("Chromosome deleted successfully")
-                except (Exception, psycopg2.Error) as error:
-                    print("Error deleting chromosome from the database:", error)
-                    self.connection.rollback()
-
-                # Update visualizer after deleting chromosome
-                self.update_visualizer()
-        else:
-            QMessageBox.critical(self, "Error", "Chromosome name cannot be empty.")
-
-    def delete_region(self):
-        chromosome = self.chromosome_entry.text()
-        region = self.region_entry.text()
-        if chromosome and region:
-            confirmation = confirmation_dialog("Are you sure you want to delete this region?")
-            if confirmation == QMessageBox.StandardButton.Yes:
-                try:
-                    # Update database records for genes in the specified region
-                    self.cursor.execute(
-                        "UPDATE genes SET region = NULL, gene_name = NULL, methylation_prone = FALSE, radiation_prone = FALSE, gene_text = '' WHERE chromosome = %s AND region = %s",
-                        (chromosome, region))
-                    self.connection.commit()
-                    print("Region data updated successfully")
-                except (Exception, psycopg2.Error) as error:
-                    print("Error updating region data in the database:", error)
-                    self.connection.rollback()
-
-                # Update visualizer after deleting region
-                self.update_visualizer()
-        else:
-            QMessageBox.critical(self, "Error", "Chromosome and region names cannot be empty.")
-
-    def delete_gene(self):
-        chromosome = self.chromosome_entry.text()
-        region = self.region_entry.text()
-        gene = self.gene_entry.text()
-        if chromosome and region and gene:
-            confirmation = confirmation_dialog("Are you sure you want to delete this gene?")
-            if confirmation == QMessageBox.StandardButton.Yes:
-                try:
-                    # Update database records for the specified gene
-                    self.cursor.execute(
-                        "UPDATE genes SET gene_name = NULL, methylation_prone = FALSE, radiation_prone = FALSE, gene_text = '' WHERE chromosome = %s AND region = %s AND gene_name = %s",
-                        (chromosome, region, gene))
-                    self.connection.commit()
-                    print("Gene data updated successfully")
-                except (Exception, psycopg2.Error) as error:
-                    print("Error updating gene data in the database:", error)
-                    self.connection.rollback()
-
-                # Update visualizer after deleting gene
-                self.update_visualizer()
-        else:
-            QMessageBox.critical(self, "Error", "Chromosome, region, and gene names cannot be empty.")
-
-    def confirmation_dialog(self, message):
-        dialog = QMessageBox()
-        dialog.setIcon(QMessageBox.Icon.Warning)
-        dialog.setWindowTitle("Confirmation")
-        dialog.setText(message)
-        dialog.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        return dialog.exec()
-
-    def search_gene(self):
-        chromosome = self.chromosome_entry.text()
-        region = self.region_entry.text()
-        gene = self.gene_entry.text()
-        if chromosome and region and gene:
-            if (chromosome, region, gene) in self.gene_labels:
-                gene_label = self.gene_labels[(chromosome, region, gene)]
-                if gene_label.active:
-                    try:
-                        # Query the database to check if the gene exists for the specified chromosome and region
-                        self.cursor.execute(
-                            "SELECT COUNT(*) FROM genes WHERE chromosome = %s AND region = %s AND gene_name = %s",
-                            (chromosome, region, gene))
-                        count = self.cursor.fetchone()[0]
-                        if count > 0:
-                            # If the gene exists and is active, open its gene tab
-                            self.create_gene_tab(chromosome, region, gene)
-                            QMessageBox.information(self, "Search Result",
-                                                    f"Gene '{gene}' found in chromosome '{chromosome}' and region '{region}'.")
-                        else:
-                            QMessageBox.information(self, "Search Result", f"Gene '{gene}' not found.")
-                    except (Exception, psycopg2.Error) as error:
-                        print("Error searching for gene in the database:", error)
-                else:
-                    QMessageBox.warning(self, "Inactive Gene", "Inactive gene cannot be opened.")
-            else:
-                QMessageBox.warning(self, "Gene Not Found", "Gene not found in database.")
-        else:
-            QMessageBox.critical(self, "Error", "Chromosome, region, and gene names cannot be empty.")
-
-    def create_gene_tab(self, chromosome, region, gene):
-        gene_tab = QWidget()
-        gene_tab_layout = QVBoxLayout(gene_tab)
-
-        # Chromosome, Region, Gene information
-        gene_tab_layout.addWidget(QLabel(f"Chromosome: {chromosome}"))
-        gene_tab_layout.addWidget(QLabel(f"Region: {region}"))
-        gene_tab_layout.addWidget(QLabel(f"Gene: {gene}"))
-
-        # Text input box
-        text_box = QLineEdit()
-        text_box.setFixedHeight(100)  # Set fixed height for the text box because Qt is being dumb
-        gene_tab_layout.addWidget(text_box)
-
-        # Load previously saved text from the database if available
-        try:
-            self.cursor.execute("SELECT gene_text FROM genes WHERE chromosome = %s AND region = %s AND gene_name = %s", (chromosome, region, gene))
-            saved_text = self.cursor.fetchone()[0]
-            text_box.setText(saved_text)
-        except (Exception, psycopg2.Error) as error:
-            print("Error retrieving saved text from the database:", error)
-
-        # Checkboxes
-        checkbox_layout = QHBoxLayout()
-        methylation_checkbox = QCheckBox("Methylation Prone")
-        radiation_checkbox = QCheckBox("Radiation Prone")
-        checkbox_layout.addWidget(methylation_checkbox)
-        checkbox_layout.addWidget(radiation_checkbox)
-        gene_tab_layout.addLayout(checkbox_layout)
-
-        # Set checkbox states based on saved info
-        try:
-            self.cursor.execute("SELECT methylation_prone, radiation_prone FROM genes WHERE chromosome = %s AND region = %s AND gene_name = %s", (chromosome, region, gene))
-            saved_info = self.cursor.fetchone()
-            if saved_info:
-                methylation_checkbox.setChecked(saved_info[0])
-                radiation_checkbox.setChecked(saved_info[1])
-        except (Exception, psycopg2.Error) as error:
-            print("Error retrieving saved checkbox states from the database:", error)
-
-        # Store references to text box and checkboxes
-        gene_tab.gene_text_box = text_box
-        gene_tab.methylation_checkbox = methylation_checkbox
-        gene_tab.radiation_checkbox = radiation_checkbox
-
-        # Save and Close buttons for da gene tab
-        button_layout = QHBoxLayout()
-        save_button = QPushButton("Save")
-        close_button = QPushButton("Close")
-        button_layout.addWidget(save_button)
-        button_layout.addWidget(close_button)
-        gene_tab_layout.addLayout(button_layout)
-
-        # Adjust spacing
-        gene_tab_layout.setSpacing(10)  # Vertical
-        gene_tab_layout.setAlignment(Qt.AlignmentFlag.AlignTop)  # Align widgets
-
-        self.tabs.addTab(gene_tab, gene)
-
-        # Connect button clicks
-        save_button.clicked.connect(
-            lambda: self.save_gene_changes(chromosome, region, gene, text_box.text(), methylation_checkbox.isChecked(),
-                                           radiation_checkbox.isChecked()))
-        close_button.clicked.connect(lambda: self.close_gene_tab(gene_tab))
-
-    def close_gene_tab(self, gene_tab):
-        index = self.tabs.indexOf(gene_tab)
-        if index != -1:
-            self.tabs.removeTab(index)
-
-    def save_gene_changes(self, chromosome, region, gene, text, methylation_prone, radiation_prone):
-        # Check if gene data already exists
-        try:
-            self.cursor.execute("SELECT * FROM genes WHERE chromosome = %s AND region = %s AND gene_name = %s", (chromosome, region, gene))
-            existing_data = self.cursor.fetchone()
-        except (Exception, psycopg2.Error) as error:
-            print("Error checking existing gene data in the database:", error)
-
-        if existing_data:
-            # Update gene data
-            try:
-                self.cursor.execute("UPDATE genes SET gene_text = %s, methylation_prone = %s, radiation_prone = %s WHERE chromosome = %s AND region = %s AND gene_name = %s", (text, methylation_prone, radiation_prone, chromosome, region, gene))
-                self.connection.commit()
-                print("Gene data updated successfully")
-            except (Exception, psycopg2.Error) as error:
-                print("Error updating gene data in the database:", error)
-                self.connection.rollback()
-        else:
-            # Insert new gene data
-            try:
-                self.cursor.execute("INSERT INTO genes (chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone) VALUES (%s, %s, %s, %s, %s, %s)", (chromosome, region, gene, text, methylation_prone, radiation_prone))
-                self.connection.commit()
-                print("New gene data inserted successfully")
-            except (Exception, psycopg2.Error) as error:
-                print("Error inserting new gene data into the database:", error)
-                self.connection.rollback()
-
-    def closeEvent(self, event):
-        confirmation = confirmation_dialog("Are you sure you want to exit the application?")
-        if confirmation == QMessageBox.StandardButton.Yes:
-            event.accept()
-        else:
-            event.ignore()
-
+import os
+from bisect import bisect_right, insort
+from collections import deque
+from time import perf_counter
+from PyQt6.QtGui import QIcon, QAction
+from PyQt6.QtWidgets import QAbstractItemView, QFileDialog, QInputDialog, QListWidget, QListWidgetItem, QMainWindow, QWidget, QVBoxLayout, QTabWidget, QLabel, QLineEdit, QPushButton, QRadioButton, QFrame, QMessageBox, QGridLayout, QHBoxLayout, QDialog, QCheckBox, QSplitter, QMenu
+from PyQt6.QtCore import Qt, QTimer
+from query_executor import QueryExecutor
+from gene_import import import_file
+from gene_export import export_genes
+from storage import open_backend
+from save_queue import SaveQueue
+from utils import confirmation_dialog
+from gene_model import GeneModel
+from gene_canvas import GeneCanvas
+from genome_view import GenomeView
+from density import DensityPyramid
+from search_index import SEARCH_LIMIT, SearchIndex
+from interval_index import parse_locus, parse_span
+from detail_cache import DetailCache
+from diagnostics_panel import DiagnosticsPanel, StallDetector
+from snapshot import read_snapshot, snapshot_path, write_snapshot
+from change_feed import ChangeFeed
+from migrations import NOTIFY_IDS
+
+GENE_PAGE = 2000  # Genes fetched per page when a chromosome is expanded or scrolled
+APPLY_SLICE = 500  # Genes per GUI-thread slice of a long callback (pages, applied changes, index replay), a few ms
+DIAGNOSTICS_ENV = "GENE_DIAGNOSTICS"  # .json / .csv path the diagnostics are written to on exit
+PREFETCH_NEIGHBOURS = 8  # Genes on either side (by id, same region) read ahead into the detail cache when a tab opens
+BINS_REFRESH_MS = 250  # Changed chromosomes have their density bins re-read at most this often
+SNAPSHOT_DELTA_LIMIT = 64  # Chromosomes changed since the startup snapshot re-read one by one; more means a full reload
+FEED_POLL_MS = 5000  # Without LISTEN / NOTIFY (SQLite) other clients' changes are picked up from the counter this often
+
+class GeneApp(QMainWindow):
+    def __init__(self, backend=None):
+        super().__init__()
+        self.setWindowTitle("Gene Mapping App")
+        self.setGeometry(100, 100, 600, 700)
+        self.setWindowIcon(QIcon('icon.png'))
+
+        # Database I/O runs on worker threads through the storage backend, results come back as signals
+        self.executor = QueryExecutor(backend or open_backend(), parent=self)
+        self.executor.progress.connect(self.show_progress)
+
+        # Always-on timings: every statement (recorded by the backend's stores), build phases and event loop stalls
+        self.diagnostics = self.executor.backend.diagnostics
+        self.diagnostics_panel = None
+        self.stall_detector = StallDetector(self.diagnostics, parent=self)
+        self.stall_detector.start()
+
+        self.gene_model = GeneModel()
+        self.detail_cache = DetailCache()  # Recently opened / prefetched gene tab records
+        self.gene_model.genesRemoved.connect(self.detail_cache.invalidate)
+        self.save_queue = SaveQueue(self.executor, self.gene_model, self.detail_cache, self)  # Debounced, batched gene tab saves
+
+        # In-process type-ahead index over every gene name, kept in sync through the model's change signals
+        self.search_index = SearchIndex()
+        self.search_journal = None  # Changes seen while a rebuild is running, replayed onto the new index
+        self.search_rebuild = False  # The index went stale while a rebuild was running; build again once it is in
+        self.pending_jump = None
+        self.gene_model.geneAdded.connect(self.index_gene_added)
+        self.gene_model.genesRemoved.connect(self.index_genes_removed)
+        self.gene_counter = 0  # Counter unique tab names
+        self.selection = None  # (bulk edit selection, description)
+        self.bulk_undo = []  # Bulk action ids of this session, newest last
+
+        # Density bins of chromosomes whose genes changed are re-read together shortly after
+        self.stale_bins = set()
+        self.bins_timer = QTimer(self)
+        self.bins_timer.setSingleShot(True)
+        self.bins_timer.setInterval(BINS_REFRESH_MS)
+        self.bins_timer.timeout.connect(self.refresh_bins)
+        self.gene_model.geneAdded.connect(lambda gene_id, chromosome, *_: self.mark_bins_stale(chromosome))
+        self.gene_model.genesRemoved.connect(self.mark_bins_stale)
+        self.gene_model.geneFlagsChanged.connect(self.mark_bins_stale)
+
+        # The overview is painted from the last session's snapshot, then brought up to date from the database
+        self.snapshot_path = snapshot_path(self.executor.backend)
+        # (database token, change counter) the chromosome list / density bins are known to be current with
+        self.summary_state = None
+        self.bins_state = None
+
+        self.create_widgets()
+        self.create_menu()
+
+        # Other clients' changes: pushed through LISTEN / NOTIFY on PostgreSQL, polled from the change counter otherwise
+        self.catch_up_pending = False  # A catch-up asked for before the first load had set the counters
+        self.feed_pending = {}  # Notified changes waiting for the one in flight to be applied
+        self.feed_busy = False
+        self.change_feed = ChangeFeed(self.executor.backend, self)
+        self.change_feed.changed.connect(self.apply_feed)
+        self.change_feed.connected.connect(self.catch_up)
+        self.feed_timer = QTimer(self)
+        self.feed_timer.setInterval(FEED_POLL_MS)
+        self.feed_timer.timeout.connect(self.catch_up)
+        if not self.change_feed.start() and self.executor.backend.location() is not None:
+            self.feed_timer.start()  # An in-memory database has no other clients
+
+        # Bring the schema up to date first; reads queue behind this write
+        self.executor.ownChanges.connect(self.skip_own_changes)
+        self.executor.submit(lambda store: store.migrate(), self.migrated,
+                             lambda error: print("Error migrating the database schema:", error), write=True)
+        with self.diagnostics.span("startup.snapshot"):
+            snapshot = read_snapshot(self.snapshot_path) if self.snapshot_path else None
+            if snapshot is not None:
+                self.gene_model.load_summary(snapshot.summary)
+                self.genome_view.set_pyramid(snapshot.pyramid)
+        if snapshot is None:
+            self.update_visualizer()
+        else:
+            self.refresh_snapshot(snapshot)
+
+    def create_widgets(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+
+        # Create Notebook (Tabs)
+        self.tabs = QTabWidget()
+        layout.addWidget(self.tabs)
+
+        # Create Overview tab
+        self.overview_frame = QWidget()
+        self.tabs.addTab(self.overview_frame, "Overview")
+        self.create_overview_widgets()
+
+    def create_menu(self):
+        menu_bar = self.menuBar()
+        file_menu = menu_bar.addMenu("File")
+        import_action = QAction("Import Annotations...", self)
+        import_action.triggered.connect(self.import_annotations)
+        file_menu.addAction(import_action)
+        diagnostics_action = QAction("Diagnostics...", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        file_menu.addAction(diagnostics_action)
+
+        export_menu = menu_bar.addMenu("Export")
+        export_action = QAction("Export Genes...", self)
+        export_action.triggered.connect(lambda: self.export_genes(incremental=False))
+        export_menu.addAction(export_action)
+        append_action = QAction("Append New Genes to Export...", self)
+        append_action.triggered.connect(lambda: self.export_genes(incremental=True))
+        export_menu.addAction(append_action)
+
+        info_menu = menu_bar.addMenu("About")
+        info_menu.aboutToShow.connect(self.show_info_page)
+
+    def show_info_page(self):
+        info_msg = QMessageBox(self)
+        info_msg.setWindowTitle("About Gene Visualiser App")
+        info_msg.setText("SKJ project\nVersion: 4.0\nAuthor: PYT0031")
+        info_msg.exec()
+
+    def show_diagnostics(self):
+        if self.diagnostics_panel is None:
+            self.diagnostics_panel = DiagnosticsPanel(self.diagnostics, self)
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
+
+    def show_progress(self, name, count):
+        self.statusBar().showMessage(f"{name}: {count} rows")
+
+    def import_annotations(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Gene Annotations", "",
+                                              "Annotations (*.gff *.gff3 *.bed *.csv *.tsv *.gz);;All files (*)")
+        if not path:
+            return
+        started = perf_counter()
+
+        def run_import(store):
+            # One transaction for the whole file, batches report progress to the status bar
+            return import_file(store, path, progress=lambda count: self.executor.report_progress("Importing", count))
+
+        def imported(total):
+            elapsed = perf_counter() - started
+            message = f"Imported {total} genes in {elapsed:.2f} s ({total / elapsed if elapsed else 0:.0f} rows/s)"
+            print(message)
+            self.statusBar().showMessage(message)
+            self.update_visualizer()
+
+        def failed(error):
+            print("Error importing gene annotations:", error)
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Import Error", str(error))
+
+        self.executor.submit(run_import, imported, failed, write=True)
+
+    def export_genes(self, incremental):
+        # Streamed on the background worker with the overview's filter applied in SQL; appending adds only genes new
+        # since the last export to the same file (CSV / JSONL) or directory (Parquet)
+        path, chosen = QFileDialog.getSaveFileName(
+            self, "Append New Genes to Export" if incremental else "Export Genes", "",
+            "CSV (*.csv);;JSON Lines (*.jsonl);;Parquet (*.parquet)",
+            options=QFileDialog.Option.DontConfirmOverwrite if incremental else QFileDialog.Option(0))
+        if not path:
+            return
+        file_format = {"CSV": "csv", "JSON Lines": "jsonl", "Parquet": "parquet"}.get(chosen.split(" (")[0])
+        if not os.path.splitext(path)[1] and file_format:
+            path = f"{path}.{file_format}"
+        filter_name = ("radiation" if self.filter_radio1.isChecked() else
+                       "methylation" if self.filter_radio2.isChecked() else "none")
+        started = perf_counter()
+
+        def run_export(store):
+            return export_genes(store, path, file_format, filter_name, incremental,
+                                lambda count: self.executor.report_progress("Exporting", count))
+
+        def exported(total):
+            elapsed = perf_counter() - started
+            message = f"Exported {total} genes in {elapsed:.2f} s ({total / elapsed if elapsed else 0:.0f} rows/s)"
+            print(message)
+            self.statusBar().showMessage(message)
+
+        def failed(error):
+            print("Error exporting genes:", error)
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Export Error", str(error))
+
+        # Keyed so closing the app (QueryExecutor.shutdown), or another export to the same file, can cancel it
+        self.executor.submit(run_export, exported, failed, key=f"export:{path}", background=True)
+
+    def open_gene_tab(self, chromosome, region, gene):
+        handle = self.gene_model.find(chromosome, region, gene)
+        if handle is not None:
+            if self.gene_model.is_active(handle):
+                self.create_gene_tab(chromosome, region, gene)
+            else:
+                print("Gene label is inactive and cannot be opened.")
+        else:
+            print("Gene label not found.")
+
+    def create_overview_widgets(self):
+        layout = QVBoxLayout(self.overview_frame)
+
+        # Form layout
+        form_layout = QGridLayout()
+
+        self.chromosome_entry = QLineEdit()
+        form_layout.addWidget(QLabel("Chromosome:"), 0, 0)
+        form_layout.addWidget(self.chromosome_entry, 0, 1)
+
+        self.region_entry = QLineEdit()
+        form_layout.addWidget(QLabel("Region:"), 1, 0)
+        form_layout.addWidget(self.region_entry, 1, 1)
+
+        self.gene_entry = QLineEdit()
+        form_layout.addWidget(QLabel("Gene:"), 2, 0)
+        form_layout.addWidget(self.gene_entry, 2, 1)
+
+        layout.addLayout(form_layout)
+
+        # Type-ahead results for the gene entry (click jumps to the gene, double click opens it)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(120)
+        self.search_results.hide()
+        layout.addWidget(self.search_results)
+        self.gene_entry.textEdited.connect(self.update_search_results)
+        self.search_results.itemClicked.connect(self.jump_to_search_result)
+        self.search_results.itemDoubleClicked.connect(self.open_search_result)
+        self.search_results.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+
+        # Button layout
+        button_layout = QHBoxLayout()
+        self.add_button = QPushButton("Add Gene")
+        self.delete_chromosome_button = QPushButton("Delete Chromosome")
+        self.delete_region_button = QPushButton("Delete Region")
+        self.delete_gene_button = QPushButton("Delete Gene")
+        self.search_gene_button = QPushButton("Search Gene")
+        button_layout.addWidget(self.add_button)
+        button_layout.addWidget(self.delete_chromosome_button)
+        button_layout.addWidget(self.delete_region_button)
+        button_layout.addWidget(self.delete_gene_button)
+        button_layout.addWidget(self.search_gene_button)
+        layout.addLayout(button_layout)
+
+        # Multi-select for bulk edits: a region, the genes passing the filters, or search hits
+        selection_layout = QHBoxLayout()
+        self.select_region_button = QPushButton("Select Region")
+        self.select_filtered_button = QPushButton("Select Filtered")
+        self.select_hits_button = QPushButton("Select Hits")
+        self.bulk_edit_button = QPushButton("Bulk Edit")
+        self.selection_label = QLabel("No selection")
+        selection_layout.addWidget(self.select_region_button)
+        selection_layout.addWidget(self.select_filtered_button)
+        selection_layout.addWidget(self.select_hits_button)
+        selection_layout.addWidget(self.bulk_edit_button)
+        selection_layout.addWidget(self.selection_label, 1)
+        layout.addLayout(selection_layout)
+        self.select_region_button.clicked.connect(self.select_region)
+        self.select_filtered_button.clicked.connect(self.select_filtered)
+        self.select_hits_button.clicked.connect(self.select_hits)
+
+        bulk_menu = QMenu(self)
+        for label, action, value in (("Set Methylation Prone", "methylation", True),
+                                     ("Clear Methylation Prone", "methylation", False),
+                                     ("Set Radiation Prone", "radiation", True),
+                                     ("Clear Radiation Prone", "radiation", False),
+                                     ("Append Text...", "append", None),
+                                     ("Delete Selected Genes", "delete", None)):
+            bulk_action = bulk_menu.addAction(label)
+            bulk_action.triggered.connect(lambda _, action=action, value=value: self.bulk_edit(action, value))
+        bulk_menu.addSeparator()
+        bulk_menu.addAction("Undo Last Bulk Edit").triggered.connect(self.undo_bulk_edit)
+        self.bulk_edit_button.setMenu(bulk_menu)
+
+        # Visual separator of filters
+        line = QFrame()
+        line.setFrameShape(QFrame.Shape.HLine)
+        line.setFrameShadow(QFrame.Shadow.Sunken)
+        layout.addWidget(line)
+
+        # Filters layout
+        filters_layout = QHBoxLayout()
+        self.filter_radio1 = QRadioButton("Radiation prone")
+        self.filter_radio2 = QRadioButton("Methylation prone")
+        filters_layout.addWidget(QLabel("Filters:"))
+        filters_layout.addWidget(self.filter_radio1)
+        filters_layout.addWidget(self.filter_radio2)
+        layout.addLayout(filters_layout)
+
+        # Connect filter changes
+        self.filter_radio1.toggled.connect(self.apply_filters)
+        self.filter_radio2.toggled.connect(self.apply_filters)
+
+        # Chromosome Visualizer (Canvas), below the zoomable genome view
+        self.genome_view = GenomeView(self.gene_model, self.diagnostics)
+        self.chromosome_canvas = GeneCanvas(self.gene_model, self.diagnostics)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.genome_view)
+        splitter.addWidget(self.chromosome_canvas)
+        splitter.setSizes([200, 400])
+        layout.addWidget(splitter)
+        self.genome_view.geneClicked.connect(self.show_gene)
+        self.genome_view.glyphsRequested.connect(self.fetch_glyphs)
+
+        # Connect gene click (hit-tested by the canvas) to open_gene_tab method
+        self.chromosome_canvas.geneClicked.connect(self.open_gene_tab)
+        self.chromosome_canvas.chromosomeClicked.connect(self.toggle_chromosome)
+        self.chromosome_canvas.moreRequested.connect(self.fetch_genes)
+
+        # Connect add_gene method to Add Gene button
+        self.add_button.clicked.connect(self.add_gene)
+        self.delete_chromosome_button.clicked.connect(self.delete_chromosome)
+        self.delete_region_button.clicked.connect(self.delete_region)
+        self.delete_gene_button.clicked.connect(self.delete_gene)
+
+        # Connect search_gene function to the Search Gene button
+        self.search_gene_button.clicked.connect(self.search_gene)
+
+    def migrated(self, applied):
+        if applied:
+            print("Applied migrations:", applied)
+        self.executor.track_changes = True  # The change counter exists from here on
+
+    def add_gene(self):
+        chromosome = self.chromosome_entry.text()
+        region = self.region_entry.text()
+        gene = self.gene_entry.text()
+
+        if chromosome and region and gene:
+            # A "start-end" region doubles as the gene's coordinates
+            start, end = parse_span(region) or (None, None)
+
+            def inserted(gene_id):
+                print("Gene added successfully")
+
+                # Add only the new gene to the visualizer
+                self.gene_model.add_gene(chromosome, region, gene, gene_id=gene_id, start=start, end=end)
+
+            self.executor.submit(lambda store: store.insert_gene(chromosome, region, gene, start, end), inserted,
+                                 lambda error: print("Error inserting gene into the database:", error), write=True)
+
+        else:
+            QMessageBox.critical(self, "Error", "Chromosome, region, and gene name cannot be empty.")
+
+    def update_visualizer(self):
+        # Full reload of the chromosome list only; regions and genes are paged in on expand,
+        # mutations and filter toggles update the model incrementally
+        def fetched(result):
+            self.summary_state, chromosome_counts = result
+            # One call, not sliced: it only builds the chromosome list, about 1.5 us per chromosome (24 take 0.1 ms,
+            # 5000 take 8 ms), so it stays within a frame for any real genome
+            with self.diagnostics.span("overview.load_summary"):
+                expanded = self.gene_model.load_summary(chromosome_counts)
+            for chromosome in expanded:
+                self.fetch_genes(chromosome)
+            self.check_catch_up()
+
+        # The change counter is read before the data, so the data is at least as new as the counter says
+        self.executor.submit(lambda store: (store.change_state(), store.chromosome_counts()), fetched,
+                             lambda error: print("Error retrieving gene data from the database:", error), key="reload")
+        self.load_bins()
+        self.rebuild_search_index()
+
+    def refresh_snapshot(self, snapshot):
+        # Delta refresh behind a snapshot-painted overview, from the snapshot's counter
+        self.refresh_changed(snapshot.token, snapshot.counter)
+        self.rebuild_search_index()
+
+    def refresh_changed(self, token, counter):
+        # Only chromosomes whose version moved past counter are re-read, wholesale. Another database (token) or too
+        # many changes fall back to update_visualizer
+        before = (self.summary_state, self.bins_state)
+
+        def refresh(store):
+            state = store.change_state()
+            if state[0] != token:
+                return state, None
+            changed = store.changed_chromosomes(counter)
+            if len(changed) > SNAPSHOT_DELTA_LIMIT:
+                return state, None
+            return state, [self.read_chromosome(store, chromosome) for chromosome in changed]
+
+        def refreshed(result):
+            state, changes = result
+            if changes is None:
+                self.update_visualizer()
+                return
+
+            def apply():
+                yield from self.apply_chromosomes(changes)
+                # A full load delivered in between set its own, equally honest counter; keep that one
+                if self.summary_state == before[0]:
+                    self.summary_state = state
+                if self.bins_state == before[1]:
+                    self.bins_state = state
+                self.check_catch_up()
+
+            return self.in_slices("overview.refresh_changed", apply())
+
+        def failed(error):
+            # What is on screen stays; the database is asked again on the next catch-up or reload
+            print("Error refreshing the overview from the database:", error)
+
+        self.executor.submit(refresh, refreshed, failed, key="refresh")
+
+    def read_chromosome(self, store, chromosome):
+        # The chromosome's rows by id, plus region -> {gene name: id} of its named genes to diff against the search
+        # index; both are put together here on the worker
+        genes = {row[0]: row for row in store.chromosome_genes(chromosome)}
+        names = {}
+        for gene_id, _, region, gene, *_ in genes.values():
+            if region is not None and gene is not None:
+                names.setdefault(region, {})[gene] = gene_id
+        return chromosome, store.chromosome_summary(chromosome), store.chromosome_bins(chromosome), genes, names
+
+    def apply_chromosomes(self, changes):
+        # Chromosomes re-read wholesale (read_chromosome) are diffed by id against the search index: only genes that
+        # appeared, moved or went away go through the model, flags are updated in place and what is paged in stays.
+        # Past NOTIFY_IDS such genes, or while the index is not built yet, the chromosome's pages are dropped instead
+        # and the search index is rebuilt on the worker, then swapped in once. A generator: one chromosome, and within
+        # it APPLY_SLICE genes, per slice
+        rebuild = False
+        for chromosome, summary, bins, genes, names in changes:
+            self.detail_cache.invalidate(chromosome)  # Gene texts are not part of the rows, any of them may have changed
+            ids = self.changed_ids(chromosome, names) if self.search_index.ready else None
+            if ids is None or len(ids) > NOTIFY_IDS:
+                rebuild = True
+                if self.gene_model.refresh_chromosome(chromosome, summary):
+                    self.fetch_genes(chromosome)
+            else:
+                yield from self.apply_gene_rows(ids, [genes[gene_id] for gene_id in ids if gene_id in genes])
+                yield from self.update_flags(chromosome, genes)
+                self.gene_model.set_summary(chromosome, summary)
+            self.genome_view.replace_bins(chromosome, bins)
+            present = {key for key in self.open_gene_keys() if key[0] == chromosome and key[2] in names.get(key[1], ())}
+            self.refresh_gene_tabs(lambda key, chromosome=chromosome: key[0] == chromosome, present)
+            yield
+        if rebuild:
+            self.search_index_stale()
+
+    def update_flags(self, chromosome, genes):
+        # GeneModel.update_flags over groups of regions holding about APPLY_SLICE paged-in genes, one group per slice
+        record = self.gene_model.chromosomes.get(chromosome)
+        regions = []
+        size = 0
+        for region in list(record.order) if record is not None else ():
+            regions.append(region)
+            size += len(region.genes)
+            if size >= APPLY_SLICE:
+                self.gene_model.update_flags(chromosome, genes, regions)
+                yield
+                regions = []
+                size = 0
+        self.gene_model.update_flags(chromosome, genes, regions)
+
+    def in_slices(self, name, work):
+        # Runs the generator work one slice per next() from QueryExecutor.drain, each slice timed as span name
+        while True:
+            with self.diagnostics.span(name):
+                try:
+                    next(work)
+                except StopIteration:
+                    return
+            yield
+
+    def changed_ids(self, chromosome, names):
+        # Ids whose (region, gene name) on the chromosome is not what the search index holds, either way round.
+        # Regions are compared as whole dicts first, only the ones that differ are looked into
+        index = self.search_index
+        changed = set()
+        for region in index.chromosomes.get(chromosome, set()) | names.keys():
+            old = index.regions.get((chromosome, region), {})
+            new = names.get(region, {})
+            if old != new:
+                changed.update(gene_id for _, gene_id in old.items() ^ new.items())
+        return changed
+
+    def skip_own_changes(self, before, after):
+        # The app applies its own writes directly; on backends where nothing else can commit in between, the counters
+        # the overview is current with move past them, so the next catch-up does not read them back
+        if self.summary_state == before:
+            self.summary_state = after
+        if self.bins_state == before:
+            self.bins_state = after
+
+    def catch_up(self):
+        # Whatever changed since the counters the overview is current with (feed (re)connected, or polling)
+        states = (self.summary_state, self.bins_state)
+        if None in states:
+            self.catch_up_pending = True  # The first load is still on its way; caught up once it is in
+            return
+        self.catch_up_pending = False
+        self.refresh_changed(states[0][0], min(state[1] for state in states))
+
+    def check_catch_up(self):
+        if self.catch_up_pending and None not in (self.summary_state, self.bins_state):
+            self.catch_up()
+
+    def apply_feed(self, changes):
+        # One batch is read and applied at a time, so a later batch's rows never get overwritten by an earlier one's
+        for chromosome, ids in changes.items():
+            if ids is None or self.feed_pending.get(chromosome, ()) is None:
+                self.feed_pending[chromosome] = None
+            else:
+                self.feed_pending.setdefault(chromosome, set()).update(ids)
+        if self.feed_busy or not self.feed_pending:
+            return
+        changes, self.feed_pending = self.feed_pending, {}
+        # Listed rows are diffed one by one against the search index, which knows every gene's previous identity.
+        # Whole chromosomes (statements over too many rows), or everything while that index is still building,
+        # are re-read wholesale
+        whole = [chromosome for chromosome, ids in changes.items() if ids is None or not self.search_index.ready]
+        listed = [chromosome for chromosome in changes if chromosome not in whole]
+        ids = set().union(*(changes[chromosome] for chromosome in listed))
+
+        def read(store):
+            return ([self.read_chromosome(store, chromosome) for chromosome in whole], store.genes_by_id(ids),
+                    [(chromosome, store.chromosome_summary(chromosome)) for chromosome in listed])
+
+        def applied(result):
+            def apply():
+                wholesale, rows, summaries = result
+                yield from self.apply_chromosomes(wholesale)
+                yield from self.apply_gene_rows(ids, rows)
+                for chromosome, summary in summaries:
+                    self.gene_model.set_summary(chromosome, summary)
+                self.feed_busy = False
+                self.apply_feed({})
+
+            return self.in_slices("overview.apply_feed", apply())
+
+        def failed(error):
+            self.feed_busy = False
+            print("Error applying changes from other clients:", error)
+            self.catch_up()
+
+        self.feed_busy = True
+        self.executor.submit(read, applied, failed)
+
+    def apply_gene_rows(self, ids, rows):
+        # rows are genes_by_id of the listed ids; an id without a row was deleted. Previous identities come from the
+        # search index. Removals go first, a region left without any of its genes is cleared in one go, then genes
+        # are added or get their flags. A generator: APPLY_SLICE ids are diffed, then APPLY_SLICE model updates are
+        # made, per slice; the views are told once a slice. rows is used up, so hundreds of thousands of rows are
+        # freed a slice at a time too instead of all at once at the end
+        current = {}
+        while rows:
+            current.update((row[0], row) for row in rows[-APPLY_SLICE:])
+            del rows[-APPLY_SLICE:]
+            yield
+        index = self.search_index
+        model = self.gene_model
+        open_keys = self.open_gene_keys()
+        removed = {}  # (chromosome, region) -> gene names
+        cleared_regions = set()
+        changes = deque()  # (model method, arguments) of the genes that are there now
+        updated = set()  # Open tabs' genes among them
+        for count, gene_id in enumerate(ids, 1):
+            entry = index.entries.get(gene_id)
+            old = (entry[1][0], entry[1][1], entry[0]) if entry is not None else None
+            row = current.pop(gene_id, None)
+            new = tuple(row[1:4]) if row is not None and None not in row[1:4] else None
+            if old is not None and old != new:
+                removed.setdefault(old[:2], set()).add(old[2])
+                if row is not None and row[1] == old[0] and row[2] is None:
+                    cleared_regions.add(old[:2])  # The region was cleared (delete_region elsewhere)
+            if new is not None:
+                _, chromosome, region, gene, methylation_prone, radiation_prone, start, end = row
+                if new != old:
+                    changes.append((model.add_gene, (chromosome, region, gene, methylation_prone, radiation_prone,
+                                                     gene_id, start, end)))
+                else:
+                    changes.append((model.set_gene_flags, (chromosome, region, gene, methylation_prone,
+                                                           radiation_prone)))
+                self.detail_cache.invalidate(chromosome, region, gene)
+                if new in open_keys:
+                    updated.add(new)
+            if not count % APPLY_SLICE:
+                yield
+        steps = deque()  # (model method, arguments), taken off as they are made
+        for key, genes in removed.items():
+            if key in cleared_regions or genes.issuperset(index.regions.get(key, ())):
+                steps.append((model.clear_region, key))
+            else:
+                steps.extend((model.clear_gene, (*key, gene)) for gene in genes)
+        gone = {key for key in open_keys if key[:2] in removed and key[2] in removed[key[:2]]}
+        removed = None
+        steps += changes
+        changes = None
+        while steps:
+            with model.batch():
+                for _ in range(min(APPLY_SLICE, len(steps))):
+                    method, args = steps.popleft()
+                    method(*args)
+            yield
+        self.refresh_gene_tabs(lambda key: key in gone or key in updated, updated)
+
+    def open_gene_keys(self):
+        return {self.tabs.widget(index).gene_key for index in range(self.tabs.count())
+                if getattr(self.tabs.widget(index), "gene_key", None) is not None}
+
+    def refresh_gene_tabs(self, affected, present):
+        # Open tabs of changed genes show the new data, unless the user's own edit is still queued; tabs of genes
+        # that are gone are marked and stop saving until the gene is back (an undone bulk delete)
+        for index in range(self.tabs.count()):
+            gene_tab = self.tabs.widget(index)
+            key = getattr(gene_tab, "gene_key", None)
+            if key is None or not affected(key):
+                continue
+            exists = key in present
+            if exists != gene_tab.save_button.isEnabled():
+                if not exists:
+                    self.save_queue.discard(*key)
+                for widget in (gene_tab.gene_text_box, gene_tab.methylation_checkbox, gene_tab.radiation_checkbox,
+                               gene_tab.save_button):
+                    widget.setEnabled(exists)
+                self.tabs.setTabText(index, key[2] if exists else f"{key[2]} (deleted)")
+            if exists and not self.save_queue.is_pending(*key):
+                gene_tab.reload()
+
+    def save_snapshot(self):
+        # Only an overview brought up to date in this session is saved, with the older of the two counters
+        states = (self.summary_state, self.bins_state)
+        if self.snapshot_path is None or None in states or states[0][0] != states[1][0]:
+            return
+        token, counter = states[0][0], min(state[1] for state in states)
+        try:
+            write_snapshot(self.snapshot_path, token, counter, self.gene_model.summary(), self.genome_view.pyramid)
+        except OSError as error:
+            print("Error saving the overview snapshot:", error)
+
+    def load_bins(self):
+        # The genome view's density pyramid, built on the worker from the trigger-maintained bins
+        def build(store):
+            with self.diagnostics.span("genome.load_bins"):
+                return store.change_state(), DensityPyramid.build(store.gene_bins())
+
+        def built(result):
+            self.bins_state, pyramid = result
+            self.genome_view.set_pyramid(pyramid)
+            self.check_catch_up()
+
+        self.executor.submit(build, built,
+                             lambda error: print("Error retrieving gene density from the database:", error),
+                             key="gene_bins")
+
+    def mark_bins_stale(self, chromosome, *_):
+        self.stale_bins.add(chromosome)
+        if not self.bins_timer.isActive():
+            self.bins_timer.start()
+
+    def refresh_bins(self):
+        # The triggers already updated gene_bins in the write's transaction; only the changed chromosomes are re-read
+        for chromosome in self.stale_bins:
+            self.executor.submit(lambda store, chromosome=chromosome: store.chromosome_bins(chromosome),
+                                 lambda rows, chromosome=chromosome: self.genome_view.replace_bins(chromosome, rows),
+                                 lambda error: print("Error retrieving gene density from the database:", error),
+                                 key=f"bins:{chromosome}")
+        self.stale_bins.clear()
+
+    def fetch_glyphs(self, chromosome, start, end):
+        # Few enough genes are visible in a genome view track to draw them one by one, found through the range index
+        self.executor.submit(lambda store: store.genes_overlapping(chromosome, start, end),
+                             lambda rows: self.genome_view.set_glyphs(chromosome, start, end, rows),
+                             lambda error: print("Error retrieving genes in the visible window:", error),
+                             key=f"glyphs:{chromosome}")
+
+    def rebuild_search_index(self):
+        self.search_journal = []
+        self.search_rebuild = False
+
+        def build(store):
+            # Streamed in batches and built on the worker, the GUI keeps using the old index
+            with self.diagnostics.span("search_index.build"):
+                return SearchIndex.build(store.search_rows())
+
+        def replay(index):
+            # add / remove are idempotent, so replaying everything seen since the build started is safe. APPLY_SLICE
+            # entries per slice; the old index keeps answering and journaling until the new one is swapped in
+            journal = self.search_journal or []
+            done = 0
+            while done < len(journal):
+                for method, args in journal[done:done + APPLY_SLICE]:
+                    getattr(index, method)(*args)
+                done += APPLY_SLICE
+                yield
+            self.search_index = index
+            self.search_journal = None
+            if self.search_rebuild:
+                self.rebuild_search_index()
+
+        def built(index):
+            return self.in_slices("search_index.replay", replay(index))
+
+        def failed(error):
+            print("Error building the gene search index:", error)
+            self.search_journal = None
+
+        self.executor.submit(build, built, failed, key="search_index")
+
+    def search_index_stale(self):
+        # A running build may have read the genes before the change; it finishes first and another one follows,
+        # so a stream of changes cannot keep superseding the build
+        if self.search_journal is None:
+            self.rebuild_search_index()
+        else:
+            self.search_rebuild = True
+
+    def index_gene_added(self, gene_id, chromosome, region, gene, start, end):
+        self.search_index.add(gene_id, chromosome, region, gene, start, end)
+        if self.search_journal is not None:
+            self.search_journal.append(("add", (gene_id, chromosome, region, gene, start, end)))
+
+    def index_genes_removed(self, chromosome, region, gene):
+        self.search_index.remove(chromosome, region, gene)
+        if self.search_journal is not None:
+            self.search_journal.append(("remove", (chromosome, region, gene)))
+
+    def update_search_results(self, text):
+        # Answered from memory on every keystroke, no database round trip
+        locus = parse_locus(text)
+        if locus is not None:
+            self.show_overlapping(*locus)
+            return
+        self.search_results.clear()
+        for score, gene_id, chromosome, region, gene in self.search_index.search(text):
+            item = QListWidgetItem(f"{gene}    {chromosome} / {region}")
+            item.setData(Qt.ItemDataRole.UserRole, (chromosome, region, gene))
+            self.search_results.addItem(item)
+        self.search_results.setVisible(self.search_results.count() > 0)
+
+    def show_overlapping(self, chromosome, start, end):
+        # "chr7:55,000,000-55,300,000" lists the genes overlapping the window: from the in-memory interval index,
+        # or through the database's range index while the search index is still being built
+        def show(hits):
+            self.search_results.clear()
+            for gene_start, gene_end, gene_id, region, gene in hits[:SEARCH_LIMIT]:
+                item = QListWidgetItem(f"{gene}    {chromosome} / {region}    {gene_start:,}-{gene_end:,}")
+                item.setData(Qt.ItemDataRole.UserRole, (chromosome, region, gene))
+                self.search_results.addItem(item)
+            self.search_results.setVisible(self.search_results.count() > 0)
+            self.statusBar().showMessage(f"{len(hits)} genes overlap {chromosome}:{start:,}-{end:,}")
+
+        if self.search_index.ready:
+            show(self.search_index.overlapping(chromosome, start, end))
+            return
+        self.executor.submit(
+            lambda store: [(gene_start, gene_end, gene_id, region, gene) for gene_id, region, gene, gene_start, gene_end, *_
+                           in store.genes_overlapping(chromosome, start, end)],
+            show, lambda error: print("Error querying overlapping genes:", error), key="overlapping")
+
+    def jump_to_search_result(self, item):
+        self.show_gene(*item.data(Qt.ItemDataRole.UserRole))
+
+    def show_gene(self, chromosome, region, gene):
+        self.chromosome_entry.setText(chromosome)
+        self.region_entry.setText(region)
+        self.gene_entry.setText(gene)
+        self.jump_to_gene(chromosome, region, gene)
+
+    def open_search_result(self, item):
+        chromosome, region, gene = item.data(Qt.ItemDataRole.UserRole)
+        self.chromosome_entry.setText(chromosome)
+        self.region_entry.setText(region)
+        self.gene_entry.setText(gene)
+        self.search_results.hide()
+        self.search_gene()
+
+    def jump_to_gene(self, chromosome, region, gene):
+        # Expands the chromosome and pages genes in until the hit is loaded, then scrolls to it
+        self.pending_jump = (chromosome, region, gene)
+        if self.gene_model.set_expanded(chromosome, True):
+            self.fetch_genes(chromosome)
+        self.reveal_pending_jump()
+
+    def reveal_pending_jump(self):
+        chromosome, region, gene = self.pending_jump
+        row = self.gene_model.row_of(chromosome, region, gene)
+        if row is not None:
+            self.chromosome_canvas.scroll_to_row(row, self.gene_model.find(chromosome, region, gene))
+            self.pending_jump = None
+            return
+        record = self.gene_model.chromosomes.get(chromosome)
+        if record is None or record.complete:
+            self.pending_jump = None
+        else:
+            self.fetch_genes(chromosome)  # No-op while a page is already on its way; fetched() calls back here
+
+    def toggle_chromosome(self, chromosome):
+        record = self.gene_model.chromosomes.get(chromosome)
+        if record is not None and self.gene_model.set_expanded(chromosome, not record.expanded):
+            self.fetch_genes(chromosome)
+
+    def fetch_genes(self, chromosome):
+        record = self.gene_model.begin_fetch(chromosome)
+        if record is None:
+            return
+        last_key = record.last_key
+
+        def fetch(store):
+            # Keyset page, only one page of rows is ever held in memory
+            return store.gene_page(chromosome, last_key, GENE_PAGE)
+
+        def append(rows):
+            # APPLY_SLICE rows per slice; the chromosome stays fetching until the last one is in
+            for start in range(0, len(rows), APPLY_SLICE) or [0]:
+                last = start + APPLY_SLICE >= len(rows)
+                self.gene_model.append_page(record, rows[start:start + APPLY_SLICE], last and len(rows) < GENE_PAGE,
+                                            last)
+                yield
+            if self.pending_jump is not None and self.pending_jump[0] == chromosome:
+                self.reveal_pending_jump()
+
+        def fetched(rows):
+            return self.in_slices("overview.append_page", append(rows))
+
+        def failed(error):
+            print("Error retrieving gene data from the database:", error)
+            self.gene_model.end_fetch(record)
+
+        self.executor.submit(fetch, fetched, failed)
+
+    def apply_filters(self):
+        # Filter toggles only recompute which genes are active, no database round trip. That is one bitmap
+        # operation over every loaded gene, cheap enough to run straight on the GUI thread
+        with self.diagnostics.span("overview.filters"):
+            self.gene_model.set_filters(self.filter_radio1.isChecked(), self.filter_radio2.isChecked())
+
+    def delete_chromosome(self):
+        chromosome = self.chromosome_entry.text()
+        if chromosome:
+            confirmation = confirmation_dialog("Are you sure you want to delete this chromosome?")
+            if confirmation == QMessageBox.StandardButton.Yes:
+                self.save_queue.discard(chromosome)
+                self.detail_cache.invalidate(chromosome)
+
+                def deleted(_):
+                    print("Chromosome deleted successfully")
+
+                    # Drop only the deleted chromosome from the visualizer
+                    self.gene_model.remove_chromosome(chromosome)
+
+                self.executor.submit(lambda store: store.delete_chromosome(chromosome), deleted,
+                                     lambda error: print("Error deleting chromosome from the database:", error),
+                                     write=True)
+        else:
+            QMessageBox.critical(self, "Error", "Chromosome name cannot be empty.")
+
+    def delete_region(self):
+        chromosome = self.chromosome_entry.text()
+        region = self.region_entry.text()
+        if chromosome and region:
+            confirmation = confirmation_dialog("Are you sure you want to delete this region?")
+            if confirmation == QMessageBox.StandardButton.Yes:
+                self.save_queue.discard(chromosome, region)
+                self.detail_cache.invalidate(chromosome, region)
+
+                def delete(store):
+                    # Update database records for genes in the specified region
+                    store.clear_region(chromosome, region)
+                    return store.count_genes(chromosome)
+
+                def deleted(gene_count):
+                    print("Region data updated successfully")
+
+                    # Drop only the deleted region from the visualizer
+                    self.gene_model.clear_region(chromosome, region, gene_count)
+
+                self.executor.submit(delete, deleted,
+                                     lambda error: print("Error updating region data in the database:", error),
+                                     write=True)
+        else:
+            QMessageBox.critical(self, "Error", "Chromosome and region names cannot be empty.")
+
+    def delete_gene(self):
+        chromosome = self.chromosome_entry.text()
+        region = self.region_entry.text()
+        gene = self.gene_entry.text()
+        if chromosome and region and gene:
+            confirmation = confirmation_dialog("Are you sure you want to delete this gene?")
+            if confirmation == QMessageBox.StandardButton.Yes:
+                self.save_queue.discard(chromosome, region, gene)
+                self.detail_cache.invalidate(chromosome, region, gene)
+
+                def delete(store):
+                    # Update database records for the specified gene
+                    store.clear_gene(chromosome, region, gene)
+                    return store.count_genes(chromosome)
+
+                def deleted(gene_count):
+                    print("Gene data updated successfully")
+
+                    # Drop only the deleted gene from the visualizer
+                    self.gene_model.clear_gene(chromosome, region, gene, gene_count)
+
+                self.executor.submit(delete, deleted,
+                                     lambda error: print("Error updating gene data in the database:", error),
+                                     write=True)
+        else:
+            QMessageBox.critical(self, "Error", "Chromosome, region, and gene names cannot be empty.")
+
+    def select_region(self):
+        chromosome = self.chromosome_entry.text()
+        region = self.region_entry.text()
+        if chromosome and region:
+            self.set_selection(("region", chromosome, region), f"region {chromosome} / {region}")
+        else:
+            QMessageBox.critical(self, "Error", "Chromosome and region names cannot be empty.")
+
+    def select_filtered(self):
+        # The genes the radio-button filters keep, within the chromosome entry when it is filled
+        radiation_filter = self.filter_radio1.isChecked()
+        methylation_filter = self.filter_radio2.isChecked()
+        if not (radiation_filter or methylation_filter):
+            QMessageBox.critical(self, "Error", "Choose a filter first.")
+            return
+        chromosome = self.chromosome_entry.text() or None
+        flag = "radiation prone" if radiation_filter else "methylation prone"
+        self.set_selection(("filter", chromosome, radiation_filter, methylation_filter),
+                           f"genes kept by the {flag} filter in {chromosome or 'all chromosomes'}")
+
+    def select_hits(self):
+        # The search hits picked in the result list, or all of them
+        items = self.search_results.selectedItems()
+        if not items:
+            items = [self.search_results.item(row) for row in range(self.search_results.count())]
+        ids = [self.search_index.lookup(*item.data(Qt.ItemDataRole.UserRole)) for item in items]
+        ids = [gene_id for gene_id in ids if gene_id is not None]
+        if ids:
+            self.set_selection(("ids", ids), f"{len(ids)} search hits")
+        else:
+            QMessageBox.critical(self, "Error", "There are no search hits to select.")
+
+    def set_selection(self, selection, description):
+        self.selection = (selection, description)
+        self.selection_label.setText(f"Selected: {description}")
+
+    def bulk_edit(self, action, value=None):
+        # One set-based statement over the whole selection, in one transaction with its undo journal
+        if self.selection is None:
+            QMessageBox.critical(self, "Error", "Select a region, the filtered genes or search hits first.")
+            return
+        selection, description = self.selection
+        if action == "append":
+            value, accepted = QInputDialog.getText(self, "Append Text", f"Text to append to {description}:")
+            if not accepted or not value:
+                return
+        if action == "delete":
+            confirmation = confirmation_dialog(f"Are you sure you want to delete {description}?")
+            if confirmation != QMessageBox.StandardButton.Yes:
+                return
+        self.save_queue.flush()  # Queued tab edits are written first, the bulk edit applies on top of them
+
+        def edit(store):
+            action_id, changes = store.bulk_edit(selection, action, value)
+            return action_id, self.own_changes(store, changes)
+
+        def edited(result):
+            action_id, changes = result
+            print(f"Bulk edit applied to {len(changes[0])} genes")
+            if changes[0]:
+                self.bulk_undo.append(action_id)
+            return self.apply_own_changes(changes)
+
+        self.executor.submit(edit, edited, lambda error: print("Error applying the bulk edit:", error), write=True)
+
+    def undo_bulk_edit(self):
+        # This session's bulk edits, newest first
+        if not self.bulk_undo:
+            QMessageBox.information(self, "Undo", "There is no bulk edit to undo.")
+            return
+        action_id = self.bulk_undo.pop()  # A second undo before this one is in goes on to the edit before it
+
+        def undone(changes):
+            if not changes[0]:
+                # Only the newest storage.BULK_JOURNAL_KEEP journals are kept, across every client; this session's
+                # older ones went with it
+                del self.bulk_undo[:bisect_right(self.bulk_undo, action_id)]
+                QMessageBox.information(self, "Undo", "This bulk edit is too old and can no longer be undone.")
+                return None
+            print(f"Bulk edit undone on {len(changes[0])} genes")
+            return self.apply_own_changes(changes)
+
+        def failed(error):
+            print("Error undoing the bulk edit:", error)
+            insort(self.bulk_undo, action_id)  # Still undoable
+
+        self.executor.submit(lambda store: self.own_changes(store, store.undo_bulk_edit(action_id)), undone, failed,
+                             write=True)
+
+    def own_changes(self, store, changes):
+        # bulk_changes plus the chromosome_summary rows of their chromosomes, read in the same transaction
+        ids, rows, chromosomes = changes
+        return ids, rows, [(chromosome, store.chromosome_summary(chromosome)) for chromosome in chromosomes]
+
+    def apply_own_changes(self, changes):
+        # This app's own set-based statements; the change feed skips them, so the rows they returned are applied
+        # directly, diffed against the search index like listed feed changes. Returns the generator drain runs them in
+        ids, rows, summaries = changes
+        if not self.search_index.ready:
+            self.apply_feed({chromosome: None for chromosome, _ in summaries})  # No previous identities to diff yet
+            return None
+
+        def apply():
+            yield from self.apply_gene_rows(ids, rows)
+            for chromosome, summary in summaries:
+                self.gene_model.set_summary(chromosome, summary)
+
+        return self.in_slices("overview.apply_own_changes", apply())
+
+    def confirmation_dialog(self, message):
+        dialog = QMessageBox()
+        dialog.setIcon(QMessageBox.Icon.Warning)
+        dialog.setWindowTitle("Confirmation")
+        dialog.setText(message)
+        dialog.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        return dialog.exec()
+
+    def search_gene(self):
+        chromosome = self.chromosome_entry.text()
+        region = self.region_entry.text()
+        gene = self.gene_entry.text()
+        if chromosome and region and gene:
+            if self.search_index.ready and self.search_index.lookup(chromosome, region, gene) is None:
+                QMessageBox.warning(self, "Gene Not Found", "Gene not found in database.")
+                return
+
+            def found(flags):
+                if flags is None:
+                    QMessageBox.warning(self, "Gene Not Found", "Gene not found in database.")
+                elif self.gene_model.is_active_flags(*flags):
+                    # If the gene exists and is active, open its gene tab
+                    self.create_gene_tab(chromosome, region, gene)
+                    QMessageBox.information(self, "Search Result",
+                                            f"Gene '{gene}' found in chromosome '{chromosome}' and region '{region}'.")
+                else:
+                    QMessageBox.warning(self, "Inactive Gene", "Inactive gene cannot be opened.")
+
+            # Opening a hit is the one round trip: the flags decide whether the gene is active
+            self.executor.submit(lambda store: store.gene_flags(chromosome, region, gene), found,
+                                 lambda error: print("Error searching for gene in the database:", error))
+        else:
+            QMessageBox.critical(self, "Error", "Chromosome, region, and gene names cannot be empty.")
+
+    def create_gene_tab(self, chromosome, region, gene):
+        gene_tab = QWidget()
+        gene_tab_layout = QVBoxLayout(gene_tab)
+
+        # Chromosome, Region, Gene information
+        gene_tab_layout.addWidget(QLabel(f"Chromosome: {chromosome}"))
+        gene_tab_layout.addWidget(QLabel(f"Region: {region}"))
+        gene_tab_layout.addWidget(QLabel(f"Gene: {gene}"))
+
+        # Text input box
+        text_box = QLineEdit()
+        text_box.setFixedHeight(100)  # Set fixed height for the text box because Qt is being dumb
+        gene_tab_layout.addWidget(text_box)
+
+        # Checkboxes
+        checkbox_layout = QHBoxLayout()
+        methylation_checkbox = QCheckBox("Methylation Prone")
+        radiation_checkbox = QCheckBox("Radiation Prone")
+        checkbox_layout.addWidget(methylation_checkbox)
+        checkbox_layout.addWidget(radiation_checkbox)
+        gene_tab_layout.addLayout(checkbox_layout)
+
+        # Store references to text box and checkboxes
+        gene_tab.gene_text_box = text_box
+        gene_tab.methylation_checkbox = methylation_checkbox
+        gene_tab.radiation_checkbox = radiation_checkbox
+
+        # Save and Close buttons for da gene tab
+        button_layout = QHBoxLayout()
+        save_button = QPushButton("Save")
+        close_button = QPushButton("Close")
+        button_layout.addWidget(save_button)
+        button_layout.addWidget(close_button)
+        gene_tab_layout.addLayout(button_layout)
+        gene_tab.save_button = save_button
+
+        # Adjust spacing
+        gene_tab_layout.setSpacing(10)  # Vertical
+        gene_tab_layout.setAlignment(Qt.AlignmentFlag.AlignTop)  # Align widgets
+
+        self.tabs.addTab(gene_tab, gene)
+
+        # Connect button clicks
+        save_button.clicked.connect(
+            lambda: self.save_gene_changes(chromosome, region, gene, text_box.text(), methylation_checkbox.isChecked(),
+                                           radiation_checkbox.isChecked()))
+        close_button.clicked.connect(lambda: self.close_gene_tab(gene_tab))
+
+        # User edits are queued and written behind in batches (textEdited / clicked skip programmatic changes)
+        def queue_save():
+            self.save_queue.enqueue(chromosome, region, gene, text_box.text(), methylation_checkbox.isChecked(),
+                                    radiation_checkbox.isChecked())
+
+        text_box.textEdited.connect(queue_save)
+        methylation_checkbox.clicked.connect(queue_save)
+        radiation_checkbox.clicked.connect(queue_save)
+
+        def show(saved_info):
+            text_box.setText(saved_info[0])
+            methylation_checkbox.setChecked(bool(saved_info[1]))
+            radiation_checkbox.setChecked(bool(saved_info[2]))
+
+        key = (chromosome, region, gene)
+
+        def load():
+            cached = None if self.save_queue.is_pending(*key) else self.detail_cache.get(key)
+            if cached is not None:
+                show(cached)
+                return
+            # Load previously saved text and checkbox states in one query, filled in when they arrive
+            epoch = self.detail_cache.epoch
+
+            def loaded(saved_info):
+                if saved_info:
+                    self.detail_cache.put(key, saved_info, epoch)
+                if self.tabs.indexOf(gene_tab) == -1 or self.save_queue.is_pending(*key):
+                    return  # Tab was closed, or already edited, before the data arrived
+                if saved_info:
+                    show(saved_info)
+
+            self.executor.submit(lambda store: store.gene_details(*key), loaded,
+                                 lambda error: print("Error retrieving saved gene data from the database:", error))
+
+        # Called again by the change feed when another client changes this gene
+        gene_tab.gene_key = key
+        gene_tab.reload = load
+        load()
+        self.prefetch_neighbours(chromosome, region, gene)
+
+    def prefetch_neighbours(self, chromosome, region, gene):
+        # Genes next to an opened one are likely opened next; read them in the background at low priority
+        # (a newer prefetch supersedes this one) and keep whatever the cache does not hold yet
+        epoch = self.detail_cache.epoch
+
+        def fetched(rows):
+            for name, text, methylation_prone, radiation_prone in rows:
+                if not self.save_queue.is_pending(chromosome, region, name):
+                    self.detail_cache.put((chromosome, region, name), (text, methylation_prone, radiation_prone), epoch,
+                                          prefetched=True)
+
+        self.executor.submit(lambda store: store.neighbour_details(chromosome, region, gene, PREFETCH_NEIGHBOURS),
+                             fetched, lambda error: print("Error prefetching gene data:", error), key="prefetch")
+
+    def close_gene_tab(self, gene_tab):
+        index = self.tabs.indexOf(gene_tab)
+        if index != -1:
+            self.tabs.removeTab(index)
+
+    def save_gene_changes(self, chromosome, region, gene, text, methylation_prone, radiation_prone):
+        # Single upsert, written together with any other pending tab edits
+        self.save_queue.enqueue(chromosome, region, gene, text, methylation_prone, radiation_prone)
+        self.save_queue.flush()
+
+    def closeEvent(self, event):
+        confirmation = confirmation_dialog("Are you sure you want to exit the application?")
+        if confirmation == QMessageBox.StandardButton.Yes:
+            # Flush queued gene edits and let pending writes commit before the worker connections close
+            self.change_feed.stop()
+            self.feed_timer.stop()
+            self.save_queue.flush_now()
+            self.executor.shutdown()
+            self.stall_detector.stop()
+            self.save_snapshot()
+            print("Gene detail cache:", self.detail_cache.stats())
+            if os.environ.get(DIAGNOSTICS_ENV):
+                self.diagnostics.dump(os.environ[DIAGNOSTICS_ENV])
+            event.accept()
+        else:
+            event.ignore()
+
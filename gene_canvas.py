@@ -0,0 +1,170 @@
+from PyQt6.QtWidgets import QAbstractScrollArea, QFrame
+from PyQt6.QtGui import QBrush, QColor, QFont, QPainter, QPen
+from PyQt6.QtCore import Qt, QRect, pyqtSignal
+from gene_model import CHROMOSOME_ROW, REGION_ROW, GENE_ROW, LOADING_ROW
+from gene_columns import NO_ID
+
+ROW_HEIGHT = 20
+ROW_SPACING = 10
+ROW_PITCH = ROW_HEIGHT + ROW_SPACING
+MARGIN = 10
+REGION_INDENT = 20
+GENE_WIDTH = 80
+
+_brushes = {}  # One shared brush per colour instead of a stylesheet per widget
+
+
+def brush_for(color):
+    brush = _brushes.get(color)
+    if brush is None:
+        brush = _brushes[color] = QBrush(QColor(color))
+    return brush
+
+
+def gene_box(rect, start, end, extent):
+    # Genes with coordinates sit at their position along the chromosome's extent (at least GENE_WIDTH wide for
+    # the label), genes without one at the left edge
+    if extent is None or start is None or end is None:
+        return QRect(rect.left(), rect.top(), GENE_WIDTH, ROW_HEIGHT)
+    first, last = extent
+    scale = max(rect.width() - GENE_WIDTH, 0) / max(last - first, 1)
+    left = rect.left() + round((start - first) * scale)
+    width = max(GENE_WIDTH, round((end - start + 1) * scale))
+    return QRect(left, rect.top(), min(width, rect.right() + 1 - left), ROW_HEIGHT)
+
+
+class RowPainter:
+    # Draws one display row (heading, region, gene box) of a GeneModel into a rect; shared by the canvas and
+    # map_export
+    def __init__(self, font, model):
+        self.model = model
+        self.font = QFont(font)
+        self.bold_font = QFont(font)
+        self.bold_font.setBold(True)
+        self.border_pen = QPen(QColor("black"))
+        self.text_pen = QPen(QColor("black"))
+        self.gene_text_pen = QPen(QColor("white"))
+        self.highlight_pen = QPen(QColor("yellow"), 3)
+
+    def paint(self, painter, kind, chrom, reg, item, rect, highlighted=None, extent=None):
+        # extent is the gene row's chromosome extent, see gene_box
+        if kind == CHROMOSOME_ROW:
+            painter.setFont(self.bold_font)
+            painter.setPen(self.text_pen)
+            arrow = "\u25be" if item.expanded else "\u25b8"
+            painter.drawText(rect, Qt.AlignmentFlag.AlignVCenter, f"{arrow} {chrom} ({item.gene_count} genes)")
+        elif kind == LOADING_ROW:
+            painter.setFont(self.font)
+            painter.setPen(self.text_pen)
+            painter.drawText(rect.adjusted(REGION_INDENT, 0, 0, 0), Qt.AlignmentFlag.AlignVCenter, "Loading\u2026")
+        elif kind == REGION_ROW:
+            painter.setFont(self.font)
+            painter.setPen(self.text_pen)
+            painter.drawText(rect.adjusted(REGION_INDENT, 0, 0, 0), Qt.AlignmentFlag.AlignVCenter, reg)
+        else:
+            # item is the gene's handle into model.genes
+            genes = self.model.genes
+            box = gene_box(rect, *genes.position(item), extent)
+            painter.setPen(self.border_pen)
+            painter.setBrush(brush_for(self.model.color(item)))
+            painter.drawRect(box.adjusted(0, 0, -1, -1))
+            painter.setFont(self.font)
+            painter.setPen(self.gene_text_pen)
+            painter.drawText(box, Qt.AlignmentFlag.AlignCenter, genes.name(item))
+            if item == highlighted:
+                painter.setPen(self.highlight_pen)
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.drawRect(box.adjusted(-2, -2, 1, 1))
+
+
+class GeneCanvas(QAbstractScrollArea):
+    geneClicked = pyqtSignal(str, str, str)
+    chromosomeClicked = pyqtSignal(str)  # Expand / collapse
+    moreRequested = pyqtSignal(str)  # A chromosome's "loading" row scrolled into view
+
+    def __init__(self, model, diagnostics=None, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.diagnostics = diagnostics
+        self.model.layoutChanged.connect(self.model_reset)
+        self.model.dataChanged.connect(self.viewport().update)
+        self.model.genesCompacted.connect(self.genes_compacted)
+        self.setFrameStyle(QFrame.Shape.Box)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(ROW_PITCH)
+
+        self.row_painter = RowPainter(self.font(), model)
+        self.highlighted = None  # Gene revealed by the last search jump
+
+    def model_reset(self):
+        self.update_scroll_range()
+        self.viewport().update()
+
+    def genes_compacted(self, remap):
+        if self.highlighted is not None:
+            highlighted = remap[self.highlighted]
+            self.highlighted = None if highlighted == NO_ID else highlighted
+
+    def update_scroll_range(self):
+        content_height = self.model.row_count() * ROW_PITCH + MARGIN
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setPageStep(self.viewport().height())
+        scroll_bar.setRange(0, max(0, content_height - self.viewport().height()))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+
+    def scroll_to_row(self, index, highlighted=None):
+        self.highlighted = highlighted
+        self.update_scroll_range()
+        self.verticalScrollBar().setValue(MARGIN + index * ROW_PITCH - self.viewport().height() // 2)
+        self.viewport().update()
+
+    def visible_rows(self):
+        # Only the rows intersecting the viewport are ever painted or hit-tested
+        offset = self.verticalScrollBar().value()
+        first = max(0, (offset - MARGIN) // ROW_PITCH)
+        last = min(self.model.row_count(), (offset + self.viewport().height()) // ROW_PITCH + 1)
+        return range(first, last)
+
+    def row_rect(self, index):
+        top = MARGIN + index * ROW_PITCH - self.verticalScrollBar().value()
+        return QRect(MARGIN, top, self.viewport().width() - 2 * MARGIN, ROW_HEIGHT)
+
+    def paintEvent(self, event):
+        if self.diagnostics is None:
+            self.paint_rows()
+            return
+        with self.diagnostics.span("canvas.paint"):
+            self.paint_rows()
+
+    def paint_rows(self):
+        painter = QPainter(self.viewport())
+        for index in self.visible_rows():
+            kind, chrom, reg, item = self.model.row(index)
+            extent = self.model.chromosomes[chrom].extent if kind == GENE_ROW else None
+            self.row_painter.paint(painter, kind, chrom, reg, item, self.row_rect(index), self.highlighted, extent)
+            if kind == LOADING_ROW:
+                self.moreRequested.emit(chrom)
+        painter.end()
+
+    def row_at(self, pos):
+        offset = pos.y() + self.verticalScrollBar().value() - MARGIN
+        index = offset // ROW_PITCH
+        if offset < 0 or index >= self.model.row_count() or offset % ROW_PITCH >= ROW_HEIGHT:
+            return None
+        return index
+
+    def mousePressEvent(self, event):
+        index = self.row_at(event.position().toPoint())
+        if index is not None:
+            kind, chrom, reg, item = self.model.row(index)
+            if kind == CHROMOSOME_ROW:
+                self.chromosomeClicked.emit(chrom)
+            elif kind == GENE_ROW:
+                box = gene_box(self.row_rect(index), *self.model.genes.position(item),
+                               self.model.chromosomes[chrom].extent)
+                if box.left() <= event.position().x() <= box.right():
+                    self.geneClicked.emit(chrom, reg, self.model.genes.name(item))
+        super().mousePressEvent(event)
@@ -0,0 +1,197 @@
+import sys
+from array import array
+from itertools import accumulate, chain, compress, islice
+
+NO_ID = -1  # Gene id / position column value for "not known"
+BYTE_FLAGS = [tuple(bool(byte >> bit & 1) for bit in range(8)) for byte in range(256)]  # Byte -> its 8 bits, low first
+
+
+class Interner:
+    # Each distinct chromosome / region name is stored once, genes refer to it by a small integer
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids = {}  # name -> id
+        self.names = []  # id -> name
+
+    def intern(self, name):
+        number = self.ids.get(name)
+        if number is None:
+            number = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return number
+
+    def __getitem__(self, number):
+        return self.names[number]
+
+    def __len__(self):
+        return len(self.names)
+
+    def nbytes(self):
+        return (sys.getsizeof(self.ids) + sys.getsizeof(self.names) +
+                sum(sys.getsizeof(name) for name in self.names if name is not None))
+
+
+class Bitmap:
+    # One bit per gene handle, packed into a bytearray. Whole-column operations go through a Python int,
+    # so a filter over a million genes is a few big-integer operations instead of a loop
+    __slots__ = ("bits", "size")
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, handle):
+        return bool(self.bits[handle >> 3] >> (handle & 7) & 1)
+
+    def __setitem__(self, handle, value):
+        if value:
+            self.bits[handle >> 3] |= 1 << (handle & 7)
+        else:
+            self.bits[handle >> 3] &= ~(1 << (handle & 7)) & 0xFF
+
+    def append(self, value):
+        if not self.size & 7:
+            self.bits.append(0)
+        self.size += 1
+        if value:
+            self[self.size - 1] = True
+
+    def as_int(self):
+        return int.from_bytes(self.bits, "little")
+
+    def assign(self, value):
+        # Bits past size stay clear, so ~x style masks can be assigned directly
+        value &= (1 << self.size) - 1
+        self.bits[:] = value.to_bytes(len(self.bits), "little")
+
+    def count(self):
+        return self.as_int().bit_count()
+
+    def flags(self):
+        # One bool per handle
+        return list(islice(chain.from_iterable(map(BYTE_FLAGS.__getitem__, self.bits)), self.size))
+
+    @classmethod
+    def from_flags(cls, flags):
+        bitmap = cls()
+        bitmap.size = len(flags)
+        bitmap.bits = bytearray((bitmap.size + 7) >> 3)
+        if flags:
+            bitmap.assign(int("".join(map("01".__getitem__, reversed(flags))), 2))
+        return bitmap
+
+
+class GeneColumns:
+    # Every paged-in gene as one row across flat columns, addressed by an integer handle (its row number).
+    # Chromosome and region names are interned, gene names live back to back in one UTF-8 buffer, and the
+    # methylation / radiation / active flags are bitmaps. Removed genes only clear their live bit and are counted
+    # in dead; compact() drops them once the model decides enough of the columns are dead
+    def __init__(self):
+        self.chromosome_names = Interner()
+        self.region_names = Interner()
+        self.ids = array("q")  # Database id, NO_ID while not known
+        self.chromosomes = array("I")  # chromosome_names id
+        self.regions = array("I")  # region_names id
+        self.colors = array("B")  # Index into gene_model.COLORS
+        self.starts = array("q")  # 1-based inclusive coordinates, NO_ID for genes without a position
+        self.ends = array("q")
+        self.name_offsets = array("Q", [0])  # Name of handle h is name_bytes[name_offsets[h]:name_offsets[h + 1]]
+        self.name_bytes = bytearray()
+        self.methylation = Bitmap()
+        self.radiation = Bitmap()
+        self.active = Bitmap()
+        self.live = Bitmap()
+        self.dead = 0  # Handles discarded since the last compact()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, gene_id, chromosome, region, name, color, methylation_prone, radiation_prone, active,
+            start=None, end=None):
+        handle = len(self.ids)
+        self.ids.append(NO_ID if gene_id is None else gene_id)
+        self.chromosomes.append(self.chromosome_names.intern(chromosome))
+        self.regions.append(self.region_names.intern(region))
+        self.colors.append(color)
+        positioned = start is not None and end is not None
+        self.starts.append(start if positioned else NO_ID)
+        self.ends.append(end if positioned else NO_ID)
+        self.name_bytes += name.encode()
+        self.name_offsets.append(len(self.name_bytes))
+        self.methylation.append(methylation_prone)
+        self.radiation.append(radiation_prone)
+        self.active.append(active)
+        self.live.append(True)
+        return handle
+
+    def discard(self, handles):
+        for handle in handles:
+            if self.live[handle]:
+                self.live[handle] = False
+                self.dead += 1
+
+    def compact(self):
+        # Rebuilds every column from the live handles only; returns old handle -> new handle (NO_ID for dead ones).
+        # Runs on the GUI thread inside a model update, so every column goes through compress / map instead of a
+        # per-handle Python loop: about 0.5 ms per 10,000 handles
+        live = self.live.flags()
+        handles = list(compress(range(len(self.ids)), live))
+        remap = array("q", [NO_ID]) * len(self.ids)
+        for new, handle in enumerate(handles):
+            remap[handle] = new
+        for name in ("ids", "chromosomes", "regions", "colors", "starts", "ends"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, compress(column, live)))
+        offsets, names = self.name_offsets, self.name_bytes
+        pieces = list(compress(map(names.__getitem__, map(slice, offsets, islice(offsets, 1, None))), live))
+        self.name_bytes = bytearray().join(pieces)
+        self.name_offsets = array("Q", accumulate(map(len, pieces), initial=0))
+        for name in ("methylation", "radiation", "active"):
+            setattr(self, name, Bitmap.from_flags(list(compress(getattr(self, name).flags(), live))))
+        self.live = Bitmap.from_flags([True] * len(handles))
+        self.dead = 0
+        return remap
+
+    def gene_id(self, handle):
+        gene_id = self.ids[handle]
+        return None if gene_id == NO_ID else gene_id
+
+    def chromosome(self, handle):
+        return self.chromosome_names[self.chromosomes[handle]]
+
+    def region(self, handle):
+        return self.region_names[self.regions[handle]]
+
+    def name(self, handle):
+        return self.name_bytes[self.name_offsets[handle]:self.name_offsets[handle + 1]].decode()
+
+    def position(self, handle):
+        # (start, end), or (None, None) for genes without coordinates
+        if self.starts[handle] == NO_ID:
+            return None, None
+        return self.starts[handle], self.ends[handle]
+
+    def apply_filters(self, radiation_filter, methylation_filter):
+        # Same rule as GeneModel.is_active_flags, for every gene at once:
+        # active = not (methylation filter and radiation prone or radiation filter and methylation prone)
+        hidden = 0
+        if methylation_filter:
+            hidden |= self.radiation.as_int()
+        if radiation_filter:
+            hidden |= self.methylation.as_int()
+        self.active.assign(~hidden)
+
+    def nbytes(self):
+        # Bytes held by the columns, interned names included
+        arrays = (self.ids, self.chromosomes, self.regions, self.colors, self.starts, self.ends, self.name_offsets)
+        return (sum(column.itemsize * len(column) for column in arrays) + len(self.name_bytes) +
+                sum(len(bitmap.bits) for bitmap in (self.methylation, self.radiation, self.active, self.live)) +
+                self.chromosome_names.nbytes() + self.region_names.nbytes())
+
+    def bytes_per_gene(self):
+        live = self.live.count()
+        return self.nbytes() / live if live else 0.0
@@ -0,0 +1,147 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from time import perf_counter
+from storage import EXPORT_COLUMNS, open_backend
+
+# Streaming export of the genes table for downstream analysis, filtered like the overview inside SQL:
+#   python gene_export.py genes.parquet --filter radiation --incremental
+# CSV and JSONL go to one file, Parquet to a directory of part files. With --incremental only genes inserted since the
+# previous export (insertion stamps above the one it stopped at, migration 10) are appended: a new part file, or lines
+# at the end of the file. Genes an undo puts back count as inserted again, so one deleted after it was exported shows
+# up a second time under the same id. What was exported last is kept next to the output in <output>.state.json
+FORMATS = ("csv", "jsonl", "parquet")
+FILTERS = ("none", "radiation", "methylation")
+EXPORT_BATCH = 10000  # Rows per fetch from the streaming cursor, and per Parquet row group
+STATE_SUFFIX = ".state.json"
+
+
+def export_format(path, file_format=None):
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path.rstrip("/\\"))[1].lstrip(".").lower()
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f"Cannot tell the export format of {path}, pass one of {', '.join(FORMATS)}")
+
+
+def filter_flags(filter_name):
+    # (radiation filter, methylation filter) of a FILTERS name, as the overview's radio buttons set them
+    return filter_name == "radiation", filter_name == "methylation"
+
+
+def read_state(path):
+    try:
+        with open(path + STATE_SUFFIX, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def write_state(path, state):
+    temporary = path + STATE_SUFFIX + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(temporary, path + STATE_SUFFIX)
+
+
+def write_csv(store, path, after, upto, filters, state, progress):
+    with open(path, "a" if state else "w", newline="", encoding="utf-8") as file:
+        return store.export_csv(file, after, upto, *filters, header=not state, progress=progress)
+
+
+def write_jsonl(store, path, after, upto, filters, state, progress):
+    written = 0
+    with open(path, "a" if state else "w", encoding="utf-8") as file:
+        for batch in store.export_rows(after, upto, *filters, EXPORT_BATCH):
+            file.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in batch)
+            written += len(batch)
+            if progress is not None:
+                progress(written)
+    return written
+
+
+def write_parquet(store, path, after, upto, filters, state, progress):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    types = (pyarrow.int64(), pyarrow.string(), pyarrow.string(), pyarrow.string(), pyarrow.string(), pyarrow.bool_(),
+             pyarrow.bool_(), pyarrow.int64(), pyarrow.int64())
+    schema = pyarrow.schema(list(zip(EXPORT_COLUMNS, types)))
+    os.makedirs(path, exist_ok=True)
+    if not state:
+        # A full export starts the directory over; only part files this command wrote are removed
+        for part in glob.glob(os.path.join(path, "part-*.parquet")):
+            os.remove(part)
+    part = os.path.join(path, f"part-{state['parts'] if state else 0:05d}.parquet")
+    writer = None
+    written = 0
+    try:
+        for batch in store.export_rows(after, upto, *filters, EXPORT_BATCH):
+            columns = [pyarrow.array(column, type=type_) for column, type_ in zip(zip(*batch), types)]
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(part, schema)
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(columns, schema=schema))
+            written += len(batch)
+            if progress is not None:
+                progress(written)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+
+def export_genes(store, path, file_format=None, filter_name="none", incremental=False, progress=None):
+    # Streams the genes kept by the filter into path; returns the number of rows written by this run
+    file_format = export_format(path, file_format)
+    token = store.change_state()[0]
+    state = read_state(path) if incremental else None
+    if state is not None and (state["token"], state["format"], state["filter"]) != (token, file_format, filter_name):
+        raise ValueError(f"{path} was exported from another database, or in another format or filter; "
+                         f"export it in full first")
+    # State written before migration 10 counted ids, which is what the existing rows were stamped with
+    after = (state["last_added"] if "last_added" in state else state["last_id"]) if state else 0
+    upto = store.export_watermark()  # Rows inserted while the export runs are left for the next one
+    written = WRITERS[file_format](store, path, after, upto, filter_flags(filter_name), state, progress)
+    parts = state["parts"] if state else 0
+    write_state(path, {"token": token, "format": file_format, "filter": filter_name, "last_added": max(after, upto),
+                       "rows": (state["rows"] if state else 0) + written,
+                       "parts": parts + 1 if file_format == "parquet" and written else parts})
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the genes table to CSV, JSONL or Parquet")
+    parser.add_argument("output", help="Output file (CSV / JSONL) or directory (Parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="Override format detection from the output's extension")
+    parser.add_argument("--filter", choices=FILTERS, default="none", help="Keep only the genes the overview filter keeps")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append only the genes added since the previous export to the same output")
+    args = parser.parse_args(argv)
+
+    backend = open_backend()
+    started = perf_counter()
+    try:
+        written = backend.transaction(lambda store: export_genes(
+            store, args.output, args.format, args.filter, args.incremental,
+            lambda count: print(f"\r{args.output}: {count} rows", end="", file=sys.stderr)))
+        print(file=sys.stderr)
+    except Exception as error:
+        print("Error exporting genes:", error)
+        return 1
+    finally:
+        backend.close()
+    elapsed = perf_counter() - started
+    print(f"Exported {written} genes in {elapsed:.2f} s ({written / elapsed if elapsed else 0:.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
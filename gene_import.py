@@ -0,0 +1,175 @@
+import argparse
+import csv
+import gzip
+import io
+import os
+import sys
+from itertools import islice
+from time import perf_counter
+from urllib.parse import unquote
+from interval_index import parse_span
+
+BATCH_SIZE = 10000  # Rows per COPY batch, bounds memory for any file size
+GENE_COLUMNS = ("chromosome", "region", "gene_name", "gene_text", "methylation_prone", "radiation_prone",
+                "start_position", "end_position")
+FORMATS = ("gff3", "bed", "csv")
+
+
+def open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="")
+    return open(path, "r", newline="")
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    if extension in ("gff", "gff3"):
+        return "gff3"
+    if extension == "bed":
+        return "bed"
+    if extension in ("csv", "tsv"):
+        return "csv"
+    raise ValueError(f"Unknown annotation format for {path}, use one of: {', '.join(FORMATS)}")
+
+
+def to_bool(value):
+    return str(value).strip().lower() in ("1", "t", "true", "y", "yes")
+
+
+# Parsers yield rows in GENE_COLUMNS order one at a time, coordinates 1-based inclusive (None when unknown)
+
+def parse_gff3(lines, feature_types=("gene",)):
+    for line in lines:
+        if line.startswith("##FASTA"):
+            break
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.rstrip("\r\n").split("\t")
+        if len(fields) < 9 or fields[2] not in feature_types:
+            continue
+        attributes = dict(item.split("=", 1) for item in fields[8].split(";") if "=" in item)
+        name = attributes.get("Name") or attributes.get("gene_name") or attributes.get("ID")
+        if name:
+            start, end = int(fields[3]), int(fields[4])
+            yield fields[0], f"{start}-{end}", unquote(name), "", False, False, start, end
+
+
+def parse_bed(lines):
+    for line in lines:
+        if not line.strip() or line.startswith(("#", "track", "browser")):
+            continue
+        fields = line.rstrip("\r\n").split("\t")
+        if len(fields) < 3:
+            continue
+        # BED is 0-based half-open, regions are stored 1-based inclusive like GFF3
+        start, end = int(fields[1]) + 1, int(fields[2])
+        name = fields[3] if len(fields) > 3 and fields[3] else f"{fields[0]}:{start}-{end}"
+        yield fields[0], f"{start}-{end}", name, "", False, False, start, end
+
+
+def parse_csv(lines):
+    sample = next(lines, "")
+    dialect = "excel-tab" if "\t" in sample else "excel"
+    rows = csv.DictReader(_prepend(sample, lines), dialect=dialect)
+    for row in rows:
+        if not row.get("chromosome") or not row.get("gene_name"):
+            continue
+        # Coordinates from their own columns, else from a "start-end" region
+        if row.get("start_position") and row.get("end_position"):
+            span = sorted((int(row["start_position"]), int(row["end_position"])))
+        else:
+            span = parse_span(row.get("region")) or (None, None)
+        yield (row["chromosome"], row.get("region") or None, row["gene_name"], row.get("gene_text") or "",
+               to_bool(row.get("methylation_prone")), to_bool(row.get("radiation_prone")), *span)
+
+
+def _prepend(first, lines):
+    yield first
+    yield from lines
+
+
+PARSERS = {"gff3": parse_gff3, "bed": parse_bed, "csv": parse_csv}
+
+
+def copy_value(value):
+    # COPY text format: \N for NULL, t/f for booleans, backslash escapes for separators
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_rows(cursor, rows, batch_size=BATCH_SIZE, progress=None):
+    # Streams rows with one COPY per batch into a staging table, then moves them into genes skipping
+    # genes that already exist (unique lookup index); the caller owns the (single) transaction
+    columns = ", ".join(GENE_COLUMNS)
+    cursor.execute("""CREATE TEMP TABLE IF NOT EXISTS gene_import_batch (
+        chromosome VARCHAR(255),
+        region VARCHAR(255),
+        gene_name VARCHAR(255),
+        gene_text TEXT,
+        methylation_prone BOOLEAN,
+        radiation_prone BOOLEAN,
+        start_position BIGINT,
+        end_position BIGINT
+    ) ON COMMIT DROP""")
+    rows = iter(rows)
+    read = inserted = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        buffer = io.StringIO("".join("\t".join(map(copy_value, row)) + "\n" for row in batch))
+        cursor.copy_expert(f"COPY gene_import_batch ({columns}) FROM STDIN", buffer)
+        cursor.execute(f"INSERT INTO genes ({columns}) SELECT {columns} FROM gene_import_batch ON CONFLICT DO NOTHING")
+        inserted += cursor.rowcount
+        cursor.execute("TRUNCATE gene_import_batch")
+        read += len(batch)
+        if progress is not None:
+            progress(read)
+    return inserted
+
+
+def import_file(store, path, file_format=None, batch_size=BATCH_SIZE, progress=None):
+    # store is a storage.GeneStore; PostgreSQL streams the rows through copy_rows
+    file_format = file_format or detect_format(path)
+    with open_text(path) as lines:
+        return store.import_rows(PARSERS[file_format](iter(lines)), batch_size, progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import gene annotations into the genes table")
+    parser.add_argument("paths", nargs="+", help="GFF3, BED or CSV files (optionally .gz)")
+    parser.add_argument("--format", choices=FORMATS, help="Override format detection from the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from storage import open_backend
+    backend = open_backend()
+    started = perf_counter()
+
+    def run_import(store):
+        total = 0
+        for path in args.paths:
+            total += import_file(store, path, args.format, args.batch_size,
+                                 lambda count: print(f"\r{path}: {count} rows", end="", file=sys.stderr))
+            print(file=sys.stderr)
+        return total
+
+    try:
+        total = backend.transaction(run_import)
+    except Exception as error:
+        print("Error importing gene annotations:", error)
+        return 1
+    finally:
+        backend.close()
+    elapsed = perf_counter() - started
+    print(f"Imported {total} genes in {elapsed:.2f} s ({total / elapsed if elapsed else 0:.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
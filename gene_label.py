@@ -1,6 +0,0 @@
-from PyQt6.QtWidgets import QLabel
-
-class GeneLabel(QLabel):
-    def __init__(self, gene):
-        super().__init__(gene)
-        self.active = True  # Flag active gene (for filtering functionality)
\ No newline at end of file
@@ -0,0 +1,435 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from itertools import accumulate, cycle
+from PyQt6.QtCore import QObject, pyqtSignal
+from gene_columns import GeneColumns
+
+COLORS = ["red", "green", "blue", "orange", "purple"]
+INACTIVE_COLOR = "gray"
+FIRST_KEY = ("", 0)  # Keyset position before the first (region, id) of a chromosome
+COMPACT_MIN = 4096  # Dead GeneColumns handles tolerated before compacting, and only once they are half of them
+
+# Display row kinds (one row per chromosome heading, region heading and gene box,
+# plus a placeholder at the end of an expanded chromosome whose genes are still being paged in)
+CHROMOSOME_ROW = 0
+REGION_ROW = 1
+GENE_ROW = 2
+LOADING_ROW = 3
+
+
+class Region:
+    __slots__ = ("name", "genes", "index")
+
+    def __init__(self, name):
+        self.name = name
+        self.genes = array("I")  # GeneColumns handles in display order (by id)
+        self.index = None  # Gene name -> handle, built on the first lookup by name (GeneModel.handle_of)
+
+    def row_count(self):
+        return 1 + len(self.genes)
+
+
+class Chromosome:
+    __slots__ = ("name", "gene_count", "regions", "order", "offsets", "expanded", "complete", "fetching", "last_key",
+                 "extent")
+
+    def __init__(self, name, gene_count=0, complete=False):
+        self.name = name
+        self.gene_count = gene_count  # From the database, also for genes not paged in yet
+        self.extent = None  # (first start, last end) over all its genes, the scale genes are laid out on
+        self.regions = {}  # region name -> Region
+        self.order = []  # Region display order (sorted by name, like the keyset pages)
+        self.offsets = [1]  # Local row offset of each region heading, plus the loaded total at the end
+        self.expanded = False
+        self.complete = complete  # Every region / gene of the chromosome is in memory
+        self.fetching = False
+        self.last_key = FIRST_KEY  # (region, id) of the last row paged in
+
+    def widen(self, start, end):
+        if start is None or end is None:
+            return
+        if self.extent is None:
+            self.extent = (start, end)
+        elif start < self.extent[0] or end > self.extent[1]:
+            self.extent = (min(start, self.extent[0]), max(end, self.extent[1]))
+
+    def reindex(self):
+        # Only this chromosome's region offsets are recomputed after a change inside it
+        self.offsets = list(accumulate((region.row_count() for region in self.order), initial=1))
+
+    def row_count(self):
+        if not self.expanded:
+            return 1
+        return self.offsets[-1] + (0 if self.complete else 1)
+
+    def covers(self, region, gene_id):
+        # Whether a row at this keyset position belongs to the part that is already paged in
+        return self.complete or (region, gene_id) <= self.last_key
+
+
+class GeneModel(QObject):
+    layoutChanged = pyqtSignal()  # Rows were inserted or removed
+    dataChanged = pyqtSignal()  # Only colours / active state / counts changed
+    # Every gene added or removed through the model, loaded or not (keeps the search index in sync)
+    geneAdded = pyqtSignal(object, str, str, str, object, object)  # id, chromosome, region, gene, start, end
+    genesRemoved = pyqtSignal(str, object, object)  # chromosome, region or None, gene or None
+    geneFlagsChanged = pyqtSignal(str, str, str)  # Saved methylation / radiation flags of a gene, loaded or not
+    genesCompacted = pyqtSignal(object)  # GeneColumns were compacted: array of old handle -> new handle
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chromosomes = {}  # chromosome name -> Chromosome
+        self.order = []  # Chromosome display order
+        self.offsets = [0]  # Global row of each chromosome heading, plus the total at the end
+        self.color_cycles = {}
+        self.genes = GeneColumns()  # Every paged-in gene; the display structure only holds its handles
+        self.radiation_filter = False
+        self.methylation_filter = False
+        self.batched = None  # Inside batch(): chromosomes whose regions changed (None: only the chromosome list)
+        self.batched_data = False
+
+    def load_summary(self, chromosome_counts):
+        # (chromosome, gene count, first start, last end) rows as returned by GeneStore.chromosome_counts.
+        # Start from the chromosome list only; regions and genes are paged in when a chromosome is expanded.
+        # Returns the chromosomes that were expanded before, so the caller can page them in again
+        expanded = {chromosome.name for chromosome in self.order if chromosome.expanded}
+        self.chromosomes = {}
+        self.order = []
+        self.color_cycles = {}
+        self.genes = GeneColumns()
+        for chrom, gene_count, first, last in chromosome_counts:
+            chromosome = self.ensure_chromosome(chrom)
+            chromosome.gene_count = gene_count
+            chromosome.widen(first, last)
+            chromosome.expanded = chrom in expanded
+        self.reindex()
+        self.layoutChanged.emit()
+        return [chrom for chrom in self.chromosomes if chrom in expanded]
+
+    def summary(self):
+        # The chromosome_counts rows of the current state, in display order (what the startup snapshot keeps)
+        return [(chromosome.name, chromosome.gene_count, *(chromosome.extent or (None, None)))
+                for chromosome in self.order]
+
+    def refresh_chromosome(self, chrom, summary):
+        # Brings one chromosome that changed in the database in line with its chromosome_counts row (None once
+        # it is gone). Its paged-in genes are dropped, and so are pages still in flight for it; returns True when
+        # it is expanded and needs its first page again
+        old = self.chromosomes.get(chrom)
+        if summary is None:
+            if old is not None:
+                self.remove_chromosome(chrom)
+            return False
+        chromosome = Chromosome(chrom)
+        _, chromosome.gene_count, first, last = summary
+        chromosome.widen(first, last)
+        if old is None:
+            self.order.append(chromosome)
+        else:
+            for region in old.order:
+                self.genes.discard(region.genes)
+            chromosome.expanded = old.expanded
+            self.order[self.order.index(old)] = chromosome
+            self.color_cycles.pop(chrom, None)
+        self.chromosomes[chrom] = chromosome
+        self.compact_if_sparse()
+        self.reindex()
+        self.layoutChanged.emit()
+        return chromosome.expanded
+
+    def set_summary(self, chrom, summary):
+        # Gene count and extent from a fresh chromosome_counts row, keeping what is paged in (None: it is gone)
+        chromosome = self.chromosomes.get(chrom)
+        if summary is None:
+            if chromosome is not None:
+                self.remove_chromosome(chrom)
+            return
+        if chromosome is None:
+            return
+        _, chromosome.gene_count, first, last = summary
+        chromosome.extent = None
+        chromosome.widen(first, last)
+        self.data_changed()
+
+    def ensure_chromosome(self, chrom, complete=False):
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None:
+            chromosome = self.chromosomes[chrom] = Chromosome(chrom, complete=complete)
+            self.order.append(chromosome)
+        return chromosome
+
+    def ensure_region(self, chromosome, reg):
+        region = chromosome.regions.get(reg)
+        if region is None:
+            region = chromosome.regions[reg] = Region(reg)
+            if not chromosome.order or chromosome.order[-1].name < reg:
+                chromosome.order.append(region)
+            else:
+                position = bisect_left([existing.name for existing in chromosome.order], reg)
+                chromosome.order.insert(position, region)
+        return region
+
+    def insert_gene(self, region, chrom, gene, methylation_prone, radiation_prone, gene_id=None, start=None, end=None):
+        colors = self.color_cycles.setdefault(chrom, cycle(range(len(COLORS))))
+        handle = self.genes.add(gene_id, chrom, region.name, gene, next(colors), bool(methylation_prone),
+                                bool(radiation_prone), self.is_active_flags(methylation_prone, radiation_prone),
+                                start, end)
+        region.genes.append(handle)
+        if region.index is not None:
+            region.index.setdefault(gene, handle)
+        return handle
+
+    def handle_of(self, region, gene):
+        # Handle of the gene named gene in region, or None
+        if region.index is None:
+            name = self.genes.name
+            region.index = {}
+            for handle in region.genes:
+                region.index.setdefault(name(handle), handle)
+        return region.index.get(gene)
+
+    def compact_if_sparse(self):
+        # Removed genes only leave dead handles behind; once they are most of the columns, the columns are
+        # rebuilt from the live ones and every region's handles are renumbered
+        genes = self.genes
+        if genes.dead <= max(COMPACT_MIN, len(genes) // 2):
+            return
+        remap = genes.compact()
+        for chromosome in self.order:
+            for region in chromosome.order:
+                region.genes = array("I", map(remap.__getitem__, region.genes))
+                if region.index is not None:
+                    region.index = dict(zip(region.index, map(remap.__getitem__, region.index.values())))
+        self.genesCompacted.emit(remap)
+
+    def reindex(self):
+        self.offsets = list(accumulate((chromosome.row_count() for chromosome in self.order), initial=0))
+
+    def is_active(self, handle):
+        return self.genes.active[handle]
+
+    def color(self, handle):
+        return COLORS[self.genes.colors[handle]] if self.genes.active[handle] else INACTIVE_COLOR
+
+    def is_active_flags(self, methylation_prone, radiation_prone):
+        # Same rule the overview always used: the selected filter greys out genes prone to the other one
+        return not ((self.methylation_filter and radiation_prone) or
+                    (self.radiation_filter and methylation_prone))
+
+    # Lazy expansion
+
+    def set_expanded(self, chrom, expanded):
+        # Returns True when the chromosome still needs its first page of genes
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None or chromosome.expanded == expanded:
+            return False
+        chromosome.expanded = expanded
+        self.reindex()
+        self.layoutChanged.emit()
+        return expanded and not chromosome.complete
+
+    def begin_fetch(self, chrom):
+        # Returns the chromosome to page into, or None if it is complete or a page is already on its way
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None or chromosome.complete or chromosome.fetching:
+            return None
+        chromosome.fetching = True
+        return chromosome
+
+    def end_fetch(self, chromosome):
+        chromosome.fetching = False
+
+    def append_page(self, chromosome, rows, complete, last=True):
+        # rows are (id, region, gene_name, methylation_prone, radiation_prone, start, end) in (region, id) order.
+        # A page appended in slices passes last=False for all but its final slice, the chromosome stays fetching
+        if last:
+            chromosome.fetching = False
+        if self.chromosomes.get(chromosome.name) is not chromosome:
+            return  # Model was reloaded while the page was in flight
+        # Keyset pages never overlap each other or what add_gene already inserted (it only inserts into the
+        # part that is paged in), so rows are appended without a duplicate check
+        for gene_id, reg, gene, methylation_prone, radiation_prone, start, end in rows:
+            region = self.ensure_region(chromosome, reg)
+            if gene is not None:
+                self.insert_gene(region, chromosome.name, gene, methylation_prone, radiation_prone, gene_id, start, end)
+        if rows:
+            chromosome.last_key = (rows[-1][1], rows[-1][0])
+        chromosome.complete = complete
+        chromosome.reindex()
+        self.reindex()
+        self.layoutChanged.emit()
+
+    # Incremental updates, each one touching only the affected chromosome / region
+
+    def add_gene(self, chrom, reg, gene, methylation_prone=False, radiation_prone=False, gene_id=None,
+                 start=None, end=None):
+        new_chromosome = chrom not in self.chromosomes
+        chromosome = self.ensure_chromosome(chrom, complete=True)
+        if new_chromosome:
+            chromosome.expanded = True
+        chromosome.gene_count += 1
+        chromosome.widen(start, end)
+        if chromosome.covers(reg, gene_id if gene_id is not None else 0):
+            region = self.ensure_region(chromosome, reg)
+            if self.handle_of(region, gene) is None:
+                self.insert_gene(region, chrom, gene, methylation_prone, radiation_prone, gene_id, start, end)
+            self.layout_changed(chromosome)
+        else:
+            self.layout_changed()  # The gene lies past the loaded part and arrives with a later page
+        self.geneAdded.emit(gene_id, chrom, reg, gene, start, end)
+
+    def set_gene_flags(self, chrom, reg, gene, methylation_prone, radiation_prone):
+        handle = self.find(chrom, reg, gene)
+        if handle is not None:
+            self.genes.methylation[handle] = methylation_prone
+            self.genes.radiation[handle] = radiation_prone
+            self.genes.active[handle] = self.is_active_flags(methylation_prone, radiation_prone)
+            self.data_changed()
+        self.geneFlagsChanged.emit(chrom, reg, gene)
+        return handle
+
+    def update_flags(self, chrom, genes, regions=None):
+        # Saved flags from a chromosome's genes_by_id rows by id, for the genes paged in (of the given Regions only,
+        # when a caller splits the work); one repaint for all of them. Returns the number of genes whose flags changed
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None:
+            return 0
+        columns = self.genes
+        changed = 0
+        for region in chromosome.order if regions is None else regions:
+            for handle in region.genes:
+                row = genes.get(columns.ids[handle])
+                if row is None:
+                    continue
+                methylation_prone, radiation_prone = bool(row[4]), bool(row[5])
+                if columns.methylation[handle] != methylation_prone or columns.radiation[handle] != radiation_prone:
+                    columns.methylation[handle] = methylation_prone
+                    columns.radiation[handle] = radiation_prone
+                    columns.active[handle] = self.is_active_flags(methylation_prone, radiation_prone)
+                    changed += 1
+        if changed:
+            self.dataChanged.emit()
+        return changed
+
+    def remove_chromosome(self, chrom):
+        self.genesRemoved.emit(chrom, None, None)
+        chromosome = self.chromosomes.pop(chrom, None)
+        if chromosome is not None:
+            for region in chromosome.order:
+                self.genes.discard(region.genes)
+            self.order.remove(chromosome)
+            self.color_cycles.pop(chrom, None)
+            self.compact_if_sparse()
+            self.layout_changed()
+
+    def clear_region(self, chrom, reg, gene_count=None):
+        # Rows stay in the table with a NULL region, so the chromosome heading is kept
+        self.genesRemoved.emit(chrom, reg, None)
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None:
+            return
+        if gene_count is not None:
+            chromosome.gene_count = gene_count
+        if reg in chromosome.regions:
+            region = chromosome.regions.pop(reg)
+            self.genes.discard(region.genes)
+            chromosome.order.remove(region)
+            self.compact_if_sparse()
+        self.layout_changed(chromosome)
+
+    def clear_gene(self, chrom, reg, gene, gene_count=None):
+        # Rows stay in the table with a NULL gene name, so the region heading is kept
+        self.genesRemoved.emit(chrom, reg, gene)
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None:
+            return
+        if gene_count is not None:
+            chromosome.gene_count = gene_count
+        region = chromosome.regions.get(reg)
+        handle = self.handle_of(region, gene) if region is not None else None
+        if handle is not None:
+            region.genes.remove(handle)
+            del region.index[gene]
+            self.genes.discard((handle,))
+            self.compact_if_sparse()
+        self.layout_changed(chromosome)
+
+    @contextmanager
+    def batch(self):
+        # Many incremental updates in a row: offsets are recomputed and the views told once, at the end
+        if self.batched is not None:
+            yield
+            return
+        self.batched, self.batched_data = set(), False
+        try:
+            yield
+        finally:
+            chromosomes, data = self.batched, self.batched_data
+            self.batched = None
+            if chromosomes:
+                for chromosome in chromosomes - {None}:
+                    chromosome.reindex()
+                self.reindex()
+                self.layoutChanged.emit()
+            elif data:
+                self.dataChanged.emit()
+
+    def layout_changed(self, chromosome=None):
+        # Rows were inserted or removed, inside chromosome when given
+        if self.batched is not None:
+            self.batched.add(chromosome)
+            return
+        if chromosome is not None:
+            chromosome.reindex()
+        self.reindex()
+        self.layoutChanged.emit()
+
+    def data_changed(self):
+        if self.batched is not None:
+            self.batched_data = True
+        else:
+            self.dataChanged.emit()
+
+    def set_filters(self, radiation_prone, methylation_prone):
+        # Filter toggles only recompute the active bitmap, nothing is re-fetched
+        self.radiation_filter = radiation_prone
+        self.methylation_filter = methylation_prone
+        self.genes.apply_filters(radiation_prone, methylation_prone)
+        self.dataChanged.emit()
+
+    def find(self, chromosome, region, gene):
+        chrom = self.chromosomes.get(chromosome)
+        reg = chrom.regions.get(region) if chrom is not None else None
+        return self.handle_of(reg, gene) if reg is not None else None
+
+    def row_of(self, chrom, reg, gene):
+        # Global row of a loaded gene, or None while it is not paged in (or its chromosome is collapsed)
+        chromosome = self.chromosomes.get(chrom)
+        if chromosome is None or not chromosome.expanded or reg not in chromosome.regions:
+            return None
+        region = chromosome.regions[reg]
+        handle = self.handle_of(region, gene)
+        if handle is None:
+            return None
+        row = self.offsets[self.order.index(chromosome)] + chromosome.offsets[chromosome.order.index(region)]
+        return row + 1 + region.genes.index(handle)
+
+    def row_count(self):
+        return self.offsets[-1]
+
+    def row(self, index):
+        # (kind, chromosome name, region name, Chromosome for headings / GeneColumns handle for gene boxes)
+        position = bisect_right(self.offsets, index) - 1
+        chromosome = self.order[position]
+        local = index - self.offsets[position]
+        if local == 0:
+            return CHROMOSOME_ROW, chromosome.name, None, chromosome
+        if local >= chromosome.offsets[-1]:
+            return LOADING_ROW, chromosome.name, None, chromosome
+        position = bisect_right(chromosome.offsets, local) - 1
+        region = chromosome.order[position]
+        local -= chromosome.offsets[position]
+        if local == 0:
+            return REGION_ROW, chromosome.name, region.name, None
+        return GENE_ROW, chromosome.name, region.name, region.genes[local - 1]
@@ -0,0 +1,280 @@
+from PyQt6.QtCore import QRect, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+from PyQt6.QtWidgets import QAbstractScrollArea, QFrame
+from density import DensityPyramid
+from gene_canvas import brush_for
+from gene_model import INACTIVE_COLOR
+
+MARGIN = 10
+LABEL_WIDTH = 70
+BAR_HEIGHT = 18  # Density bars / gene glyphs; the methylation and radiation strips sit below
+STRIP_HEIGHT = 3
+TRACK_HEIGHT = BAR_HEIGHT + 2 * (STRIP_HEIGHT + 1)
+TRACK_PITCH = TRACK_HEIGHT + 8
+MIN_BIN_PIXELS = 2  # Bins are drawn from the finest pyramid level at least this many pixels wide
+GLYPH_LIMIT = 400  # Genes in a track's visible window up to which single genes are drawn instead of bins
+GLYPH_PADDING = 1  # Glyph windows are fetched this many view widths wider on either side, so panning stays local
+GLYPH_LANES = 3  # Overlapping genes are stacked in up to this many lanes
+MIN_SPAN = 200  # Bases across the track area at the deepest zoom
+ZOOM_STEP = 0.8  # View span factor per wheel notch
+DRAG_THRESHOLD = 3  # Pixels a press may move and still count as a click
+DENSITY_COLOR = "steelblue"
+GLYPH_COLOR = "steelblue"
+METHYLATION_RGB = (128, 0, 128)
+RADIATION_RGB = (255, 140, 0)
+
+
+def assign_lanes(rows):
+    # rows by start; greedy: each gene goes into the first lane that is free at its start
+    lane_ends = []
+    lanes = []
+    for row in rows:
+        start, end = row[3], row[4]
+        for lane, lane_end in enumerate(lane_ends):
+            if lane_end < start:
+                lane_ends[lane] = end
+                break
+        else:
+            lane = len(lane_ends)
+            lane_ends.append(end)
+        lanes.append(min(lane, GLYPH_LANES - 1))
+    return lanes
+
+
+class GenomeView(QAbstractScrollArea):
+    # Every placed chromosome as one horizontal track on a shared, zoomable coordinate axis.
+    # Zoomed out it draws density bins from the pyramid: bar height is the gene count, the two strips below are the
+    # methylation / radiation prone ratio. Once a track's visible window holds at most GLYPH_LIMIT genes it asks for
+    # them (glyphsRequested) and draws every gene at its position, greyed like the overview when filtered out.
+    # The wheel zooms around the cursor, dragging pans, the scroll bar moves between chromosomes
+    geneClicked = pyqtSignal(str, str, str)
+    glyphsRequested = pyqtSignal(str, int, int)  # chromosome, start, end
+
+    def __init__(self, model, diagnostics=None, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.diagnostics = diagnostics
+        self.pyramid = DensityPyramid()
+        self.tracks = []  # Chromosomes drawn, in overview order
+        self.length = 0  # Bases of the longest track
+        self.view_start = 0.0  # Bases left of the track area's left edge
+        self.view_span = None  # Bases across the track area, None while nothing is placed
+        self.glyphs = {}  # chromosome -> (start, end, rows, lanes) of the last delivered glyph window
+        self.requested = {}  # chromosome -> (start, end) of the glyph window on its way
+        self.hits = []  # (rect, chromosome, region, gene) of the glyphs painted last
+        self.drag = None  # (x, view_start, moved) while the mouse is down
+        self.model.layoutChanged.connect(self.update_tracks)
+        self.model.dataChanged.connect(self.viewport().update)
+        self.setFrameStyle(QFrame.Shape.Box)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(TRACK_PITCH)
+
+        self.bold_font = QFont(self.font())
+        self.bold_font.setBold(True)
+        self.text_pen = QPen(QColor("black"))
+        self.axis_pen = QPen(QColor("lightgray"))
+        self.scale_pen = QPen(QColor("gray"))
+        self.glyph_text_pen = QPen(QColor("white"))
+
+    # Data
+
+    def set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self.glyphs = {}
+        self.requested = {}
+        self.update_tracks()
+
+    def replace_bins(self, chromosome, rows):
+        # A chromosome's genes changed: its bins are re-read, its glyphs fetched again when next shown
+        self.pyramid.replace(chromosome, rows)
+        self.glyphs.pop(chromosome, None)
+        self.requested.pop(chromosome, None)
+        self.update_tracks()
+
+    def set_glyphs(self, chromosome, start, end, rows):
+        # rows are GeneStore.genes_overlapping rows
+        if self.requested.get(chromosome) == (start, end):
+            del self.requested[chromosome]
+        self.glyphs[chromosome] = (start, end, rows, assign_lanes(rows))
+        self.viewport().update()
+
+    def chromosome_length(self, chromosome):
+        record = self.model.chromosomes.get(chromosome)
+        if record is not None and record.extent is not None:
+            return record.extent[1]
+        bins = self.pyramid.chromosomes.get(chromosome)
+        return bins.length() if bins is not None else 0
+
+    def update_tracks(self):
+        self.tracks = [chromosome.name for chromosome in self.model.order
+                       if chromosome.extent is not None or chromosome.name in self.pyramid.chromosomes]
+        previous, self.length = self.length, max(map(self.chromosome_length, self.tracks), default=0)
+        if not self.length:
+            self.view_span = None
+        elif self.view_span is None or self.view_span >= previous:
+            self.view_start, self.view_span = 0.0, float(self.length)  # Fully zoomed out follows the genome
+        self.clamp_view()
+        self.update_scroll_range()
+        self.viewport().update()
+
+    # Geometry
+
+    def track_area(self):
+        return LABEL_WIDTH, max(self.viewport().width() - LABEL_WIDTH - MARGIN, 1)
+
+    def clamp_view(self):
+        if self.view_span is None:
+            return
+        self.view_span = min(max(self.view_span, MIN_SPAN), max(self.length, MIN_SPAN))
+        self.view_start = min(max(self.view_start, 0.0), max(self.length - self.view_span, 0.0))
+
+    def update_scroll_range(self):
+        content_height = len(self.tracks) * TRACK_PITCH + MARGIN
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setPageStep(self.viewport().height())
+        scroll_bar.setRange(0, max(0, content_height - self.viewport().height()))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+
+    def visible_tracks(self):
+        offset = self.verticalScrollBar().value()
+        first = max(0, (offset - MARGIN) // TRACK_PITCH)
+        last = min(len(self.tracks), (offset + self.viewport().height()) // TRACK_PITCH + 1)
+        return range(first, last)
+
+    # Painting
+
+    def paintEvent(self, event):
+        if self.diagnostics is None:
+            self.paint_tracks()
+            return
+        with self.diagnostics.span("genome.paint"):
+            self.paint_tracks()
+
+    def paint_tracks(self):
+        self.hits = []
+        if self.view_span is None:
+            return
+        painter = QPainter(self.viewport())
+        left, width = self.track_area()
+        scale = width / self.view_span  # Pixels per base
+        start = int(self.view_start) + 1
+        end = int(self.view_start + self.view_span)
+        level = self.pyramid.level_for(MIN_BIN_PIXELS / scale)
+        x_of = lambda base: left + (base - 1 - self.view_start) * scale
+        offset = self.verticalScrollBar().value()
+
+        # Bins of every visible track first: bar heights share one scale, so tracks compare at a glance
+        visible = [(index, self.tracks[index], self.pyramid.window(self.tracks[index], start, end, level))
+                   for index in self.visible_tracks()]
+        peak = max((row[2] for _, _, bins in visible for row in bins), default=1)
+        for index, chromosome, bins in visible:
+            top = MARGIN + index * TRACK_PITCH - offset
+            painter.setFont(self.bold_font)
+            painter.setPen(self.text_pen)
+            painter.drawText(QRect(MARGIN, top, LABEL_WIDTH - MARGIN, BAR_HEIGHT), Qt.AlignmentFlag.AlignVCenter,
+                             chromosome)
+            painter.setPen(self.axis_pen)
+            baseline = top + BAR_HEIGHT
+            painter.drawLine(round(max(x_of(1), left)), baseline,
+                             round(min(x_of(self.chromosome_length(chromosome) + 1), left + width)), baseline)
+            if sum(row[2] for row in bins) <= GLYPH_LIMIT and self.paint_glyphs(painter, chromosome, start, end,
+                                                                                 top, x_of):
+                continue
+            self.paint_bins(painter, bins, peak, top, x_of)
+
+        painter.setFont(self.font())
+        painter.setPen(self.scale_pen)
+        painter.drawText(QRect(left, 0, width, MARGIN * 2), Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop,
+                         f"{start:,}-{end:,}")
+        painter.end()
+
+    def paint_bins(self, painter, bins, peak, top, x_of):
+        painter.setPen(Qt.PenStyle.NoPen)
+        for first, last, genes, methylation, radiation in bins:
+            left = x_of(first)
+            width = max(x_of(last + 1) - left, 1.0)
+            height = max(1.0, BAR_HEIGHT * genes / peak)
+            painter.fillRect(QRectF(left, top + BAR_HEIGHT - height, width, height), brush_for(DENSITY_COLOR))
+            strip = top + BAR_HEIGHT + 1
+            painter.fillRect(QRectF(left, strip, width, STRIP_HEIGHT),
+                             QColor(*METHYLATION_RGB, round(255 * methylation / genes)))
+            painter.fillRect(QRectF(left, strip + STRIP_HEIGHT + 1, width, STRIP_HEIGHT),
+                             QColor(*RADIATION_RGB, round(255 * radiation / genes)))
+
+    def paint_glyphs(self, painter, chromosome, start, end, top, x_of):
+        # False while the genes of this window are not in yet (the bins are drawn meanwhile)
+        cached = self.glyphs.get(chromosome)
+        if cached is None or cached[0] > start or cached[1] < end:
+            self.request_glyphs(chromosome, start, end)
+            return False
+        _, _, rows, lanes = cached
+        lane_count = min(max(lanes, default=0) + 1, GLYPH_LANES)
+        lane_height = BAR_HEIGHT / lane_count
+        painter.setFont(self.font())
+        metrics = painter.fontMetrics()
+        for (gene_id, region, gene, gene_start, gene_end, methylation_prone, radiation_prone), lane in zip(rows, lanes):
+            if gene_end < start or gene_start > end:
+                continue
+            left = x_of(gene_start)
+            rect = QRectF(left, top + lane * lane_height, max(x_of(gene_end + 1) - left, 2.0), lane_height - 1)
+            active = self.model.is_active_flags(methylation_prone, radiation_prone)
+            painter.fillRect(rect, brush_for(GLYPH_COLOR if active else INACTIVE_COLOR))
+            if rect.width() > metrics.horizontalAdvance(gene) + 4 and lane_height >= metrics.height():
+                painter.setPen(self.glyph_text_pen)
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, gene)
+            self.hits.append((rect, chromosome, region, gene))
+        return True
+
+    def request_glyphs(self, chromosome, start, end):
+        requested = self.requested.get(chromosome)
+        if requested is not None and requested[0] <= start and requested[1] >= end:
+            return
+        padding = (end - start + 1) * GLYPH_PADDING
+        window = (max(1, start - padding), end + padding)
+        self.requested[chromosome] = window
+        self.glyphsRequested.emit(chromosome, *window)
+
+    # Zoom / pan / click
+
+    def wheelEvent(self, event):
+        notches = event.angleDelta().y() / 120
+        if self.view_span is None or not notches:
+            return
+        left, width = self.track_area()
+        x = min(max(event.position().x() - left, 0), width)
+        anchor = self.view_start + x * self.view_span / width  # The base under the cursor stays put
+        self.view_span *= ZOOM_STEP ** notches
+        self.clamp_view()
+        self.view_start = anchor - x * self.view_span / width
+        self.clamp_view()
+        self.viewport().update()
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.view_span is not None:
+            self.drag = (event.position().x(), self.view_start, False)
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self.drag is not None:
+            x, view_start, moved = self.drag
+            dx = event.position().x() - x
+            if moved or abs(dx) > DRAG_THRESHOLD:
+                self.drag = (x, view_start, True)
+                self.view_start = view_start - dx * self.view_span / self.track_area()[1]
+                self.clamp_view()
+                self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self.drag is not None and not self.drag[2]:
+            position = event.position()
+            for rect, chromosome, region, gene in self.hits:
+                if rect.contains(position):
+                    self.geneClicked.emit(chromosome, region, gene)
+                    break
+        self.drag = None
+        super().mouseReleaseEvent(event)
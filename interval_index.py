@@ -0,0 +1,116 @@
+import re
+from array import array
+from bisect import bisect_left
+from math import isqrt
+
+LOCUS = re.compile(r"^\s*([^:\s]+)\s*:\s*([\d,_]+)\s*(?:-|\.\.)\s*([\d,_]+)\s*$")
+SPAN = re.compile(r"^\s*([\d,_]+)\s*(?:-|\.\.)\s*([\d,_]+)\s*$")
+PENDING_MIN = 256  # Intervals added since the last build are scanned linearly up to max(this, sqrt(n)), then rebuilt
+
+
+def parse_span(text):
+    # "55,000,000-55,300,000" (or "start..end") -> (start, end), None for anything else
+    match = SPAN.match(text or "")
+    if match is None:
+        return None
+    start, end = (int(re.sub("[,_]", "", value)) for value in match.groups())
+    return (start, end) if start <= end else (end, start)
+
+
+def parse_locus(text):
+    # "chr7:55,000,000-55,300,000" -> ("chr7", 55000000, 55300000), None for anything else
+    match = LOCUS.match(text or "")
+    if match is None:
+        return None
+    return (match.group(1),) + parse_span(f"{match.group(2)}-{match.group(3)}")
+
+
+class Nest:
+    # One containment level: intervals none of which contains another, so starts and ends are both sorted
+    __slots__ = ("starts", "ends", "values", "inner")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.values = []
+        self.inner = []  # Nest of the intervals each one contains, or None
+
+
+class IntervalIndex:
+    # Nested containment list over closed [start, end] intervals. Every level is searched with one bisect on its
+    # ends, then walked while starts stay inside the window, so an overlap query costs O(log n + hits).
+    # Changes after a build are kept aside: added intervals in a small pending list scanned on every query,
+    # discarded ones as tombstones skipped in the results. The index is rebuilt (one sort) once either outgrows
+    # its share, so single changes never pay for a full re-sort
+    def __init__(self):
+        self.intervals = {}  # value -> (start, end)
+        self.root = None
+        self.pending = {}  # value -> (start, end) added since the build
+        self.removed = set()  # Values whose built entry is stale (discarded, or added again with new bounds)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def add(self, value, start, end):
+        if self.root is not None:
+            if value in self.intervals:
+                self.removed.add(value)
+            self.pending[value] = (start, end)
+        self.intervals[value] = (start, end)
+        self.changed()
+
+    def discard(self, value):
+        if self.intervals.pop(value, None) is None:
+            return
+        if self.root is not None:
+            self.pending.pop(value, None)
+            self.removed.add(value)
+            self.changed()
+
+    def changed(self):
+        if self.root is not None and (len(self.pending) > max(PENDING_MIN, isqrt(len(self.intervals))) or
+                                      len(self.removed) > max(PENDING_MIN, len(self.intervals) // 4)):
+            self.root = None
+
+    def build(self):
+        # Sorted by start, longest first: an interval is nested in the closest open one that still reaches its end
+        root = Nest()
+        open_intervals = []  # (end, nest, position) of intervals that may contain the following ones
+        for value, (start, end) in sorted(self.intervals.items(), key=lambda item: (item[1][0], -item[1][1])):
+            while open_intervals and open_intervals[-1][0] < end:
+                open_intervals.pop()
+            if open_intervals:
+                _, parent, position = open_intervals[-1]
+                nest = parent.inner[position]
+                if nest is None:
+                    nest = parent.inner[position] = Nest()
+            else:
+                nest = root
+            nest.starts.append(start)
+            nest.ends.append(end)
+            nest.values.append(value)
+            nest.inner.append(None)
+            open_intervals.append((end, nest, len(nest.values) - 1))
+        self.root = root
+        self.pending = {}
+        self.removed = set()
+
+    def overlapping(self, start, end):
+        # (start, end, value) of every interval sharing at least one position with [start, end], by start
+        if self.root is None:
+            self.build()
+        removed = self.removed
+        hits = [(first, last, value) for value, (first, last) in self.pending.items() if first <= end and start <= last]
+        nests = [self.root]
+        while nests:
+            nest = nests.pop()
+            position = bisect_left(nest.ends, start)
+            while position < len(nest.starts) and nest.starts[position] <= end:
+                if not removed or nest.values[position] not in removed:
+                    hits.append((nest.starts[position], nest.ends[position], nest.values[position]))
+                if nest.inner[position] is not None:
+                    nests.append(nest.inner[position])
+                position += 1
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return hits
+
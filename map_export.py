@@ -0,0 +1,164 @@
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+# Headless batch export of chromosome maps, drawn exactly like the overview (same colour cycles, same greying
+# for the selected filter), one chromosome per task across a process pool:
+#   python map_export.py maps --format png --filter radiation --workers 8
+# Every worker process opens its own backend from GENE_STORE (or --store) and holds a single connection.
+FORMATS = ("svg", "png")
+FILTERS = ("none", "radiation", "methylation")
+IMAGE_WIDTH = 600
+PAGE_ROWS = 1000  # Rows per output file; longer chromosomes are split into name-001.png, name-002.png, ...
+EXPORT_PAGE = 5000  # Genes per keyset page read from the database
+PNG_QUALITY = 80  # Qt's zlib level mapping: a little lighter than the default, same size within a few percent
+
+worker = {}  # Per process: the Qt application and the backend opened by init_worker
+
+
+def init_worker(store_url):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    from storage import open_backend
+
+    worker["application"] = QGuiApplication.instance() or QGuiApplication([])
+    worker["backend"] = open_backend(store_url)
+
+
+def load_chromosome(store, summary, radiation, methylation):
+    # The same model the overview uses, filtered first so every gene is coloured / greyed as it is inserted
+    from gene_model import GeneModel
+
+    model = GeneModel()
+    model.set_filters(radiation, methylation)
+    model.load_summary([summary])
+    name = summary[0]
+    model.set_expanded(name, True)
+    chromosome = model.chromosomes[name]
+    while not chromosome.complete:
+        rows = store.gene_page(name, chromosome.last_key, EXPORT_PAGE)
+        model.append_page(chromosome, rows, len(rows) < EXPORT_PAGE)
+    return model
+
+
+def file_stem(name):
+    return re.sub(r"[^\w.-]", "_", name) or "_"
+
+
+def render(model, rows, path, image_format, width):
+    from PyQt6.QtCore import QRect, QSize, Qt
+    from PyQt6.QtGui import QColor, QGuiApplication, QImage, QPainter
+    from PyQt6.QtSvg import QSvgGenerator
+    from gene_canvas import MARGIN, ROW_HEIGHT, ROW_PITCH, RowPainter
+    from gene_model import GENE_ROW
+
+    height = 2 * MARGIN + len(rows) * ROW_PITCH
+    if image_format == "svg":
+        device = QSvgGenerator()
+        device.setFileName(path)
+        device.setSize(QSize(width, height))
+        device.setViewBox(QRect(0, 0, width, height))
+        device.setTitle(os.path.basename(path))
+    else:
+        device = QImage(width, height, QImage.Format.Format_RGB32)
+        device.fill(QColor("white"))
+    row_painter = RowPainter(QGuiApplication.font(), model)
+    painter = QPainter(device)
+    for number, index in enumerate(rows):
+        kind, chrom, reg, item = model.row(index)
+        rect = QRect(MARGIN, MARGIN + number * ROW_PITCH, width - 2 * MARGIN, ROW_HEIGHT)
+        extent = model.chromosomes[chrom].extent if kind == GENE_ROW else None
+        row_painter.paint(painter, kind, chrom, reg, item, rect, extent=extent)
+    painter.end()
+    if image_format == "svg":
+        return
+    # A handful of colours plus text antialiasing fit a 256 colour palette, which deflates ~4x faster than RGB32.
+    # Nearest colour without dithering: error diffusion over a 30000 pixel high page costs more than the deflate
+    palette = device.convertToFormat(QImage.Format.Format_Indexed8,
+                                     Qt.ImageConversionFlag.ThresholdDither | Qt.ImageConversionFlag.AvoidDither)
+    if not palette.save(path, "PNG", PNG_QUALITY):
+        raise OSError(f"Could not write {path}")
+
+
+def render_chromosome(summary, output, image_format, width, radiation, methylation):
+    # Runs in a worker on one GeneStore.chromosome_counts row: returns (chromosome, genes, written paths, seconds)
+    started = perf_counter()
+    name = summary[0]
+    model = worker["backend"].transaction(lambda store: load_chromosome(store, summary, radiation, methylation))
+    total = model.row_count()
+    pages = range(0, total, PAGE_ROWS)
+    paths = []
+    for number, first in enumerate(pages, 1):
+        suffix = f"-{number:03d}" if len(pages) > 1 else ""
+        path = os.path.join(output, f"{file_stem(name)}{suffix}.{image_format}")
+        render(model, range(first, min(first + PAGE_ROWS, total)), path, image_format, width)
+        paths.append(path)
+    return name, model.chromosomes[name].gene_count, paths, perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export chromosome maps as SVG / PNG without opening the app")
+    parser.add_argument("output", help="Directory for the map files (created if missing)")
+    parser.add_argument("--format", choices=FORMATS, default="svg")
+    parser.add_argument("--chromosome", action="append", help="Export only this chromosome (repeatable)")
+    parser.add_argument("--filter", choices=FILTERS, default="none", help="Grey out genes like the overview filter")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--width", type=int, default=IMAGE_WIDTH)
+    parser.add_argument("--store", help="Backend for every worker, defaults to GENE_STORE (postgresql)")
+    args = parser.parse_args(argv)
+
+    from storage import STORE_ENV, open_backend
+    store_url = args.store or os.environ.get(STORE_ENV, "postgresql")
+    if store_url == "memory":
+        print("Error: the memory backend is private to one process, export from postgresql or sqlite:<path>")
+        return 1
+    backend = open_backend(store_url)
+    try:
+        counts = backend.transaction(lambda store: store.chromosome_counts())
+    except Exception as error:
+        print("Error reading chromosomes:", error)
+        return 1
+    finally:
+        backend.close()
+    if args.chromosome:
+        wanted = set(args.chromosome)
+        counts = [summary for summary in counts if summary[0] in wanted]
+        missing = wanted - {summary[0] for summary in counts}
+        if missing:
+            print("Unknown chromosomes:", ", ".join(sorted(missing)))
+    # Largest chromosomes first, so one long task does not start last and hold up the whole run
+    counts.sort(key=lambda summary: -summary[1])
+    os.makedirs(args.output, exist_ok=True)
+
+    started = perf_counter()
+    genes = files = failed = 0
+    # spawn: a fresh interpreter per worker, no forked Qt state or inherited database sockets
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(counts) or 1)),
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_worker, initargs=(store_url,)) as pool:
+        tasks = {pool.submit(render_chromosome, summary, args.output, args.format, args.width,
+                             args.filter == "radiation", args.filter == "methylation"): summary[0]
+                 for summary in counts}
+        for done, task in enumerate(as_completed(tasks), 1):
+            try:
+                name, gene_count, paths, seconds = task.result()
+            except Exception as error:
+                failed += 1
+                print(f"Error exporting {tasks[task]}:", error)
+                continue
+            genes += gene_count
+            files += len(paths)
+            print(f"[{done}/{len(tasks)}] {name}: {gene_count} genes, {len(paths)} files in {seconds:.2f} s",
+                  file=sys.stderr)
+    elapsed = perf_counter() - started
+    print(f"Exported {len(counts) - failed} chromosomes ({genes} genes) to {files} {args.format} files "
+          f"in {elapsed:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
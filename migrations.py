@@ -0,0 +1,395 @@
+import sys
+
+BIN_SIZE = 10000  # Bases per gene_bins row (by gene start); changing it takes a new migration that refills the table
+NOTIFY_CHANNEL = "gene_changes"
+NOTIFY_IDS = 200  # Row ids listed per change notification; past that it only names the chromosome (NOTIFY payloads are capped)
+
+# Versioned schema changes, applied in order at startup; never edit a released entry, append a new one
+MIGRATIONS = [
+    (1, "Create genes table", [
+        """CREATE TABLE IF NOT EXISTS genes (
+            id SERIAL PRIMARY KEY,
+            chromosome VARCHAR(255),
+            region VARCHAR(255),
+            gene_name VARCHAR(255),
+            gene_text TEXT,
+            methylation_prone BOOLEAN,
+            radiation_prone BOOLEAN
+        )""",
+    ]),
+    (2, "Unique (chromosome, region, gene_name) lookup index", [
+        # Older databases may hold duplicate genes, keep the oldest row of each
+        """DELETE FROM genes a USING genes b
+           WHERE a.chromosome = b.chromosome AND a.region = b.region AND a.gene_name = b.gene_name AND a.id > b.id""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS genes_lookup_key ON genes (chromosome, region, gene_name)",
+    ]),
+    (3, "Partial indexes for the methylation / radiation filters", [
+        "CREATE INDEX IF NOT EXISTS genes_methylation_prone_idx ON genes (chromosome, region) WHERE methylation_prone",
+        "CREATE INDEX IF NOT EXISTS genes_radiation_prone_idx ON genes (chromosome, region) WHERE radiation_prone",
+    ]),
+    (4, "Keyset index for paging a chromosome's genes in (region, id) order", [
+        'CREATE INDEX IF NOT EXISTS genes_chromosome_page_idx ON genes (chromosome, region COLLATE "C", id)',
+    ]),
+    (5, "Numeric start / end coordinates with a range index for overlap queries", [
+        "ALTER TABLE genes ADD COLUMN IF NOT EXISTS start_position BIGINT",
+        "ALTER TABLE genes ADD COLUMN IF NOT EXISTS end_position BIGINT",
+        # Imported annotations stored their coordinates as "start-end" region names
+        r"""UPDATE genes SET start_position = LEAST(split_part(region, '-', 1)::BIGINT, split_part(region, '-', 2)::BIGINT),
+                             end_position = GREATEST(split_part(region, '-', 1)::BIGINT, split_part(region, '-', 2)::BIGINT)
+            WHERE region ~ '^\d{1,18}-\d{1,18}$' AND start_position IS NULL""",
+        # GiST over the closed range answers && (overlap) in log time; chromosome is checked on the hits
+        # (a (chromosome, range) GiST index would need the btree_gist extension)
+        """CREATE INDEX IF NOT EXISTS genes_position_idx ON genes
+           USING gist (int8range(start_position, end_position, '[]')) WHERE start_position IS NOT NULL""",
+    ]),
+    (6, "Per-bin gene and flag counts kept up to date by triggers", [
+        """CREATE TABLE IF NOT EXISTS gene_bins (
+            chromosome VARCHAR(255) NOT NULL,
+            bin INTEGER NOT NULL,
+            genes INTEGER NOT NULL,
+            methylation INTEGER NOT NULL,
+            radiation INTEGER NOT NULL,
+            PRIMARY KEY (chromosome, bin)
+        )""",
+        # Statement-level: one grouped upsert per changed bin and statement, so bulk imports stay cheap
+        f"""CREATE OR REPLACE FUNCTION gene_bins_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                INSERT INTO gene_bins AS bins (chromosome, bin, genes, methylation, radiation)
+                SELECT chromosome, (start_position - 1) / {BIN_SIZE}, -COUNT(*),
+                       -COUNT(*) FILTER (WHERE methylation_prone), -COUNT(*) FILTER (WHERE radiation_prone)
+                FROM old_rows
+                WHERE chromosome IS NOT NULL AND gene_name IS NOT NULL AND start_position IS NOT NULL
+                GROUP BY 1, 2
+                ON CONFLICT (chromosome, bin) DO UPDATE SET genes = bins.genes + EXCLUDED.genes,
+                    methylation = bins.methylation + EXCLUDED.methylation,
+                    radiation = bins.radiation + EXCLUDED.radiation;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO gene_bins AS bins (chromosome, bin, genes, methylation, radiation)
+                SELECT chromosome, (start_position - 1) / {BIN_SIZE}, COUNT(*),
+                       COUNT(*) FILTER (WHERE methylation_prone), COUNT(*) FILTER (WHERE radiation_prone)
+                FROM new_rows
+                WHERE chromosome IS NOT NULL AND gene_name IS NOT NULL AND start_position IS NOT NULL
+                GROUP BY 1, 2
+                ON CONFLICT (chromosome, bin) DO UPDATE SET genes = bins.genes + EXCLUDED.genes,
+                    methylation = bins.methylation + EXCLUDED.methylation,
+                    radiation = bins.radiation + EXCLUDED.radiation;
+            END IF;
+            RETURN NULL;
+        END $$""",
+        """CREATE TRIGGER gene_bins_insert AFTER INSERT ON genes REFERENCING NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION gene_bins_apply()""",
+        """CREATE TRIGGER gene_bins_update AFTER UPDATE ON genes REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION gene_bins_apply()""",
+        """CREATE TRIGGER gene_bins_delete AFTER DELETE ON genes REFERENCING OLD TABLE AS old_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION gene_bins_apply()""",
+        f"""INSERT INTO gene_bins (chromosome, bin, genes, methylation, radiation)
+            SELECT chromosome, (start_position - 1) / {BIN_SIZE}, COUNT(*),
+                   COUNT(*) FILTER (WHERE methylation_prone), COUNT(*) FILTER (WHERE radiation_prone)
+            FROM genes WHERE chromosome IS NOT NULL AND gene_name IS NOT NULL AND start_position IS NOT NULL
+            GROUP BY 1, 2""",
+    ]),
+    (7, "Per-chromosome change counter for refreshing a startup snapshot", [
+        # gene_source.token tells databases apart (a recreated one gets a new token), chromosome_versions holds the
+        # counter value of every chromosome's last change, so a client can ask what changed since the counter it saw
+        "CREATE SEQUENCE IF NOT EXISTS gene_change_seq",
+        "CREATE TABLE IF NOT EXISTS gene_source (token TEXT NOT NULL)",
+        """INSERT INTO gene_source (token) SELECT md5(random()::text || clock_timestamp()::text)
+           WHERE NOT EXISTS (SELECT 1 FROM gene_source)""",
+        """CREATE TABLE IF NOT EXISTS chromosome_versions (
+            chromosome VARCHAR(255) PRIMARY KEY,
+            version BIGINT NOT NULL
+        )""",
+        # One counter value per statement for every chromosome it touched
+        """CREATE OR REPLACE FUNCTION chromosome_versions_bump() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            next_version BIGINT := nextval('gene_change_seq');
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                INSERT INTO chromosome_versions (chromosome, version)
+                SELECT DISTINCT chromosome, next_version FROM old_rows WHERE chromosome IS NOT NULL
+                ON CONFLICT (chromosome) DO UPDATE SET version = EXCLUDED.version;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO chromosome_versions (chromosome, version)
+                SELECT DISTINCT chromosome, next_version FROM new_rows WHERE chromosome IS NOT NULL
+                ON CONFLICT (chromosome) DO UPDATE SET version = EXCLUDED.version;
+            END IF;
+            RETURN NULL;
+        END $$""",
+        """CREATE TRIGGER chromosome_versions_insert AFTER INSERT ON genes REFERENCING NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION chromosome_versions_bump()""",
+        """CREATE TRIGGER chromosome_versions_update AFTER UPDATE ON genes
+           REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION chromosome_versions_bump()""",
+        """CREATE TRIGGER chromosome_versions_delete AFTER DELETE ON genes REFERENCING OLD TABLE AS old_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION chromosome_versions_bump()""",
+    ]),
+    (8, "Row change notifications for the change feed", [
+        # One NOTIFY per statement and chromosome: {"c": chromosome, "ids": [changed row ids] or null when there were
+        # more than NOTIFY_IDS}. Delivered when the transaction commits, to every client LISTENing (change_feed.py)
+        f"""CREATE OR REPLACE FUNCTION genes_notify() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            chromosomes TEXT[] := '{{}}';
+            ids BIGINT[] := '{{}}';
+            change RECORD;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                SELECT chromosomes || array_agg(chromosome), ids || array_agg(id) INTO chromosomes, ids FROM old_rows;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                SELECT chromosomes || array_agg(chromosome), ids || array_agg(id) INTO chromosomes, ids FROM new_rows;
+            END IF;
+            FOR change IN
+                SELECT chromosome, CASE WHEN COUNT(DISTINCT id) <= {NOTIFY_IDS} THEN array_agg(DISTINCT id) END AS ids
+                FROM unnest(chromosomes, ids) AS changed (chromosome, id)
+                WHERE chromosome IS NOT NULL GROUP BY chromosome
+            LOOP
+                PERFORM pg_notify('{NOTIFY_CHANNEL}', json_build_object('c', change.chromosome, 'ids', change.ids)::text);
+            END LOOP;
+            RETURN NULL;
+        END $$""",
+        """CREATE TRIGGER genes_notify_insert AFTER INSERT ON genes REFERENCING NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION genes_notify()""",
+        """CREATE TRIGGER genes_notify_update AFTER UPDATE ON genes REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION genes_notify()""",
+        """CREATE TRIGGER genes_notify_delete AFTER DELETE ON genes REFERENCING OLD TABLE AS old_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION genes_notify()""",
+    ]),
+    (9, "Undo journal for set-based bulk edits", [
+        """CREATE TABLE IF NOT EXISTS bulk_actions (
+            id SERIAL PRIMARY KEY,
+            action VARCHAR(32) NOT NULL,
+            value TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )""",
+        # One row per gene a bulk action touched, holding just what undoing it needs: the flags, the text's length
+        # before an append, and for deletes the whole row
+        """CREATE TABLE IF NOT EXISTS bulk_journal (
+            action_id INTEGER NOT NULL,
+            gene_id INTEGER NOT NULL,
+            chromosome VARCHAR(255),
+            region VARCHAR(255),
+            gene_name VARCHAR(255),
+            gene_text TEXT,
+            methylation_prone BOOLEAN,
+            radiation_prone BOOLEAN,
+            start_position BIGINT,
+            end_position BIGINT,
+            text_length INTEGER,
+            PRIMARY KEY (action_id, gene_id)
+        )""",
+    ]),
+    (10, "Insertion stamps for incremental exports", [
+        # genes.added counts inserts, rows an undo puts back under their old ids included, so an incremental export
+        # can ask for everything inserted past the stamp it stopped at. Existing rows are stamped with their id
+        "CREATE SEQUENCE IF NOT EXISTS gene_added_seq",
+        "ALTER TABLE genes ADD COLUMN IF NOT EXISTS added BIGINT",
+        # Stamping changes nothing the bins, versions or change feed count
+        "ALTER TABLE genes DISABLE TRIGGER USER",
+        "UPDATE genes SET added = id WHERE added IS NULL",
+        "ALTER TABLE genes ENABLE TRIGGER USER",
+        "SELECT setval('gene_added_seq', COALESCE(MAX(id), 0) + 1, false) FROM genes",
+        "ALTER TABLE genes ALTER COLUMN added SET DEFAULT nextval('gene_added_seq')",
+        "CREATE INDEX IF NOT EXISTS genes_added_idx ON genes (added)",
+    ]),
+]
+
+# Columns whose updates SQLite's bins / versions triggers count (from migration 10 on, the added stamp is not one)
+GENE_UPDATE_COLUMNS = ("chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone, start_position, "
+                       "end_position")
+
+
+def sqlite_version_bump(row):
+    # SQLite has no sequences: every changed row advances gene_source.counter and stamps its chromosome with it
+    return f"""UPDATE gene_source SET counter = counter + 1;
+               INSERT INTO chromosome_versions (chromosome, version)
+               SELECT {row}.chromosome, counter FROM gene_source WHERE {row}.chromosome IS NOT NULL
+               ON CONFLICT (chromosome) DO UPDATE SET version = excluded.version;"""
+
+
+def sqlite_bin_delta(row, sign):
+    # SQLite triggers are per row: add (sign 1) or take back (sign -1) one gene's contribution to its bin
+    return f"""INSERT INTO gene_bins (chromosome, bin, genes, methylation, radiation)
+               SELECT {row}.chromosome, ({row}.start_position - 1) / {BIN_SIZE}, {sign},
+                      {sign} * (COALESCE({row}.methylation_prone, 0) != 0), {sign} * (COALESCE({row}.radiation_prone, 0) != 0)
+               WHERE {row}.chromosome IS NOT NULL AND {row}.gene_name IS NOT NULL AND {row}.start_position IS NOT NULL
+               ON CONFLICT (chromosome, bin) DO UPDATE SET genes = genes + excluded.genes,
+                   methylation = methylation + excluded.methylation, radiation = radiation + excluded.radiation;"""
+
+
+# The same versions for the embedded SQLite backend (storage.SQLiteBackend); keep both lists in step
+SQLITE_MIGRATIONS = [
+    (1, "Create genes table", [
+        """CREATE TABLE IF NOT EXISTS genes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chromosome VARCHAR(255),
+            region VARCHAR(255),
+            gene_name VARCHAR(255),
+            gene_text TEXT,
+            methylation_prone BOOLEAN,
+            radiation_prone BOOLEAN
+        )""",
+    ]),
+    (2, "Unique (chromosome, region, gene_name) lookup index", [
+        """DELETE FROM genes WHERE EXISTS (
+               SELECT 1 FROM genes b WHERE b.chromosome = genes.chromosome AND b.region = genes.region
+               AND b.gene_name = genes.gene_name AND b.id < genes.id)""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS genes_lookup_key ON genes (chromosome, region, gene_name)",
+    ]),
+    (3, "Partial indexes for the methylation / radiation filters", [
+        "CREATE INDEX IF NOT EXISTS genes_methylation_prone_idx ON genes (chromosome, region) WHERE methylation_prone",
+        "CREATE INDEX IF NOT EXISTS genes_radiation_prone_idx ON genes (chromosome, region) WHERE radiation_prone",
+    ]),
+    (4, "Keyset index for paging a chromosome's genes in (region, id) order", [
+        # BINARY is SQLite's default collation and orders like PostgreSQL's "C"
+        "CREATE INDEX IF NOT EXISTS genes_chromosome_page_idx ON genes (chromosome, region, id)",
+    ]),
+    (5, "Numeric start / end coordinates with a range index for overlap queries", [
+        "ALTER TABLE genes ADD COLUMN start_position BIGINT",
+        "ALTER TABLE genes ADD COLUMN end_position BIGINT",
+        # Same match as PostgreSQL's '^\d{1,18}-\d{1,18}$': digits only, one dash, 1 to 18 digits on either side
+        """UPDATE genes SET start_position = min(CAST(substr(region, 1, instr(region, '-') - 1) AS INTEGER),
+                                              CAST(substr(region, instr(region, '-') + 1) AS INTEGER)),
+                           end_position = max(CAST(substr(region, 1, instr(region, '-') - 1) AS INTEGER),
+                                              CAST(substr(region, instr(region, '-') + 1) AS INTEGER))
+           WHERE region NOT GLOB '*[^0-9-]*' AND region NOT GLOB '*-*-*'
+             AND instr(region, '-') BETWEEN 2 AND 19 AND length(region) - instr(region, '-') BETWEEN 1 AND 18""",
+        # No range type: a B-tree on (chromosome, start) bounds the scan to the window's end
+        "CREATE INDEX IF NOT EXISTS genes_position_idx ON genes (chromosome, start_position, end_position)",
+    ]),
+    (6, "Per-bin gene and flag counts kept up to date by triggers", [
+        """CREATE TABLE IF NOT EXISTS gene_bins (
+            chromosome VARCHAR(255) NOT NULL,
+            bin INTEGER NOT NULL,
+            genes INTEGER NOT NULL,
+            methylation INTEGER NOT NULL,
+            radiation INTEGER NOT NULL,
+            PRIMARY KEY (chromosome, bin)
+        )""",
+        f"CREATE TRIGGER gene_bins_insert AFTER INSERT ON genes BEGIN {sqlite_bin_delta('NEW', 1)} END",
+        f"CREATE TRIGGER gene_bins_update AFTER UPDATE ON genes BEGIN {sqlite_bin_delta('OLD', -1)} "
+        f"{sqlite_bin_delta('NEW', 1)} END",
+        f"CREATE TRIGGER gene_bins_delete AFTER DELETE ON genes BEGIN {sqlite_bin_delta('OLD', -1)} END",
+        f"""INSERT INTO gene_bins (chromosome, bin, genes, methylation, radiation)
+            SELECT chromosome, (start_position - 1) / {BIN_SIZE}, COUNT(*),
+                   SUM(COALESCE(methylation_prone, 0) != 0), SUM(COALESCE(radiation_prone, 0) != 0)
+            FROM genes WHERE chromosome IS NOT NULL AND gene_name IS NOT NULL AND start_position IS NOT NULL
+            GROUP BY 1, 2""",
+    ]),
+    (7, "Per-chromosome change counter for refreshing a startup snapshot", [
+        "CREATE TABLE IF NOT EXISTS gene_source (token TEXT NOT NULL, counter INTEGER NOT NULL)",
+        "INSERT INTO gene_source (token, counter) SELECT lower(hex(randomblob(16))), 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM gene_source)",
+        """CREATE TABLE IF NOT EXISTS chromosome_versions (
+            chromosome VARCHAR(255) PRIMARY KEY,
+            version INTEGER NOT NULL
+        )""",
+        f"CREATE TRIGGER chromosome_versions_insert AFTER INSERT ON genes BEGIN {sqlite_version_bump('NEW')} END",
+        f"CREATE TRIGGER chromosome_versions_update AFTER UPDATE ON genes BEGIN {sqlite_version_bump('OLD')} "
+        f"{sqlite_version_bump('NEW')} END",
+        f"CREATE TRIGGER chromosome_versions_delete AFTER DELETE ON genes BEGIN {sqlite_version_bump('OLD')} END",
+    ]),
+    # No LISTEN / NOTIFY in SQLite, clients poll chromosome_versions instead; the version keeps both lists in step
+    (8, "Row change notifications for the change feed", []),
+    (9, "Undo journal for set-based bulk edits", [
+        """CREATE TABLE IF NOT EXISTS bulk_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            action VARCHAR(32) NOT NULL,
+            value TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS bulk_journal (
+            action_id INTEGER NOT NULL,
+            gene_id INTEGER NOT NULL,
+            chromosome VARCHAR(255),
+            region VARCHAR(255),
+            gene_name VARCHAR(255),
+            gene_text TEXT,
+            methylation_prone BOOLEAN,
+            radiation_prone BOOLEAN,
+            start_position BIGINT,
+            end_position BIGINT,
+            text_length INTEGER,
+            PRIMARY KEY (action_id, gene_id)
+        )""",
+    ]),
+    (10, "Insertion stamps for incremental exports", [
+        # The update triggers are narrowed to the gene columns first, so stamping a row does not count as changing it
+        "DROP TRIGGER IF EXISTS gene_bins_update",
+        "DROP TRIGGER IF EXISTS chromosome_versions_update",
+        "ALTER TABLE genes ADD COLUMN added INTEGER",
+        "UPDATE genes SET added = id",
+        f"CREATE TRIGGER gene_bins_update AFTER UPDATE OF {GENE_UPDATE_COLUMNS} ON genes "
+        f"BEGIN {sqlite_bin_delta('OLD', -1)} {sqlite_bin_delta('NEW', 1)} END",
+        f"CREATE TRIGGER chromosome_versions_update AFTER UPDATE OF {GENE_UPDATE_COLUMNS} ON genes "
+        f"BEGIN {sqlite_version_bump('OLD')} {sqlite_version_bump('NEW')} END",
+        "CREATE INDEX IF NOT EXISTS genes_added_idx ON genes (added)",
+        # Writers are serialized, so the next stamp is one past the highest and stamps commit in order. Bulk inserts
+        # (SQLiteStore.import_rows) stamp their rows themselves, which spares rewriting each one here
+        """CREATE TRIGGER genes_added AFTER INSERT ON genes WHEN NEW.added IS NULL BEGIN
+               UPDATE genes SET added = (SELECT COALESCE(MAX(added), 0) + 1 FROM genes) WHERE id = NEW.id;
+           END""",
+    ]),
+]
+
+MIGRATION_LOCK = 727166  # pg_advisory_xact_lock key, keeps two clients from migrating at once
+
+
+def schema_version(cursor):
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate(cursor, target=None):
+    # Runs inside the caller's transaction, so a failing migration leaves the schema untouched
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK,))
+    cursor.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )""")
+    return apply_migrations(cursor, MIGRATIONS, target, "%s")
+
+
+def migrate_sqlite(cursor, target=None):
+    # SQLite serializes writers, so the transaction itself keeps two clients from migrating at once
+    cursor.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""")
+    return apply_migrations(cursor, SQLITE_MIGRATIONS, target, "?")
+
+
+def apply_migrations(cursor, migrations, target, placeholder):
+    current = schema_version(cursor)
+    applied = []
+    for version, description, statements in migrations:
+        if version <= current or (target is not None and version > target):
+            continue
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO schema_version (version, description) VALUES ({placeholder}, {placeholder})",
+                       (version, description))
+        applied.append(version)
+    return applied
+
+
+def main():
+    from storage import open_backend
+    backend = open_backend()
+    try:
+        applied = backend.transaction(lambda store: store.migrate())
+    except Exception as error:
+        print("Error migrating the database schema:", error)
+        return 1
+    finally:
+        backend.close()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
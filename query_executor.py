@@ -0,0 +1,175 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from time import perf_counter
+from types import GeneratorType
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Seconds of GUI-thread work per event loop turn (leaves headroom in a 16 ms frame). Callbacks with more work than
+# that return a generator and do a slice of a few ms per next(). Not sliced, measured at 200,000 paged-in genes:
+# GeneColumns.compact (about 15 ms, once at least half the handles are dead) and Python's full garbage collections
+# (50-100 ms with a heap that size, when they come due after a bulk edit of most genes)
+FRAME_BUDGET = 0.012
+READ_WORKERS = 2
+
+
+class Request:
+    __slots__ = ("job", "on_result", "on_error", "key", "generation", "barrier", "write")
+
+    def __init__(self, job, on_result, on_error, key, generation, barrier, write=False):
+        self.job = job
+        self.on_result = on_result
+        self.on_error = on_error
+        self.key = key
+        self.generation = generation
+        self.barrier = barrier
+        self.write = write
+
+
+class QueryExecutor(QObject):
+    # Emitted from worker threads, delivered on the GUI thread through a queued connection
+    delivered = pyqtSignal(object, object, object)  # request, result, error
+    progress = pyqtSignal(str, int)  # task name, items done; emitted by long jobs through report_progress
+    # (token, counter) change states before and after a committed write, on backends with serial_writes only;
+    # emitted ahead of the write's own result
+    ownChanges = pyqtSignal(object, object)
+
+    def __init__(self, backend, read_workers=READ_WORKERS, parent=None):
+        super().__init__(parent)
+        self.backend = backend  # storage backend; workers borrow a connection from it per request
+        self.lock = threading.Lock()
+        self.read_pool = ThreadPoolExecutor(read_workers, thread_name_prefix="db-read")
+        self.write_pool = ThreadPoolExecutor(1, thread_name_prefix="db-write")  # Writes stay in submit order
+        # Long reads (exports) run on their own worker, so they never hold up the read workers the view depends on
+        self.background_pool = ThreadPoolExecutor(1, thread_name_prefix="db-background")
+        self.last_write = None
+        self.generations = {}  # key -> generation of the newest request with that key
+        self.running = {}  # key -> connection currently executing that key
+        self.track_changes = False  # Set once the schema has the change counter (after migrations)
+
+        self.tasks = deque()  # GUI-thread callbacks and the generators they returned, run within FRAME_BUDGET
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setSingleShot(True)
+        self.drain_timer.setInterval(0)
+        self.drain_timer.timeout.connect(self.drain)
+        self.delivered.connect(self.deliver)
+
+    # Worker side
+
+    def run(self, request):
+        if request.barrier is not None:
+            wait([request.barrier])  # Reads observe every write submitted before them
+        if self.is_stale(request):
+            return
+        try:
+            connection = self.backend.acquire()
+        except Exception as error:
+            self.delivered.emit(request, None, error)
+            return
+        try:
+            with self.lock:
+                if self.is_stale(request):
+                    return
+                if request.key is not None:
+                    self.running[request.key] = connection
+            store = self.backend.store(connection, request.write)
+            tracked = request.write and self.track_changes and self.backend.serial_writes
+            before = store.change_state() if tracked else None
+            result = request.job(store)
+            after = store.change_state() if tracked else None
+            connection.commit()
+        except Exception as error:
+            self.backend.rollback(connection)
+            if not self.backend.is_cancellation(error):
+                self.delivered.emit(request, None, error)
+            return  # A cancellation means a newer request with the same key superseded this one
+        finally:
+            with self.lock:
+                if request.key is not None and self.running.get(request.key) is connection:
+                    del self.running[request.key]
+            self.backend.release(connection)
+        if before != after:
+            self.ownChanges.emit(before, after)
+        self.delivered.emit(request, result, None)
+
+    def report_progress(self, name, count):
+        self.progress.emit(name, count)
+
+    # GUI side
+
+    def submit(self, job, on_result=None, on_error=None, key=None, write=False, background=False):
+        # job(store) runs in its own transaction on a connection borrowed from the backend; background reads go to
+        # their own worker (they still wait for a free connection, so the single-connection memory backend serializes)
+        generation = self.supersede(key)
+        request = Request(job, on_result, on_error, key, generation, None if write else self.last_write, write)
+        if write:
+            future = self.last_write = self.write_pool.submit(self.run, request)
+        elif background:
+            future = self.background_pool.submit(self.run, request)
+        else:
+            future = self.read_pool.submit(self.run, request)
+        return future
+
+    def supersede(self, key):
+        if key is None:
+            return 0
+        with self.lock:
+            generation = self.generations[key] = self.generations.get(key, 0) + 1
+            connection = self.running.pop(key, None)
+            if connection is not None:
+                self.backend.cancel(connection)  # Stop the stale statement
+        return generation
+
+    def is_stale(self, request):
+        return request.key is not None and self.generations.get(request.key) != request.generation
+
+    def deliver(self, request, result, error):
+        if self.is_stale(request):
+            return
+        if error is not None:
+            if request.on_error is not None:
+                self.tasks.append((request, lambda: request.on_error(error)))
+            else:
+                print("Error executing database request:", error)
+        elif request.on_result is not None:
+            self.tasks.append((request, lambda: request.on_result(result)))
+        self.drain_timer.start()
+
+    def drain(self):
+        deadline = perf_counter() + FRAME_BUDGET
+        while self.tasks and perf_counter() < deadline:
+            request, work = self.tasks.popleft()
+            if self.is_stale(request):
+                continue
+            if isinstance(work, GeneratorType):
+                try:
+                    next(work)
+                except StopIteration:
+                    continue
+                self.tasks.appendleft((request, work))
+                continue
+            outcome = work()
+            if isinstance(outcome, GeneratorType):
+                # Callbacks with more than a frame's work return a generator and do one slice per next(). It keeps the
+                # head of the queue, so later callbacks still run after all of it, and the event loop runs in between
+                self.tasks.appendleft((request, outcome))
+        if self.tasks:
+            self.drain_timer.start()
+
+    def flush(self):
+        # Blocks until every submitted write has been committed
+        if self.last_write is not None:
+            wait([self.last_write])
+
+    def shutdown(self):
+        self.tasks.clear()
+        # Running keyed reads (an export waiting for other clients' writers) are cancelled rather than waited for;
+        # writes are never keyed and finish
+        with self.lock:
+            keys = list(self.running)
+        for key in keys:
+            self.supersede(key)
+        self.write_pool.shutdown(wait=True)
+        self.read_pool.shutdown(wait=True, cancel_futures=True)
+        self.background_pool.shutdown(wait=True, cancel_futures=True)
+        self.backend.close()
@@ -0,0 +1,66 @@
+from PyQt6.QtCore import QObject, QTimer
+
+SAVE_DELAY_MS = 500  # Quiet period after the last edit before pending saves are written
+
+
+class SaveQueue(QObject):
+    # Write-behind queue for gene tab edits: the latest state per gene wins, all pending genes are
+    # upserted together in one transaction once edits have been quiet for SAVE_DELAY_MS
+    def __init__(self, executor, gene_model, detail_cache=None, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.gene_model = gene_model
+        self.detail_cache = detail_cache
+        self.pending = {}  # (chromosome, region, gene) -> (text, methylation_prone, radiation_prone)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SAVE_DELAY_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def enqueue(self, chromosome, region, gene, text, methylation_prone, radiation_prone):
+        self.pending[(chromosome, region, gene)] = (text, methylation_prone, radiation_prone)
+        self.invalidate(chromosome, region, gene)
+        self.timer.start()  # Debounce: restart the quiet period on every edit
+
+    def invalidate(self, chromosome, region=None, gene=None):
+        if self.detail_cache is not None:
+            self.detail_cache.invalidate(chromosome, region, gene)
+
+    def is_pending(self, chromosome, region, gene):
+        return (chromosome, region, gene) in self.pending
+
+    def discard(self, chromosome, region=None, gene=None):
+        # Deleted genes must not be re-inserted by a save that was still waiting
+        for key in list(self.pending):
+            if key[0] == chromosome and region in (None, key[1]) and gene in (None, key[2]):
+                del self.pending[key]
+
+    def flush(self):
+        self.timer.stop()
+        if not self.pending:
+            return None
+        batch, self.pending = self.pending, {}
+        rows = [key + values for key, values in batch.items()]
+
+        def saved(returned):
+            print(f"Gene data saved successfully ({len(rows)} genes)")
+            for chromosome, region, gene, text, methylation_prone, radiation_prone in rows:
+                self.invalidate(chromosome, region, gene)  # A read that raced the write may have cached the old row
+                gene_id, inserted = returned[(chromosome, region, gene)]
+                if inserted:
+                    self.gene_model.add_gene(chromosome, region, gene, methylation_prone, radiation_prone, gene_id)
+                else:
+                    self.gene_model.set_gene_flags(chromosome, region, gene, methylation_prone, radiation_prone)
+
+        def failed(error):
+            print("Error saving gene data to the database:", error)
+            # Keep the unsaved edits for the next flush unless they were edited again meanwhile
+            for key, values in batch.items():
+                self.pending.setdefault(key, values)
+
+        return self.executor.submit(lambda store: store.upsert_genes(rows), saved, failed, write=True)
+
+    def flush_now(self):
+        # Blocks until every pending save is committed, used when the window closes
+        self.flush()
+        self.executor.flush()
@@ -0,0 +1,214 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import chain, compress
+from interval_index import IntervalIndex
+
+SEARCH_LIMIT = 20
+MAX_POSTINGS = 60000  # Postings scanned per fuzzy query, rarest trigrams first, keeps queries in the low ms
+FUZZY_CANDIDATES = 200  # Candidates re-scored exactly after the trigram vote
+BULK_MERGE = 512  # Past this many pending names one pass over the sorted arrays beats inserting / deleting one by one
+MIN_SIMILARITY = 0.25
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query_trigrams, text):
+    name_trigrams = trigrams(text)
+    shared = len(query_trigrams & name_trigrams)
+    return shared / (len(query_trigrams) + len(name_trigrams) - shared)
+
+
+class SearchIndex:
+    # Type-ahead index over gene names, keyed by the genes.id of each row.
+    # Prefix lookups use two parallel sorted arrays (lowercase name, id): every prefix is one contiguous
+    # slice found by bisect, which is what a trie gives you without a node object per character.
+    # Names added or removed since the last search are kept aside and merged into the arrays by the next one, so a
+    # batch of changes costs one pass over them instead of one each.
+    # Fuzzy lookups vote over trigram posting arrays; removed ids are skipped and compacted away lazily.
+    # Genes with coordinates are also kept per chromosome in an interval index for overlap / window queries.
+    def __init__(self):
+        self.entries = {}  # id -> (name, (chromosome, region))
+        self.regions = {}  # (chromosome, region) -> {gene_name: id}
+        self.chromosomes = {}  # chromosome -> set of regions
+        self.locations = {}  # Interned (chromosome, region) tuples shared by all genes of a region
+        self.sorted_names = []
+        self.sorted_ids = []
+        self.unsorted = set()  # (lowercase name, id) added since the last merge_unsorted
+        self.unsorted_dead = set()  # (lowercase name, id) removed since then, still in the sorted arrays
+        self.postings = {}  # trigram -> array of ids
+        self.intervals = {}  # chromosome -> IntervalIndex of ids by (start, end)
+        self.dead = 0
+        self.ready = False  # Set once the initial build from the database is in
+
+    @classmethod
+    def build(cls, rows):
+        # rows are (id, chromosome, region, gene_name, start, end); sorting once beats inserting one by one
+        index = cls()
+        pending = []
+        for gene_id, chromosome, region, gene, start, end in rows:
+            if index.register(gene_id, chromosome, region, gene, start, end):
+                pending.append((gene.lower(), gene_id))
+        pending.sort()
+        index.sorted_names = [name for name, _ in pending]
+        index.sorted_ids = [gene_id for _, gene_id in pending]
+        index.ready = True
+        return index
+
+    def register(self, gene_id, chromosome, region, gene, start=None, end=None):
+        if gene_id in self.entries:
+            return False
+        location = self.locations.setdefault((chromosome, region), (chromosome, region))
+        names = self.regions.setdefault(location, {})
+        if gene in names:
+            return False
+        names[gene] = gene_id
+        self.chromosomes.setdefault(chromosome, set()).add(region)
+        self.entries[gene_id] = (gene, location)
+        for trigram in trigrams(gene.lower()):
+            postings = self.postings.get(trigram)
+            if postings is None:
+                postings = self.postings[trigram] = array("q")
+            postings.append(gene_id)
+        if start is not None and end is not None:
+            intervals = self.intervals.get(chromosome)
+            if intervals is None:
+                intervals = self.intervals[chromosome] = IntervalIndex()
+            intervals.add(gene_id, start, end)
+        return True
+
+    def add(self, gene_id, chromosome, region, gene, start=None, end=None):
+        # Idempotent, so replaying changes over a fresh build is safe
+        if self.register(gene_id, chromosome, region, gene, start, end):
+            pair = (gene.lower(), gene_id)
+            if pair in self.unsorted_dead:
+                self.unsorted_dead.discard(pair)  # Still in the sorted arrays
+            else:
+                self.unsorted.add(pair)
+
+    def remove(self, chromosome, region=None, gene=None):
+        # Removes one gene, a region or a whole chromosome; idempotent like add
+        if region is None:
+            regions = list(self.chromosomes.get(chromosome, ()))
+        else:
+            regions = [region]
+        removed = {}
+        for reg in regions:
+            names = self.regions.get((chromosome, reg))
+            if not names:
+                continue
+            for name in ([gene] if gene is not None else list(names)):
+                gene_id = names.pop(name, None)
+                if gene_id is not None:
+                    removed[gene_id] = name
+            if not names:
+                del self.regions[(chromosome, reg)]
+                self.locations.pop((chromosome, reg), None)
+                self.chromosomes.get(chromosome, set()).discard(reg)
+        if not self.chromosomes.get(chromosome, True):
+            del self.chromosomes[chromosome]
+        intervals = self.intervals.get(chromosome)
+        if intervals is not None:
+            for gene_id in removed:
+                intervals.discard(gene_id)
+            if not intervals:
+                del self.intervals[chromosome]
+        for gene_id, name in removed.items():
+            self.unregister(gene_id, name)
+        if self.dead > len(self.entries):
+            self.compact()
+
+    def unregister(self, gene_id, name):
+        del self.entries[gene_id]
+        pair = (name.lower(), gene_id)
+        if pair in self.unsorted:
+            self.unsorted.discard(pair)  # Never made it into the sorted arrays
+        else:
+            self.unsorted_dead.add(pair)
+        self.dead += 1  # Trigram postings still hold the id until the next compaction
+
+    def merge_unsorted(self):
+        names, ids = self.sorted_names, self.sorted_ids
+        if len(self.unsorted_dead) > BULK_MERGE:
+            keep = [pair not in self.unsorted_dead for pair in zip(names, ids)]
+            names, ids = list(compress(names, keep)), list(compress(ids, keep))
+        else:
+            for name, gene_id in self.unsorted_dead:
+                position = bisect_left(names, name)
+                while ids[position] != gene_id:
+                    position += 1
+                del names[position]
+                del ids[position]
+        if len(self.unsorted) > BULK_MERGE:
+            # Two sorted runs, which sorted() merges in one pass
+            pairs = sorted(chain(zip(names, ids), sorted(self.unsorted)))
+            names, ids = [name for name, _ in pairs], [gene_id for _, gene_id in pairs]
+        else:
+            for name, gene_id in self.unsorted:
+                position = bisect_right(names, name)
+                names.insert(position, name)
+                ids.insert(position, gene_id)
+        self.sorted_names, self.sorted_ids = names, ids
+        self.unsorted, self.unsorted_dead = set(), set()
+
+    def compact(self):
+        for trigram, postings in list(self.postings.items()):
+            live = array("q", (gene_id for gene_id in postings if gene_id in self.entries))
+            if live:
+                self.postings[trigram] = live
+            else:
+                del self.postings[trigram]
+        self.dead = 0
+
+    def lookup(self, chromosome, region, gene):
+        return self.regions.get((chromosome, region), {}).get(gene)
+
+    def overlapping(self, chromosome, start, end):
+        # (start, end, id, region, gene_name) of every gene overlapping [start, end] on the chromosome, by start
+        intervals = self.intervals.get(chromosome)
+        if intervals is None:
+            return []
+        return [(gene_start, gene_end, gene_id, self.entries[gene_id][1][1], self.entries[gene_id][0])
+                for gene_start, gene_end, gene_id in intervals.overlapping(start, end)]
+
+    def hit(self, gene_id, score):
+        name, (chromosome, region) = self.entries[gene_id]
+        return score, gene_id, chromosome, region, name
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        # Ranked (score, id, chromosome, region, gene_name) hits: exact, then prefix (shorter first), then fuzzy
+        query = query.strip().lower()
+        if not query:
+            return []
+        if self.unsorted or self.unsorted_dead:
+            self.merge_unsorted()
+        hits = {}
+        start = bisect_left(self.sorted_names, query)
+        stop = bisect_left(self.sorted_names, query + "\uffff", start, min(len(self.sorted_names), start + limit * 4))
+        for position in range(start, stop):
+            name = self.sorted_names[position]
+            gene_id = self.sorted_ids[position]
+            hits[gene_id] = 2.0 if name == query else 1.0 + len(query) / len(name)
+        if len(hits) < limit and len(query) >= 3:
+            query_trigrams = trigrams(query)
+            votes = Counter()
+            budget = MAX_POSTINGS
+            for trigram in sorted(query_trigrams, key=lambda trigram: len(self.postings.get(trigram, ()))):
+                postings = self.postings.get(trigram)
+                if not postings:
+                    continue
+                if len(postings) > budget:
+                    break
+                votes.update(postings)
+                budget -= len(postings)
+            for gene_id, _ in votes.most_common(FUZZY_CANDIDATES):
+                if gene_id in hits or gene_id not in self.entries:
+                    continue
+                score = similarity(query_trigrams, self.entries[gene_id][0].lower())
+                if score >= MIN_SIMILARITY:
+                    hits[gene_id] = score
+        ranked = sorted(hits.items(), key=lambda item: (-item[1], self.entries[item[0]][0]))[:limit]
+        return [self.hit(gene_id, score) for gene_id, score in ranked]
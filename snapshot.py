@@ -0,0 +1,118 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from density import ChromosomeBins, DensityPyramid
+
+# Startup snapshot: the overview's chromosome list and density bins, saved on exit as one flat binary file that the
+# next launch maps and paints from before the database has answered. Little-endian, a 64 byte header and then
+# int64 columns only, so every column is copied straight out of the mapped pages without parsing:
+#   name offsets (n + 1), gene counts (n), first starts (n), last ends (n), bin offsets (n + 1),
+#   genes, methylation, radiation (dense level 0 bins of every chromosome back to back), UTF-8 names
+SNAPSHOT_ENV = "GENE_SNAPSHOT"  # Snapshot file path, or "off"; defaults to one file per database under ~/.cache
+SNAPSHOT_MAGIC = b"GENESNAP"
+SNAPSHOT_VERSION = 1  # Bump on any layout change; files of another version are ignored and overwritten on exit
+HEADER = struct.Struct("<8sII32sqQ")  # magic, version, chromosomes, database token, change counter, bins
+NO_POSITION = -1
+
+
+class Snapshot:
+    __slots__ = ("token", "counter", "summary", "pyramid")
+
+    def __init__(self, token, counter, summary, pyramid):
+        self.token = token  # gene_source.token of the database it was taken from
+        self.counter = counter  # Change counter the data is current with (GeneStore.change_state)
+        self.summary = summary  # GeneStore.chromosome_counts rows
+        self.pyramid = pyramid  # DensityPyramid
+
+
+def snapshot_path(backend):
+    path = os.environ.get(SNAPSHOT_ENV)
+    if path is not None:
+        return None if path in ("", "off") else path
+    location = backend.location()
+    if location is None:
+        return None
+    name = hashlib.sha1(location.encode()).hexdigest()[:16]
+    return os.path.join(os.path.expanduser("~"), ".cache", "gene_app", f"{name}.snapshot")
+
+
+def int64_column(mapped, offset, count):
+    column = array("q")
+    column.frombytes(mapped[offset:offset + 8 * count])
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def read_snapshot(path):
+    # Snapshot, or None when there is none or it is unusable (another version, truncated)
+    try:
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_snapshot(mapped)
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def parse_snapshot(mapped):
+    magic, version, count, token, counter, bin_count = HEADER.unpack_from(mapped, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    offset = HEADER.size
+    name_offsets = int64_column(mapped, offset, count + 1)
+    offset += 8 * (count + 1)
+    gene_counts, firsts, lasts = (int64_column(mapped, offset + 8 * count * number, count) for number in range(3))
+    offset += 8 * 3 * count
+    bin_offsets = int64_column(mapped, offset, count + 1)
+    offset += 8 * (count + 1)
+    genes, methylation, radiation = (int64_column(mapped, offset + 8 * bin_count * number, bin_count)
+                                     for number in range(3))
+    offset += 8 * 3 * bin_count
+    if len(mapped) != offset + name_offsets[-1] or bin_offsets[-1] != bin_count:
+        return None
+    names = mapped[offset:]
+    summary = []
+    pyramid = DensityPyramid()
+    for number in range(count):
+        name = names[name_offsets[number]:name_offsets[number + 1]].decode()
+        first, last = firsts[number], lasts[number]
+        positioned = first != NO_POSITION
+        summary.append((name, gene_counts[number], first if positioned else None, last if positioned else None))
+        start, end = bin_offsets[number], bin_offsets[number + 1]
+        if start < end:
+            pyramid.chromosomes[name] = ChromosomeBins(genes[start:end], methylation[start:end], radiation[start:end])
+    return Snapshot(token.rstrip(b"\0").decode(), counter, summary, pyramid)
+
+
+def write_snapshot(path, token, counter, summary, pyramid):
+    # Written next to the old file and swapped in, a crash never leaves a half-written snapshot behind
+    encoded = [name.encode() for name, *_ in summary]
+    name_offsets = array("q", [0])
+    bin_offsets = array("q", [0])
+    columns = [array("q") for _ in range(3)]  # gene counts, first starts, last ends
+    bins = [array("q") for _ in range(3)]  # genes, methylation, radiation
+    for (name, gene_count, first, last), name_bytes in zip(summary, encoded):
+        name_offsets.append(name_offsets[-1] + len(name_bytes))
+        positioned = first is not None and last is not None
+        for column, value in zip(columns, (gene_count, first if positioned else NO_POSITION,
+                                           last if positioned else NO_POSITION)):
+            column.append(value)
+        chromosome_bins = pyramid.chromosomes.get(name) if pyramid is not None else None
+        if chromosome_bins is not None:
+            for column, level_zero in zip(bins, chromosome_bins.levels[0]):
+                column.extend(level_zero)
+        bin_offsets.append(len(bins[0]))
+    parts = [name_offsets, *columns, bin_offsets, *bins]
+    if sys.byteorder != "little":
+        for part in parts:
+            part.byteswap()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(summary), token.encode(), counter, len(bins[0])))
+        for part in parts:
+            part.tofile(file)
+        file.write(b"".join(encoded))
+    os.replace(temporary, path)
@@ -0,0 +1,798 @@
+import csv
+import json
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from functools import cache
+from itertools import islice
+from time import perf_counter
+from database import DB_CONFIG
+from diagnostics import Diagnostics
+from gene_import import BATCH_SIZE, GENE_COLUMNS, copy_rows
+from migrations import migrate, migrate_sqlite
+
+# Storage layer GeneApp talks to: a backend hands out connections, a store wraps one connection for the length of
+# a transaction and owns every SQL statement. Pick the backend with GENE_STORE:
+#   postgresql (default, DB_CONFIG) | sqlite:<path> | memory
+STORE_ENV = "GENE_STORE"
+MAX_CONNECTIONS = 8  # PostgreSQL pool size; query workers, headless jobs and benchmarks share it
+SEARCH_BATCH = 20000  # Rows per round trip when streaming every gene name into the search index
+SHAPE_LENGTH = 80  # Ad-hoc statements are reported under their first characters (values inlined past that)
+WATERMARK_POLL = 0.05  # Seconds between checks while an export waits for transactions still writing genes
+WATERMARK_TIMEOUT = 30  # Seconds an export waits for them before it gives up, naming their server processes
+
+# The overview's filter rule (GeneModel.is_active_flags) as a predicate, parameters (radiation filter, methylation filter)
+FILTER_ACTIVE = "NOT ((%s AND COALESCE(methylation_prone, FALSE)) OR (%s AND COALESCE(radiation_prone, FALSE)))"
+# Gene export (gene_export.py): named genes in a range of insertion stamps (migration 10) that the filters keep,
+# in insertion order
+EXPORT_COLUMNS = ("id", "chromosome", "region", "gene_name", "gene_text", "methylation_prone", "radiation_prone",
+                  "start_position", "end_position")
+EXPORT_ROWS = ("SELECT {columns} FROM genes WHERE added > %s AND added <= %s AND region IS NOT NULL "
+               f"AND gene_name IS NOT NULL AND {FILTER_ACTIVE} ORDER BY added")
+BULK_JOURNAL_KEEP = 50  # Bulk actions whose undo journal is kept
+
+# Named genes a bulk action is about to change, copied into its journal (the text only when they are deleted)
+BULK_JOURNAL = ("INSERT INTO bulk_journal (action_id, gene_id, chromosome, region, gene_name, gene_text, "
+                "methylation_prone, radiation_prone, start_position, end_position, text_length) "
+                "SELECT %s, id, chromosome, region, gene_name, CASE WHEN %s THEN gene_text END, methylation_prone, "
+                "radiation_prone, start_position, end_position, length(gene_text) FROM genes "
+                "WHERE region IS NOT NULL AND gene_name IS NOT NULL")
+BULK_JOURNALED = "id IN (SELECT gene_id FROM bulk_journal WHERE action_id = %s)"
+
+# Fixed query shapes, shared by both backends and written once with %s placeholders and PostgreSQL's "C" collation.
+# PostgreSQL prepares them server-side per connection, SQLite rewrites them for its own dialect
+QUERIES = {
+    "chromosome_counts":
+        "SELECT chromosome, COUNT(gene_name), MIN(start_position), MAX(end_position) FROM genes "
+        "WHERE chromosome IS NOT NULL GROUP BY chromosome ORDER BY MIN(id)",
+    "chromosome_summary":
+        "SELECT chromosome, COUNT(gene_name), MIN(start_position), MAX(end_position) FROM genes "
+        "WHERE chromosome = %s GROUP BY chromosome",
+    # Change counter (migration 7): which database this is and how far its changes have counted
+    "change_state":
+        "SELECT token, (SELECT COALESCE(MAX(version), 0) FROM chromosome_versions) FROM gene_source",
+    "changed_chromosomes":
+        "SELECT chromosome FROM chromosome_versions WHERE version > %s ORDER BY version",
+    # Current state of changed rows named by the change feed (missing ids were deleted)
+    "genes_by_id":
+        "SELECT id, chromosome, region, gene_name, methylation_prone, radiation_prone, start_position, end_position "
+        "FROM genes WHERE id = ANY(%s)",
+    # genes_by_id rows of one chromosome, for refreshing it wholesale (cleared regions / genes included)
+    "chromosome_genes":
+        "SELECT id, chromosome, region, gene_name, methylation_prone, radiation_prone, start_position, end_position "
+        "FROM genes WHERE chromosome = %s",
+    "gene_page":
+        'SELECT id, region, gene_name, methylation_prone, radiation_prone, start_position, end_position FROM genes '
+        'WHERE chromosome = %s AND (region COLLATE "C", id) > (%s, %s) ORDER BY region COLLATE "C", id LIMIT %s',
+    "gene_details":
+        "SELECT gene_text, methylation_prone, radiation_prone FROM genes "
+        "WHERE chromosome = %s AND region = %s AND gene_name = %s",
+    "gene_flags":
+        "SELECT methylation_prone, radiation_prone FROM genes WHERE chromosome = %s AND region = %s AND gene_name = %s",
+    # Up to limit genes on either side (by id) of an opened one, walked on the keyset index
+    "neighbour_details":
+        'WITH opened AS (SELECT id FROM genes WHERE chromosome = %s AND region = %s AND gene_name = %s) '
+        'SELECT * FROM (SELECT gene_name, gene_text, methylation_prone, radiation_prone FROM genes '
+        'WHERE chromosome = %s AND region COLLATE "C" = %s AND gene_name IS NOT NULL AND id < (SELECT id FROM opened) '
+        'ORDER BY id DESC LIMIT %s) AS earlier '
+        'UNION ALL '
+        'SELECT * FROM (SELECT gene_name, gene_text, methylation_prone, radiation_prone FROM genes '
+        'WHERE chromosome = %s AND region COLLATE "C" = %s AND gene_name IS NOT NULL AND id > (SELECT id FROM opened) '
+        'ORDER BY id LIMIT %s) AS later',
+    # Named genes overlapping the closed window [start, end], through the range index
+    "genes_overlapping":
+        "SELECT id, region, gene_name, start_position, end_position, methylation_prone, radiation_prone FROM genes "
+        "WHERE chromosome = %s AND start_position IS NOT NULL AND gene_name IS NOT NULL "
+        "AND int8range(start_position, end_position, '[]') && int8range(%s, %s, '[]') ORDER BY start_position, id",
+    # Trigger-maintained density bins (migration 6), for the zoomable genome view
+    "gene_bins":
+        "SELECT chromosome, bin, genes, methylation, radiation FROM gene_bins WHERE genes > 0 ORDER BY chromosome, bin",
+    "chromosome_bins":
+        "SELECT bin, genes, methylation, radiation FROM gene_bins WHERE chromosome = %s AND genes > 0 ORDER BY bin",
+    "insert_gene":
+        "INSERT INTO genes (chromosome, region, gene_name, start_position, end_position) VALUES (%s, %s, %s, %s, %s) "
+        "RETURNING id",
+    "delete_chromosome":
+        "DELETE FROM genes WHERE chromosome = %s",
+    # Deleted regions / genes keep their rows with NULL names, so chromosome and region headings stay
+    "clear_region":
+        "UPDATE genes SET region = NULL, gene_name = NULL, methylation_prone = FALSE, radiation_prone = FALSE, "
+        "gene_text = '', start_position = NULL, end_position = NULL WHERE chromosome = %s AND region = %s",
+    "clear_gene":
+        "UPDATE genes SET gene_name = NULL, methylation_prone = FALSE, radiation_prone = FALSE, gene_text = '', "
+        "start_position = NULL, end_position = NULL WHERE chromosome = %s AND region = %s AND gene_name = %s",
+    "count_genes":
+        "SELECT COUNT(gene_name) FROM genes WHERE chromosome = %s",
+    # Insertion stamp (migration 10) handed out last; every stamp up to it is taken, though not necessarily committed
+    "export_watermark":
+        "SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM gene_added_seq",
+    # Other transactions that are inserting, updating or deleting genes right now
+    "genes_writers":
+        "SELECT DISTINCT virtualtransaction, pid FROM pg_locks WHERE locktype = 'relation' "
+        "AND relation = 'genes'::regclass AND mode = 'RowExclusiveLock' AND pid <> pg_backend_pid()",
+    # Waits on the server, so QueryExecutor's cancel() interrupts it like any other statement
+    "watermark_sleep":
+        "SELECT pg_sleep(%s)",
+    # Set-based bulk edits (migration 9): the selection is journaled first, then one statement acts on the journal
+    "bulk_action":
+        "INSERT INTO bulk_actions (action, value) VALUES (%s, %s) RETURNING id",
+    "bulk_action_kind":
+        "SELECT action, value FROM bulk_actions WHERE id = %s",
+    "journal_ids":
+        f"{BULK_JOURNAL} AND id = ANY(%s)",
+    "journal_region":
+        f"{BULK_JOURNAL} AND chromosome = %s AND region = %s",
+    # Genes the radio-button filters keep, within one chromosome or (NULL) all of them
+    "journal_filter":
+        f"{BULK_JOURNAL} AND chromosome = COALESCE(%s, chromosome) AND {FILTER_ACTIVE}",
+    "bulk_methylation":
+        f"UPDATE genes SET methylation_prone = %s WHERE {BULK_JOURNALED}",
+    "bulk_radiation":
+        f"UPDATE genes SET radiation_prone = %s WHERE {BULK_JOURNALED}",
+    "bulk_append":
+        f"UPDATE genes SET gene_text = COALESCE(gene_text, '') || %s WHERE {BULK_JOURNALED}",
+    "bulk_delete":
+        f"DELETE FROM genes WHERE {BULK_JOURNALED}",
+    "bulk_ids":
+        "SELECT gene_id FROM bulk_journal WHERE action_id = %s",
+    # genes_by_id rows of an action's genes as they are now (deleted ones have none)
+    "bulk_rows":
+        "SELECT g.id, g.chromosome, g.region, g.gene_name, g.methylation_prone, g.radiation_prone, g.start_position, "
+        "g.end_position FROM bulk_journal j JOIN genes g ON g.id = j.gene_id WHERE j.action_id = %s",
+    "bulk_chromosomes":
+        "SELECT DISTINCT chromosome FROM bulk_journal WHERE action_id = %s",
+    "undo_methylation":
+        "UPDATE genes SET methylation_prone = j.methylation_prone FROM bulk_journal j "
+        "WHERE j.action_id = %s AND genes.id = j.gene_id",
+    "undo_radiation":
+        "UPDATE genes SET radiation_prone = j.radiation_prone FROM bulk_journal j "
+        "WHERE j.action_id = %s AND genes.id = j.gene_id",
+    # Texts edited since the append (no longer the old text plus the appended one) are left alone
+    "undo_append":
+        "UPDATE genes SET gene_text = CASE WHEN j.text_length IS NULL THEN NULL "
+        "ELSE substr(genes.gene_text, 1, j.text_length) END FROM bulk_journal j "
+        "WHERE j.action_id = %s AND genes.id = j.gene_id "
+        "AND genes.gene_text = COALESCE(substr(genes.gene_text, 1, j.text_length), '') || %s",
+    # Deleted rows come back under their old ids, unless the same gene was added again in the meantime
+    "undo_delete":
+        "INSERT INTO genes (id, chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone, "
+        "start_position, end_position) SELECT gene_id, chromosome, region, gene_name, gene_text, methylation_prone, "
+        "radiation_prone, start_position, end_position FROM bulk_journal WHERE action_id = %s ON CONFLICT DO NOTHING",
+    # Journals of actions older than the newest BULK_JOURNAL_KEEP are dropped, and so is an undone action's
+    "forget_bulk_journal":
+        "DELETE FROM bulk_journal WHERE action_id <= %s",
+    "forget_bulk_actions":
+        "DELETE FROM bulk_actions WHERE id <= %s",
+    "forget_bulk_action":
+        "DELETE FROM bulk_actions WHERE id = %s",
+    "forget_bulk_action_journal":
+        "DELETE FROM bulk_journal WHERE action_id = %s",
+}
+
+SEARCH_ROWS = ("SELECT id, chromosome, region, gene_name, start_position, end_position FROM genes "
+               "WHERE chromosome IS NOT NULL AND region IS NOT NULL AND gene_name IS NOT NULL")
+
+UPSERT_GENES = """INSERT INTO genes (chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone)
+                  VALUES %s
+                  ON CONFLICT (chromosome, region, gene_name) DO UPDATE
+                  SET gene_text = EXCLUDED.gene_text,
+                      methylation_prone = EXCLUDED.methylation_prone,
+                      radiation_prone = EXCLUDED.radiation_prone
+                  RETURNING chromosome, region, gene_name, id, xmax = 0"""
+
+
+def statement_shape(statement):
+    if isinstance(statement, bytes):
+        statement = statement[:SHAPE_LENGTH * 4].decode(errors="replace")
+    shape = " ".join(statement.split())
+    if shape.startswith("EXECUTE "):
+        return shape.split()[1]
+    return shape.split(" VALUES ")[0][:SHAPE_LENGTH]
+
+
+class TimedCursor:
+    # Wraps a DB-API cursor so every execution and the fetches after it are recorded per statement shape.
+    # Everything else (rowcount, mogrify, connection, ...) goes straight to the wrapped cursor
+    def __init__(self, cursor, diagnostics):
+        self.cursor = cursor
+        self.diagnostics = diagnostics
+        self.shape = None
+        self.elapsed = 0.0  # Cost of the last execution, fetches included
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def timed(self, shape, call, *args):
+        self.shape = shape
+        started = perf_counter()
+        result = call(*args)
+        # DML reports its affected rows here, result sets count rows as they are fetched
+        rows = self.cursor.rowcount if self.cursor.description is None and self.cursor.rowcount > 0 else 0
+        self.elapsed = perf_counter() - started
+        self.diagnostics.query(shape, self.elapsed, rows)
+        return result
+
+    def execute(self, statement, params=None, shape=None):
+        shape = shape or statement_shape(statement)
+        if params is None:
+            return self.timed(shape, self.cursor.execute, statement)
+        return self.timed(shape, self.cursor.execute, statement, params)
+
+    def executemany(self, statement, params, shape=None):
+        return self.timed(shape or statement_shape(statement), self.cursor.executemany, statement, params)
+
+    def copy_expert(self, statement, source, *args):
+        return self.timed(statement_shape(statement), self.cursor.copy_expert, statement, source, *args)
+
+    def fetched(self, started, rows):
+        seconds = perf_counter() - started
+        self.elapsed += seconds
+        self.diagnostics.fetched(self.shape, seconds, rows, self.elapsed)
+
+    def fetchone(self):
+        started = perf_counter()
+        row = self.cursor.fetchone()
+        self.fetched(started, row is not None)
+        return row
+
+    def fetchmany(self, size):
+        started = perf_counter()
+        rows = self.cursor.fetchmany(size)
+        self.fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = perf_counter()
+        rows = self.cursor.fetchall()
+        self.fetched(started, len(rows))
+        return rows
+
+
+class GeneStore(ABC):
+    # Every operation the app performs, on one connection inside the caller's transaction. The dialect-specific
+    # ones are abstract, a backend's store that misses one fails when it is created
+    def __init__(self, connection, diagnostics):
+        self.connection = connection
+        self.diagnostics = diagnostics
+        self.cursor = TimedCursor(connection.cursor(), diagnostics)
+
+    @abstractmethod
+    def execute(self, name, params=()):
+        pass
+
+    @abstractmethod
+    def streaming_cursor(self, name):
+        # Cursor for result sets too large to fetch at once, named after its caller
+        pass
+
+    def fetchone(self, name, params=()):
+        self.execute(name, params)
+        return self.cursor.fetchone()
+
+    def fetchall(self, name, params=()):
+        self.execute(name, params)
+        return self.cursor.fetchall()
+
+    def chromosome_counts(self):
+        # (chromosome, named genes, first start, last end) with the coordinates None for unplaced chromosomes
+        return self.fetchall("chromosome_counts")
+
+    def chromosome_summary(self, chromosome):
+        # The chromosome_counts row of one chromosome, None once it has no rows left
+        return self.fetchone("chromosome_summary", (chromosome,))
+
+    def change_state(self):
+        # (database token, change counter); every chromosome changed after this has a version above the counter
+        return self.fetchone("change_state")
+
+    def changed_chromosomes(self, counter):
+        return [row[0] for row in self.fetchall("changed_chromosomes", (counter,))]
+
+    def id_list(self, ids):
+        # Parameter value standing for a list of gene ids (an array)
+        return list(ids)
+
+    def genes_by_id(self, ids):
+        # (id, chromosome, region, gene_name, methylation_prone, radiation_prone, start, end) of the ids still present
+        return self.fetchall("genes_by_id", (self.id_list(ids),)) if ids else []
+
+    def chromosome_genes(self, chromosome):
+        return self.fetchall("chromosome_genes", (chromosome,))
+
+    def gene_page(self, chromosome, after, limit):
+        # One keyset page of (id, region, gene_name, methylation_prone, radiation_prone, start, end) past (region, id)
+        return self.fetchall("gene_page", (chromosome, after[0], after[1], limit))
+
+    def gene_details(self, chromosome, region, gene):
+        return self.fetchone("gene_details", (chromosome, region, gene))
+
+    def gene_flags(self, chromosome, region, gene):
+        return self.fetchone("gene_flags", (chromosome, region, gene))
+
+    def neighbour_details(self, chromosome, region, gene, limit):
+        return self.fetchall("neighbour_details",
+                             (chromosome, region, gene, chromosome, region, limit, chromosome, region, limit))
+
+    def genes_overlapping(self, chromosome, start, end):
+        # (id, region, gene_name, start, end, methylation_prone, radiation_prone) of every gene overlapping
+        # [start, end], by start
+        return self.fetchall("genes_overlapping", (chromosome, start, end))
+
+    def gene_bins(self):
+        # (chromosome, bin, genes, methylation prone, radiation prone) for every non-empty bin
+        return self.fetchall("gene_bins")
+
+    def chromosome_bins(self, chromosome):
+        return self.fetchall("chromosome_bins", (chromosome,))
+
+    def insert_gene(self, chromosome, region, gene, start=None, end=None):
+        return self.fetchone("insert_gene", (chromosome, region, gene, start, end))[0]
+
+    def delete_chromosome(self, chromosome):
+        self.execute("delete_chromosome", (chromosome,))
+
+    def clear_region(self, chromosome, region):
+        self.execute("clear_region", (chromosome, region))
+
+    def clear_gene(self, chromosome, region, gene):
+        self.execute("clear_gene", (chromosome, region, gene))
+
+    def count_genes(self, chromosome):
+        return self.fetchone("count_genes", (chromosome,))[0]
+
+    def export_watermark(self):
+        # Insertion stamp up to which every row is committed and visible to this transaction's later statements
+        return self.fetchone("export_watermark")[0]
+
+    def export_rows(self, after, upto, radiation_filter, methylation_filter, batch_size=SEARCH_BATCH):
+        # Batches of EXPORT_COLUMNS rows stamped after < added <= upto, streamed so memory stays flat for any table size
+        cursor = TimedCursor(self.streaming_cursor("export_rows"), self.diagnostics)
+        try:
+            cursor.execute(self.dialect(EXPORT_ROWS.format(columns=", ".join(EXPORT_COLUMNS))),
+                           (after, upto, radiation_filter, methylation_filter), shape="export_rows")
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield batch
+        finally:
+            cursor.close()
+
+    def export_csv(self, file, after, upto, radiation_filter, methylation_filter, header=True, progress=None):
+        # export_rows written to a text file as CSV, booleans as true / false and NULL as an empty field
+        writer = csv.writer(file)
+        if header:
+            writer.writerow(EXPORT_COLUMNS)
+        written = 0
+        for batch in self.export_rows(after, upto, radiation_filter, methylation_filter):
+            writer.writerows([value if not isinstance(value, bool) else ("true" if value else "false")
+                              for value in row] for row in batch)
+            written += len(batch)
+            if progress is not None:
+                progress(written)
+        return written
+
+    def dialect(self, statement):
+        # Ad-hoc statements (the fixed QUERIES are translated up front) in this backend's dialect
+        return statement
+
+    def bulk_edit(self, selection, action, value=None):
+        # One set-based action over a selection of named genes, journaled so undo_bulk_edit can revert it.
+        #   selection: ("ids", gene ids) | ("region", chromosome, region) |
+        #              ("filter", chromosome or None for all, radiation filter, methylation filter)
+        #   action: "methylation" / "radiation" (value the flag), "append" (value the text) or "delete"
+        # Returns (action id, bulk_changes of the action)
+        action_id = self.fetchone("bulk_action", (action, None if value is None else str(value)))[0]
+        kind, *params = selection
+        if kind == "ids":
+            params = [self.id_list(params[0])]
+        self.execute(f"journal_{kind}", (action_id, action == "delete", *params))
+        if action == "delete":
+            self.execute("bulk_delete", (action_id,))
+        else:
+            self.execute(f"bulk_{action}", (value, action_id))
+        self.execute("forget_bulk_journal", (action_id - BULK_JOURNAL_KEEP,))
+        self.execute("forget_bulk_actions", (action_id - BULK_JOURNAL_KEEP,))
+        return action_id, self.bulk_changes(action_id)
+
+    def undo_bulk_edit(self, action_id):
+        # Reverts one bulk_edit and drops its journal; returns its bulk_changes after the undo, empty once the
+        # journal is gone
+        kind = self.fetchone("bulk_action_kind", (action_id,))
+        if kind is None:
+            return [], [], []
+        action, value = kind
+        if action == "append":
+            self.execute("undo_append", (action_id, value))
+        else:
+            self.execute(f"undo_{action}", (action_id,))
+        changes = self.bulk_changes(action_id)
+        self.execute("forget_bulk_action_journal", (action_id,))
+        self.execute("forget_bulk_action", (action_id,))
+        return changes
+
+    def bulk_changes(self, action_id):
+        # (journaled gene ids, bulk_rows of the ones still present, chromosomes they are on) of one bulk action
+        return ([row[0] for row in self.fetchall("bulk_ids", (action_id,))], self.fetchall("bulk_rows", (action_id,)),
+                [row[0] for row in self.fetchall("bulk_chromosomes", (action_id,))])
+
+    def search_rows(self):
+        # (id, chromosome, region, gene_name, start, end) for every named gene, SEARCH_BATCH rows per round trip
+        cursor = TimedCursor(self.streaming_cursor("search_rows"), self.diagnostics)
+        try:
+            cursor.execute(SEARCH_ROWS, shape="search_rows")
+            while True:
+                batch = cursor.fetchmany(SEARCH_BATCH)
+                if not batch:
+                    return
+                yield from batch
+        finally:
+            cursor.close()
+
+    @abstractmethod
+    def upsert_genes(self, rows):
+        # (chromosome, region, gene, text, methylation, radiation) rows -> {(chromosome, region, gene): (id, inserted)}
+        pass
+
+    @abstractmethod
+    def import_rows(self, rows, batch_size=BATCH_SIZE, progress=None):
+        # Rows in GENE_COLUMNS order; genes that already exist are skipped. Returns the number inserted
+        pass
+
+    @abstractmethod
+    def migrate(self, target=None):
+        pass
+
+
+@cache
+def prepared_connection():
+    # psycopg2 is imported with the first PostgreSQL connection (on a worker), not when the app starts
+    from psycopg2.extensions import connection
+
+    class PreparedConnection(connection):
+        # Remembers which statements are prepared in its server session (they survive rollbacks)
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared = set()
+
+    return PreparedConnection
+
+
+def numbered_placeholders(statement):
+    counter = iter(range(1, statement.count("%s") + 1))
+    return re.sub("%s", lambda _: f"${next(counter)}", statement)
+
+
+class PostgresStore(GeneStore):
+    def execute(self, name, params=()):
+        if name not in self.connection.prepared:
+            # Parsed and planned once per pooled connection, every later call only sends the parameters
+            self.cursor.execute(f"PREPARE {name} AS {numbered_placeholders(QUERIES[name])}", shape=f"PREPARE {name}")
+            self.connection.prepared.add(name)
+        if params:
+            self.cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params, shape=name)
+        else:
+            self.cursor.execute(f"EXECUTE {name}", shape=name)
+
+    def streaming_cursor(self, name):
+        # Server-side cursor, only the fetched batch is ever held on the client
+        return self.connection.cursor(name=name)
+
+    def export_watermark(self):
+        # Stamps come from a sequence when a row is inserted but only show once its transaction commits, so MAX(added)
+        # could step past a lower stamp that a slower transaction commits later. Take the sequence's position instead
+        # and wait out every transaction writing genes at that moment (they took their lock before any stamp): each
+        # stamp up to it is then committed or rolled back, and READ COMMITTED shows the committed ones from here on.
+        # A writer left idle in its transaction would hold the export forever, so it gives up after WATERMARK_TIMEOUT
+        upto = self.fetchone("export_watermark")[0]
+        writers = dict(self.fetchall("genes_writers"))  # virtualtransaction -> pid
+        deadline = perf_counter() + WATERMARK_TIMEOUT
+        while writers:
+            if perf_counter() >= deadline:
+                pids = ", ".join(str(pid) for pid in sorted(set(writers.values())))
+                raise TimeoutError(f"Export gave up after {WATERMARK_TIMEOUT} s waiting for transactions still writing "
+                                   f"genes (server process {pids}); commit or end them and export again")
+            self.execute("watermark_sleep", (WATERMARK_POLL,))
+            still = dict(self.fetchall("genes_writers"))
+            writers = {transaction: still[transaction] for transaction in writers if transaction in still}
+        return upto
+
+    def export_csv(self, file, after, upto, radiation_filter, methylation_filter, header=True, progress=None):
+        # COPY TO STDOUT: the server formats the CSV and psycopg2 streams it straight into the file
+        columns = ", ".join(f"{column}::text" if column.endswith("_prone") else column for column in EXPORT_COLUMNS)
+        query = self.cursor.mogrify(EXPORT_ROWS.format(columns=columns),
+                                    (after, upto, radiation_filter, methylation_filter)).decode()
+        self.cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER {'true' if header else 'false'})",
+                                file)
+        written = max(self.cursor.rowcount, 0)
+        if progress is not None:
+            progress(written)
+        return written
+
+    def upsert_genes(self, rows):
+        # One statement (and round trip) for any number of rows; xmax = 0 only for freshly inserted rows
+        from psycopg2.extras import execute_values
+        returned = execute_values(self.cursor, UPSERT_GENES, rows, page_size=max(len(rows), 1), fetch=True)
+        return {(chromosome, region, gene): (gene_id, inserted)
+                for chromosome, region, gene, gene_id, inserted in returned}
+
+    def import_rows(self, rows, batch_size=BATCH_SIZE, progress=None):
+        return copy_rows(self.cursor, rows, batch_size, progress)
+
+    def migrate(self, target=None):
+        return migrate(self.cursor, target)
+
+
+class Backend(ABC):
+    # Connection pool shared by both backends: connections are opened on demand, up to max_connections at once,
+    # and kept idle between requests (pooled PostgreSQL sessions keep their prepared statements)
+    notifications = False  # Other clients' changes can be LISTENed to, through open_listener (change_feed.py)
+    # Write transactions hold the database's only write lock from their first statement, so the change counter read
+    # at their start and end brackets exactly their own changes (QueryExecutor.ownChanges)
+    serial_writes = False
+
+    def __init__(self, max_connections=MAX_CONNECTIONS):
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.lock = threading.Lock()
+        self.idle = []
+        self.connections = []
+        self.diagnostics = Diagnostics()  # Every statement run through this backend's stores is timed here
+
+    @abstractmethod
+    def connect(self):
+        pass
+
+    @abstractmethod
+    def store(self, connection, write=False):
+        # The GeneStore for a connection; write for the QueryExecutor's write worker
+        pass
+
+    @abstractmethod
+    def rollback(self, connection):
+        pass
+
+    @abstractmethod
+    def cancel(self, connection):
+        # Interrupts the statement running on connection, from another thread
+        pass
+
+    @abstractmethod
+    def is_cancellation(self, error):
+        # Whether error is how a statement interrupted by cancel() fails
+        pass
+
+    def acquire(self):
+        self.slots.acquire()  # Waits while max_connections are in use
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        try:
+            connection = self.connect()
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.connections.append(connection)
+        return connection
+
+    def release(self, connection):
+        with self.lock:
+            if connection in self.connections and not self.is_closed(connection):
+                self.idle.append(connection)
+            elif connection in self.connections:
+                self.connections.remove(connection)  # Broken, the next acquire opens a fresh one
+        self.slots.release()
+
+    def is_closed(self, connection):
+        return False
+
+    def location(self):
+        # Names the database for files kept next to it (the startup snapshot), None when it dies with the process
+        return None
+
+    def owns(self, pid):
+        # Whether a notifying server process is one of this backend's own connections
+        return False
+
+    def transaction(self, job):
+        # job(store) in one transaction on a pooled connection, for headless commands and scripts
+        connection = self.acquire()
+        try:
+            result = job(self.store(connection))
+            connection.commit()
+            return result
+        except BaseException:
+            self.rollback(connection)
+            raise
+        finally:
+            self.release(connection)
+
+    def close(self):
+        with self.lock:
+            for connection in self.connections:
+                connection.close()
+            self.connections = []
+            self.idle = []
+
+
+class PostgresBackend(Backend):
+    name = "postgresql"
+    notifications = True
+
+    def __init__(self, config=None, max_connections=MAX_CONNECTIONS):
+        # Nothing connects until the first request, so a missing server surfaces as that request's error
+        super().__init__(max_connections)
+        self.config = dict(config or DB_CONFIG)
+
+    def location(self):
+        # PGOPTIONS can point the same server at another schema (the benchmark one, say)
+        config = self.config
+        options = os.environ.get("PGOPTIONS")
+        return (f"postgresql://{config.get('user')}@{config.get('host')}:{config.get('port')}/{config.get('database')}"
+                + (f"?{options}" if options else ""))
+
+    def connect(self):
+        import psycopg2
+        return psycopg2.connect(connection_factory=prepared_connection(), **self.config)
+
+    def open_listener(self, channel):
+        # Outside the pool: it sits in LISTEN for the life of the app, in autocommit so notifications are never held
+        import psycopg2
+        connection = psycopg2.connect(**self.config)
+        connection.autocommit = True
+        connection.cursor().execute(f"LISTEN {channel}")
+        return connection
+
+    def owns(self, pid):
+        # The app already applied its own writes; their notifications come from one of the pooled connections
+        with self.lock:
+            return any(not connection.closed and connection.get_backend_pid() == pid for connection in self.connections)
+
+    def is_closed(self, connection):
+        return bool(connection.closed)
+
+    def store(self, connection, write=False):
+        return PostgresStore(connection, self.diagnostics)
+
+    def rollback(self, connection):
+        if not connection.closed:
+            connection.rollback()
+
+    def cancel(self, connection):
+        connection.cancel()  # Stops the running statement on the server
+
+    def is_cancellation(self, error):
+        from psycopg2.extensions import QueryCanceledError
+        return isinstance(error, QueryCanceledError)
+
+
+# SQLite stores booleans as 0 / 1; BOOLEAN columns come back as bool like they do from PostgreSQL
+sqlite3.register_converter("BOOLEAN", lambda value: value not in (b"0", b""))
+
+
+def sqlite_dialect(statement):
+    # BINARY is SQLite's byte-wise default collation, the same order as PostgreSQL's "C"
+    return statement.replace('COLLATE "C"', "COLLATE BINARY").replace("%s", "?")
+
+
+SQLITE_QUERIES = {name: sqlite_dialect(statement) for name, statement in QUERIES.items()}
+# No range types: the same window as two comparisons, the (chromosome, start_position) index bounds the scan
+SQLITE_QUERIES["genes_overlapping"] = (
+    "SELECT id, region, gene_name, start_position, end_position, methylation_prone, radiation_prone FROM genes "
+    "WHERE chromosome = ? AND start_position IS NOT NULL AND gene_name IS NOT NULL "
+    "AND end_position >= ? AND start_position <= ? ORDER BY start_position, id")
+# No arrays: the ids arrive as one JSON list
+SQLITE_QUERIES["genes_by_id"] = (
+    "SELECT id, chromosome, region, gene_name, methylation_prone, radiation_prone, start_position, end_position "
+    "FROM genes WHERE id IN (SELECT value FROM json_each(?))")
+# Writers are serialized and a transaction reads from one snapshot: the highest stamp it sees has nothing pending below
+SQLITE_QUERIES["export_watermark"] = "SELECT COALESCE(MAX(added), 0) FROM genes"
+SQLITE_QUERIES["journal_ids"] = sqlite_dialect(f"{BULK_JOURNAL} AND id IN (SELECT value FROM json_each(%s))")
+
+
+class SQLiteStore(GeneStore):
+    def execute(self, name, params=()):
+        self.cursor.execute(SQLITE_QUERIES[name], params, shape=name)
+
+    def id_list(self, ids):
+        return json.dumps(list(ids))
+
+    def streaming_cursor(self, name):
+        return self.connection.cursor()
+
+    def dialect(self, statement):
+        return sqlite_dialect(statement)
+
+    def upsert_genes(self, rows):
+        # SQLite has no xmax, so look each gene up first; writers are serialized, nothing can slip in between
+        returned = {}
+        for chromosome, region, gene, text, methylation_prone, radiation_prone in rows:
+            self.cursor.execute("SELECT id FROM genes WHERE chromosome = ? AND region = ? AND gene_name = ?",
+                                (chromosome, region, gene))
+            existing = self.cursor.fetchone()
+            if existing is None:
+                self.cursor.execute(
+                    "INSERT INTO genes (chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (chromosome, region, gene, text, methylation_prone, radiation_prone))
+                returned[(chromosome, region, gene)] = (self.cursor.lastrowid, True)
+            else:
+                self.cursor.execute(
+                    "UPDATE genes SET gene_text = ?, methylation_prone = ?, radiation_prone = ? WHERE id = ?",
+                    (text, methylation_prone, radiation_prone, existing[0]))
+                returned[(chromosome, region, gene)] = (existing[0], False)
+        return returned
+
+    def import_rows(self, rows, batch_size=BATCH_SIZE, progress=None):
+        # Each row takes the next insertion stamp itself (migration 10) instead of having the trigger update it
+        columns = ", ".join(GENE_COLUMNS)
+        statement = (f"INSERT OR IGNORE INTO genes ({columns}, added) VALUES ({', '.join('?' * len(GENE_COLUMNS))}, "
+                     f"(SELECT COALESCE(MAX(added), 0) + 1 FROM genes))")
+        rows = iter(rows)
+        read = 0
+        inserted = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            self.cursor.executemany(statement, batch, shape="import_rows")
+            # Rows this statement inserted; total_changes would also count the gene_bins / chromosome_versions
+            # trigger writes, ignored duplicates count zero
+            inserted += self.cursor.rowcount
+            read += len(batch)
+            if progress is not None:
+                progress(read)
+        return inserted
+
+    def migrate(self, target=None):
+        return migrate_sqlite(self.cursor, target)
+
+
+class SQLiteBackend(Backend):
+    # Embedded backend with the same schema versions and query semantics, for running without a server.
+    # A file database gets one connection per concurrent worker (WAL: readers never wait for the writer);
+    # ":memory:" is a single connection that workers take turns on
+    name = "sqlite"
+    serial_writes = True
+
+    def __init__(self, path=":memory:", max_connections=MAX_CONNECTIONS):
+        super().__init__(1 if path == ":memory:" else max_connections)
+        self.path = path
+
+    def location(self):
+        return None if self.path == ":memory:" else f"sqlite:{os.path.abspath(self.path)}"
+
+    def connect(self):
+        # Autocommit mode plus an explicit BEGIN per store: one transaction per job, DDL included, like PostgreSQL
+        connection = sqlite3.connect(self.path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     isolation_level=None, check_same_thread=False)
+        if self.path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def store(self, connection, write=False):
+        # Writes take the write lock up front; a deferred one that read first could not upgrade past a newer commit
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        return SQLiteStore(connection, self.diagnostics)
+
+    def rollback(self, connection):
+        if connection.in_transaction:
+            connection.rollback()
+
+    def cancel(self, connection):
+        connection.interrupt()
+
+    def is_cancellation(self, error):
+        return isinstance(error, sqlite3.OperationalError) and str(error) == "interrupted"
+
+
+def open_backend(url=None):
+    url = url or os.environ.get(STORE_ENV, "postgresql")
+    if url == "postgresql":
+        return PostgresBackend()
+    if url == "memory":
+        return SQLiteBackend(":memory:")
+    if url.startswith("sqlite:"):
+        return SQLiteBackend(url[len("sqlite:"):] or ":memory:")
+    raise ValueError(f"Unknown {STORE_ENV} backend {url!r}, use postgresql, sqlite:<path> or memory")
@@ -0,0 +1,28 @@
+import pytest
+from benchmarks.synthetic import stand_in_backend
+from database import open_connection
+
+TEST_SCHEMA = "gene_tests"  # Throwaway schema the PostgreSQL runs use, dropped after every test
+
+
+def postgres_available():
+    try:
+        open_connection().close()
+        return True
+    except Exception:
+        return False
+
+
+@pytest.fixture(params=["memory", "postgresql"])
+def backend(request):
+    # Every test runs on the embedded backend, and on PostgreSQL too when the configured server is up
+    if request.param == "postgresql" and not postgres_available():
+        pytest.skip("no PostgreSQL server at database.DB_CONFIG")
+    with stand_in_backend(request.param, TEST_SCHEMA) as backend:
+        yield backend
+
+
+def execute(store, statement, params=()):
+    # Ad-hoc SQL written with %s placeholders, on either backend
+    store.cursor.execute(store.dialect(statement), params)
+    return store.cursor
@@ -0,0 +1,41 @@
+from tests.conftest import execute
+from tests.test_import import gene_row
+
+
+def genes(store):
+    return execute(store, "SELECT id, chromosome, region, gene_name, gene_text, methylation_prone, radiation_prone "
+                          "FROM genes ORDER BY id").fetchall()
+
+
+def load(backend):
+    backend.transaction(lambda store: store.migrate())
+    backend.transaction(lambda store: store.import_rows([gene_row(number) for number in range(9)] +
+                                                        [gene_row(number, "c2") for number in range(9, 12)]))
+    return backend.transaction(genes)
+
+
+def test_bulk_edit_and_undo_round_trip(backend):
+    before = load(backend)
+    action_id, (ids, rows, chromosomes) = backend.transaction(
+        lambda store: store.bulk_edit(("region", "c1", "r1"), "methylation", True))
+    region = [row[0] for row in before if row[1:3] == ("c1", "r1")]
+    assert sorted(ids) == region and chromosomes == ["c1"]
+    assert sorted(row[0] for row in rows) == region and all(row[4] for row in rows)
+
+    second, (appended, _, _) = backend.transaction(lambda store: store.bulk_edit(("ids", region[:2]), "append", "!"))
+    assert second > action_id and sorted(appended) == region[:2]
+    assert backend.transaction(lambda store: store.undo_bulk_edit(second))[0] == appended
+    assert backend.transaction(lambda store: store.undo_bulk_edit(action_id))[0] == ids
+    assert backend.transaction(genes) == before
+    assert backend.transaction(lambda store: store.undo_bulk_edit(action_id)) == ([], [], [])
+
+
+def test_undone_delete_comes_back_under_old_ids(backend):
+    before = load(backend)
+    action_id, (ids, rows, chromosomes) = backend.transaction(
+        lambda store: store.bulk_edit(("filter", "c2", False, False), "delete"))
+    assert sorted(ids) == [row[0] for row in before if row[1] == "c2"] and rows == [] and chromosomes == ["c2"]
+    assert backend.transaction(lambda store: store.count_genes("c2")) == 0
+    undone, rows, _ = backend.transaction(lambda store: store.undo_bulk_edit(action_id))
+    assert sorted(undone) == sorted(ids) == sorted(row[0] for row in rows)
+    assert backend.transaction(genes) == before
@@ -0,0 +1,82 @@
+import json
+import threading
+import pytest
+import storage
+from gene_export import export_genes
+from tests.conftest import execute
+from tests.test_import import gene_row
+
+
+def exported_ids(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line)["id"] for line in file]
+
+
+def export(backend, path, incremental=True):
+    return backend.transaction(lambda store: export_genes(store, path, "jsonl", incremental=incremental))
+
+
+def import_genes(backend, numbers):
+    backend.transaction(lambda store: store.import_rows([gene_row(number) for number in numbers]))
+    return backend.transaction(lambda store: dict(execute(
+        store, "SELECT gene_name, id FROM genes WHERE gene_name IS NOT NULL").fetchall()))
+
+
+def test_incremental_export_follows_insertion_stamps(backend, tmp_path):
+    path = str(tmp_path / "genes.jsonl")
+    backend.transaction(lambda store: store.migrate())
+    ids = import_genes(backend, range(6))
+    assert export(backend, path, incremental=False) == 6
+    assert export(backend, path) == 0
+
+    # A gene deleted before any export saw it and restored after a later one has an id below where that export stopped
+    ids = import_genes(backend, range(6, 8))
+    action_id, _ = backend.transaction(lambda store: store.bulk_edit(("ids", [ids["g6"]]), "delete"))
+    assert export(backend, path) == 1
+    backend.transaction(lambda store: store.undo_bulk_edit(action_id))
+    assert export(backend, path) == 1
+    assert exported_ids(path) == [ids[f"g{number}"] for number in (0, 1, 2, 3, 4, 5, 7, 6)]
+
+    # Restoring an exported gene exports it again
+    action_id, _ = backend.transaction(lambda store: store.bulk_edit(("ids", [ids["g0"]]), "delete"))
+    backend.transaction(lambda store: store.undo_bulk_edit(action_id))
+    assert export(backend, path) == 1
+    assert exported_ids(path)[-1] == ids["g0"]
+
+
+def test_export_watermark_waits_for_uncommitted_inserts(backend):
+    if backend.name != "postgresql":
+        pytest.skip("SQLite serializes writers, stamps commit in order")
+    backend.transaction(lambda store: store.migrate())
+    connection = backend.acquire()
+    committer = threading.Timer(0.3, connection.commit)
+    try:
+        # Takes its stamp now and commits only after the export has read the sequence
+        gene_id = backend.store(connection, write=True).insert_gene("c1", "r1", "late")
+        committer.start()
+
+        def export_rows(store):
+            upto = store.export_watermark()
+            return [row[0] for batch in store.export_rows(0, upto, False, False) for row in batch]
+
+        assert backend.transaction(export_rows) == [gene_id]
+    finally:
+        if committer.is_alive():
+            committer.join()
+        backend.release(connection)
+
+
+def test_export_watermark_gives_up_on_idle_writers(backend, monkeypatch):
+    if backend.name != "postgresql":
+        pytest.skip("SQLite serializes writers, stamps commit in order")
+    backend.transaction(lambda store: store.migrate())
+    monkeypatch.setattr(storage, "WATERMARK_TIMEOUT", 0.2)
+    connection = backend.acquire()
+    try:
+        # Left idle in its transaction, as a client that never commits would
+        backend.store(connection, write=True).insert_gene("c1", "r1", "idle")
+        with pytest.raises(TimeoutError, match=str(connection.get_backend_pid())):
+            backend.transaction(lambda store: store.export_watermark())
+    finally:
+        backend.rollback(connection)
+        backend.release(connection)
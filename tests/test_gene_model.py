@@ -0,0 +1,58 @@
+from gene_model import COMPACT_MIN, FIRST_KEY, GeneModel
+
+
+def load(model, chrom, regions, genes_per_region):
+    model.load_summary([(chrom, regions * genes_per_region, None, None)])
+    model.set_expanded(chrom, True)
+    chromosome = model.begin_fetch(chrom)
+    assert chromosome.last_key == FIRST_KEY
+    rows = [(number, f"{region:03d}", f"g{number}", number % 2, number % 3 == 0, None, None)
+            for region in range(regions) for number in range(region * genes_per_region, (region + 1) * genes_per_region)]
+    model.append_page(chromosome, rows, True)
+
+
+def test_lookups_by_name_follow_adds_and_clears():
+    model = GeneModel()
+    load(model, "chr1", 3, 10)
+    assert model.genes.name(model.find("chr1", "001", "g12")) == "g12"
+    assert model.row_of("chr1", "001", "g12") == 1 + 11 + 1 + 2
+    model.clear_gene("chr1", "001", "g12")
+    assert model.find("chr1", "001", "g12") is None
+    model.add_gene("chr1", "001", "g12", gene_id=12)
+    assert model.genes.name(model.find("chr1", "001", "g12")) == "g12"
+    model.add_gene("chr1", "001", "g12", gene_id=12)
+    assert len(model.chromosomes["chr1"].regions["001"].genes) == 10
+
+
+def test_dead_handles_are_compacted():
+    model = GeneModel()
+    compactions = []
+    model.genesCompacted.connect(compactions.append)
+    genes_per_region = COMPACT_MIN
+    load(model, "chr1", 3, genes_per_region)
+    kept = model.find("chr1", "002", f"g{2 * genes_per_region + 5}")
+    model.clear_region("chr1", "000")
+    model.clear_region("chr1", "001")
+    assert len(compactions) == 1
+    assert len(model.genes) == genes_per_region and model.genes.dead == 0
+    moved = model.find("chr1", "002", f"g{2 * genes_per_region + 5}")
+    assert compactions[0][kept] == moved == 5
+    assert model.genes.name(moved) == f"g{2 * genes_per_region + 5}"
+    assert model.genes.gene_id(moved) == 2 * genes_per_region + 5
+    assert [model.genes.name(handle) for handle in model.chromosomes["chr1"].regions["002"].genes[:2]] == \
+        [f"g{2 * genes_per_region}", f"g{2 * genes_per_region + 1}"]
+    assert model.genes.methylation[moved] == bool((2 * genes_per_region + 5) % 2)
+
+
+def test_update_flags_only_touches_paged_in_genes():
+    model = GeneModel()
+    load(model, "chr1", 2, 5)
+    repaints = []
+    model.dataChanged.connect(lambda: repaints.append(True))
+    genes = {number: (number, "chr1", f"{number // 5:03d}", f"g{number}", True, number % 3 == 0, None, None)
+             for number in range(10)}
+    genes[99] = (99, "chr1", "001", "g99", True, True, None, None)
+    assert model.update_flags("chr1", genes) == 5  # The odd ids were methylation prone already
+    assert len(repaints) == 1
+    assert all(model.genes.methylation[handle] for region in model.chromosomes["chr1"].order for handle in region.genes)
+    assert model.update_flags("chr1", genes) == 0
@@ -0,0 +1,26 @@
+import pytest
+from gene_import import import_file
+
+
+def gene_row(number, chromosome="c1"):
+    return chromosome, f"r{number % 3}", f"g{number}", "", number % 2 == 0, False, number * 100 + 1, number * 100 + 50
+
+
+def test_import_rows_counts_only_inserted_genes(backend):
+    backend.transaction(lambda store: store.migrate())
+    assert backend.transaction(lambda store: store.import_rows([gene_row(number) for number in range(13)])) == 13
+    # Duplicates of existing genes are skipped and not counted
+    rows = [gene_row(number) for number in range(10, 16)]
+    assert backend.transaction(lambda store: store.import_rows(rows, batch_size=4)) == 3
+    assert backend.transaction(lambda store: store.count_genes("c1")) == 16
+
+
+@pytest.mark.parametrize("name, content", [
+    ("genes.bed", "chr1\t99\t200\tBRCA1\nchr1\t300\t400\tTP53\n"),
+    ("genes.csv", "chromosome,region,gene_name\nchr1,r1,BRCA1\nchr1,r1,TP53\n"),
+])
+def test_import_file_reports_rows(backend, tmp_path, name, content):
+    backend.transaction(lambda store: store.migrate())
+    path = tmp_path / name
+    path.write_text(content)
+    assert backend.transaction(lambda store: import_file(store, str(path))) == 2
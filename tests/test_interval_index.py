@@ -0,0 +1,47 @@
+import random
+from interval_index import IntervalIndex, parse_locus, parse_span
+
+
+def brute_force(intervals, start, end):
+    return sorted((first, last, value) for value, (first, last) in intervals.items() if first <= end and start <= last)
+
+
+def test_overlapping_stays_exact_across_incremental_changes():
+    randomizer = random.Random(7)
+    index = IntervalIndex()
+    expected = {}
+    for value in range(2000):
+        start = randomizer.randrange(100000)
+        expected[value] = (start, start + randomizer.randrange(500))
+        index.add(value, *expected[value])
+    for step in range(3000):
+        value = randomizer.randrange(2500)
+        if randomizer.random() < 0.4:
+            index.discard(value)
+            expected.pop(value, None)
+        else:
+            start = randomizer.randrange(100000)
+            expected[value] = (start, start + randomizer.randrange(500))
+            index.add(value, *expected[value])
+        if step % 10 == 0:
+            start = randomizer.randrange(100000)
+            assert sorted(index.overlapping(start, start + 2000)) == brute_force(expected, start, start + 2000)
+    assert len(index) == len(expected)
+
+
+def test_single_changes_do_not_rebuild():
+    index = IntervalIndex()
+    for value in range(1000):
+        index.add(value, value * 10, value * 10 + 5)
+    index.overlapping(0, 10)
+    root = index.root
+    index.add(5000, 3, 4)
+    index.discard(0)
+    assert index.root is root
+    assert [hit[2] for hit in index.overlapping(0, 10)] == [5000, 1]
+
+
+def test_parse_locus_and_span():
+    assert parse_locus("chr7:55,000,000-55,300,000") == ("chr7", 55000000, 55300000)
+    assert parse_span("20..10") == (10, 20)
+    assert parse_span("5-") is None
@@ -0,0 +1,33 @@
+from tests.conftest import execute
+
+REGIONS = {
+    "100-200": (100, 200),
+    "300-250": (250, 300),
+    "7-7": (7, 7),
+    "5-": (None, None),
+    "-5": (None, None),
+    "5-6-7": (None, None),
+    "10-20x": (None, None),
+    "chr1": (None, None),
+    "1234567890123456789-1": (None, None),  # 19 digits, past BIGINT-safe width
+}
+
+
+def test_coordinate_backfill_matches_on_both_backends(backend):
+    backend.transaction(lambda store: store.migrate(4))
+
+    def insert(store):
+        for number, region in enumerate(REGIONS):
+            execute(store, "INSERT INTO genes (chromosome, region, gene_name) VALUES (%s, %s, %s)",
+                    ("c1", region, f"g{number}"))
+
+    backend.transaction(insert)
+    backend.transaction(lambda store: store.migrate())
+    rows = backend.transaction(
+        lambda store: execute(store, "SELECT region, start_position, end_position FROM genes").fetchall())
+    assert {region: (start, end) for region, start, end in rows} == REGIONS
+
+
+def test_migrations_are_idempotent(backend):
+    assert backend.transaction(lambda store: store.migrate())
+    assert not backend.transaction(lambda store: store.migrate())
@@ -0,0 +1,28 @@
+import random
+from search_index import BULK_MERGE, SearchIndex
+
+
+def prefix_hits(index, query):
+    return sorted(gene_id for score, gene_id, *_ in index.search(query, limit=10 ** 6) if score > 1.0)
+
+
+def test_batched_changes_match_a_fresh_build():
+    randomizer = random.Random(3)
+    gene = lambda gene_id: ("c1", f"r{gene_id % 7}", f"G{randomizer.randrange(10 ** 5):05d}.{gene_id}")
+    genes = {gene_id: gene(gene_id) for gene_id in range(3000)}
+    index = SearchIndex.build((gene_id, *row, None, None) for gene_id, row in genes.items())
+    for batch in (10, BULK_MERGE * 3):
+        for _ in range(batch):
+            gene_id = randomizer.randrange(3500)
+            if gene_id in genes and randomizer.random() < 0.5:
+                index.remove(*genes.pop(gene_id))
+            else:
+                if gene_id in genes:
+                    index.remove(*genes[gene_id])
+                genes[gene_id] = gene(gene_id)
+                index.add(gene_id, *genes[gene_id])
+        fresh = SearchIndex.build((gene_id, *row, None, None) for gene_id, row in genes.items())
+        for query in ("g0", "g12", "g999", "g5"):
+            assert prefix_hits(index, query) == prefix_hits(fresh, query)
+        assert index.sorted_names == fresh.sorted_names
+        assert sorted(zip(index.sorted_names, index.sorted_ids)) == list(zip(fresh.sorted_names, fresh.sorted_ids))